@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import importlib.util
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -51,6 +52,7 @@ MIDDLEWARE = [
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "process_data.routers.ReplicaRoutingMiddleware",  # 只读请求读副本
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
@@ -94,9 +96,30 @@ DATABASES = {
             "charset": "utf8mb4",
             "init_command": "SET sql_mode='STRICT_TRANS_TABLES'",
         },
+        # 持久连接：每个工作线程复用连接 10 分钟，免去每个请求重新建立 TCP 连接和认证；
+        # 复用前检查连接是否可用，数据库重启或连接被服务端超时断开后自动重连（MySQL 后端没有连接池）
+        "CONN_MAX_AGE": 600,
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# 只读副本（可选）：设置环境变量 DB_REPLICA_HOST 后，只读请求的查询发往副本（见 process_data/routers.py），
+# 副本使用与主库相同的库名和账号，测试时镜像主库。DATABASE_READ_REPLICA 为副本的数据库别名，为 None 时全部读主库
+DATABASE_READ_REPLICA = None
+if os.environ.get("DB_REPLICA_HOST"):
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "HOST": os.environ["DB_REPLICA_HOST"],
+        "PORT": os.environ.get("DB_REPLICA_PORT", DATABASES["default"]["PORT"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_READ_REPLICA = "replica"
+
+DATABASE_ROUTERS = ["process_data.routers.ReplicaRouter"]
+
+# 写入后该客户端的读请求改读主库的秒数（读己之写），应大于副本的复制延迟；为 0 时不处理
+REPLICA_READ_AFTER_WRITE_SECONDS = 5
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -184,9 +207,25 @@ LOGGING = {
 os.makedirs(os.path.join(BASE_DIR, 'logs'), exist_ok=True)
 
 # REST Framework 设置
+# 响应格式按 Accept 请求头协商：默认使用 orjson 渲染 JSON，安装了 msgpack 时额外提供 application/msgpack
+REST_FRAMEWORK_RENDERERS = [
+    'process_data.renderers.ORJSONRenderer',
+    'rest_framework.renderers.BrowsableAPIRenderer',
+]
+REST_FRAMEWORK_PARSERS = [
+    'process_data.renderers.ORJSONParser',
+    'rest_framework.parsers.FormParser',
+    'rest_framework.parsers.MultiPartParser',
+]
+if importlib.util.find_spec('msgpack') is not None:
+    REST_FRAMEWORK_RENDERERS.append('process_data.renderers.MessagePackRenderer')
+    REST_FRAMEWORK_PARSERS.append('process_data.renderers.MessagePackParser')
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 50,
+    'DEFAULT_RENDERER_CLASSES': REST_FRAMEWORK_RENDERERS,
+    'DEFAULT_PARSER_CLASSES': REST_FRAMEWORK_PARSERS,
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
@@ -199,6 +238,35 @@ REST_FRAMEWORK = {
     ]
 }
 
+# 缓存配置：本地内存缓存，无需外部服务
+# 多进程部署时各进程的缓存互不可见，应改用 FileBasedCache 等进程间共享的后端，
+# 否则接口响应缓存的失效只作用于当前进程
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'process-data',
+        'OPTIONS': {
+            'MAX_ENTRIES': 5000,
+        },
+    },
+}
+
+# 看板统计接口的服务端缓存时间（秒）
+DASHBOARD_SUMMARY_CACHE_TIMEOUT = 15
+
+# 参考数据列表接口的响应缓存（秒），数据变更时通过模型信号立即失效
+RESPONSE_CACHE_ALIAS = 'default'
+RESPONSE_CACHE_TIMEOUT = 300
+
+# 工艺模板目录的过期时间（秒），其他进程修改模板后本进程最迟在过期后重新加载
+TEMPLATE_CATALOG_TIMEOUT = 10
+
+# 增量变更接口返回的水位比当前时间回退的秒数，覆盖事务提交延迟与服务器间的时钟偏差
+CHANGE_FEED_SAFETY_MARGIN = 5
+
+# 加工任务、传感器数据、质量记录和磨损记录的列表接口由 .values() 直接构造输出（见 process_data/fast_serializers.py）
+FAST_LIST_SERIALIZATION = True
+
 # CSRF设置
 CSRF_COOKIE_SAMESITE = None  # 允许跨站点请求
 CSRF_COOKIE_SECURE = False   # 开发环境不要求HTTPS
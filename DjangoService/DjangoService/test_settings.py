@@ -0,0 +1,20 @@
+"""
+本地测试配置：主库和只读副本分别使用一个 SQLite 文件，无需 MySQL
+用法: python manage.py test process_data --settings=DjangoService.test_settings
+副本是独立的数据库，写入主库的数据不会出现在副本中，相当于复制无限延迟。
+其他测试不读副本（DATABASE_READ_REPLICA 为 None），读写分离的测试以 override_settings 打开
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db.sqlite3",
+    },
+    "replica": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": BASE_DIR / "db_replica.sqlite3",
+    },
+}
+DATABASE_READ_REPLICA = None
@@ -5,3 +5,12 @@ class ProcessDataConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "process_data"
     verbose_name = "工艺数据管理"
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from .signals import connect_cache_invalidation, connect_pivot_refresh, connect_search_index
+
+        # 检索索引先于缓存失效注册：提交后先重建索引，再更新缓存版本号，新版本的缓存不会读到旧索引
+        connect_search_index()
+        connect_cache_invalidation([*self.get_models(), get_user_model()])
+        connect_pivot_refresh()
@@ -0,0 +1,186 @@
+"""
+接口响应缓存与条件请求
+ResponseCacheMixin 用于刀具、复合材料、用户、任务组、工艺分类等变化较少的参考数据列表接口，
+缓存键由视图、用户、权限范围、查询参数以及所依赖模型的版本号组成；
+模型通过 post_save/post_delete 信号（见 signals.py）或批量写入后显式调用 invalidate_model_cache 更新版本号，
+旧版本的缓存随即失效，无需逐个删除缓存键。
+ConditionalGetMixin 为列表与详情接口生成 ETag/Last-Modified，If-None-Match 命中时直接返回 304。
+"""
+import hashlib
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.http import http_date, parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from .routers import use_primary
+
+VERSION_KEY_PREFIX = 'process_data:model_version:'
+RESPONSE_KEY_PREFIX = 'process_data:response:'
+
+
+def get_response_cache():
+    return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+
+def _version_key(model):
+    return f'{VERSION_KEY_PREFIX}{model._meta.label_lower}'
+
+
+def get_model_versions(models):
+    """
+    读取模型版本号，缺失的版本号（首次使用或被缓存淘汰）立即生成新值
+    版本号取纳秒时间戳而非自增计数，被淘汰后重新生成也不会与旧缓存键重复
+    """
+    cache = get_response_cache()
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def _bump_model_version(model):
+    get_response_cache().set(_version_key(model), time.time_ns(), None)
+
+
+def invalidate_model_cache(model):
+    """
+    使依赖该模型的接口缓存失效
+    立即更新一次版本号，并在事务提交后再更新一次，避免并发请求在提交前把旧数据写入新版本的缓存
+    """
+    _bump_model_version(model)
+    transaction.on_commit(lambda: _bump_model_version(model))
+
+
+def _request_fingerprint(view, request, kwargs):
+    """请求的表示维度：视图、action、路由参数、用户与权限范围、查询参数、主机（分页链接）和响应格式"""
+    user = request.user
+    renderer = getattr(request, 'accepted_renderer', None)
+    return (
+        view.basename,
+        view.action,
+        sorted(kwargs.items()),
+        user.pk,
+        f'{int(user.is_staff)}{int(user.is_superuser)}',
+        sorted(request.query_params.lists()),
+        request.get_host(),
+        getattr(renderer, 'media_type', None),
+    )
+
+
+class ConditionalGetMixin:
+    """
+    条件请求视图集混入类，为 list/retrieve 接口生成强 ETag 与 Last-Modified，
+    If-None-Match 命中时返回 304，不执行序列化。
+    校验值由过滤后查询集的 max(updated_at) 与行数（一次聚合查询），
+    以及自身与 conditional_dependencies 中关联模型的版本号共同决定，关联数据变化同样会改变 ETag；
+    conditional_from_versions 为真时（如已使用 ResponseCacheMixin 的接口）只使用版本号，不访问数据库
+    """
+    conditional_dependencies = ()
+    last_modified_field = 'updated_at'
+
+    def get_conditional_dependencies(self):
+        model = self.get_queryset().model if self.queryset is None else self.queryset.model
+        models = [model, *self.conditional_dependencies, *getattr(self, 'cache_dependencies', ())]
+        return list(dict.fromkeys(models))
+
+    def get_queryset_stats(self, **kwargs):
+        """返回 (行数, 最后修改时间)，详情接口按路由参数过滤到单个对象"""
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == 'retrieve':
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: kwargs[lookup_url_kwarg]})
+        aggregates = {'count': Count('pk')}
+        if self.last_modified_field:
+            aggregates['last_modified'] = Max(self.last_modified_field)
+        stats = queryset.order_by().aggregate(**aggregates)
+        return stats['count'], stats.get('last_modified')
+
+    def get_conditional_validators(self, request, **kwargs):
+        """返回 (etag, last_modified)；对象不存在或参数无效时返回 None，由原处理函数给出错误响应"""
+        versions = get_model_versions(self.get_conditional_dependencies())
+        if getattr(self, 'conditional_from_versions', False):
+            count = last_modified = None
+        else:
+            try:
+                count, last_modified = self.get_queryset_stats(**kwargs)
+            except (ValueError, TypeError, DjangoValidationError):
+                return None
+            if self.action == 'retrieve' and not count:
+                return None
+        if last_modified is None:
+            # 没有修改时间字段时以最近的版本号（纳秒时间戳）作为最后修改时间
+            last_modified = datetime.fromtimestamp(max(versions) / 1e9, tz=dt_timezone.utc)
+
+        digest = hashlib.md5(repr((
+            _request_fingerprint(self, request, kwargs), versions, count, last_modified.isoformat()
+        )).encode('utf-8')).hexdigest()
+        return f'"{digest}"', last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        validators = self.get_conditional_validators(request, **kwargs)
+        if validators is None:
+            return handler(request, *args, **kwargs)
+
+        etag, last_modified = validators
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if etag in if_none_match or '*' in if_none_match:
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(super().retrieve, request, *args, **kwargs)
+
+
+class ResponseCacheMixin:
+    """
+    视图集响应缓存混入类，缓存 list 接口（其他 action 可通过 cached_response 接入）
+    cache_dependencies 声明响应数据依赖的模型；缓存命中时直接返回缓存的数据，不经过 ORM 与序列化器
+    """
+    cache_dependencies = ()
+    # 缓存数据只随版本号失效，条件请求的校验值同样只取版本号
+    conditional_from_versions = True
+
+    def get_response_cache_key(self, request, **kwargs):
+        digest = hashlib.md5(repr(_request_fingerprint(self, request, kwargs)).encode('utf-8')).hexdigest()
+        versions = '.'.join(str(version) for version in get_model_versions(self.cache_dependencies))
+        return f'{RESPONSE_KEY_PREFIX}{versions}:{digest}'
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """缓存 handler 返回的 200 响应数据，匿名请求不缓存"""
+        if not request.user.is_authenticated:
+            return handler(request, *args, **kwargs)
+
+        cache = get_response_cache()
+        key = self.get_response_cache_key(request, **kwargs)
+        data = cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        # 缓存的数据在版本号失效前一直返回，从主库读取，不缓存副本中滞后的数据
+        with use_primary():
+            response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
@@ -0,0 +1,217 @@
+"""
+工艺模板目录：模板及其参数定义的进程内缓存
+一次查询取出全部模板（连同分类），一次预取全部模板参数及参数定义，组装为 TemplateEntry，
+模板列表接口和工艺数据录入都从目录读取模板参数。
+目录随 ProcessTemplate / TemplateParameter / ProcessParameter / ProcessCategory 的缓存版本号（见 caching.py）整体失效，
+版本号保存在共享缓存中，读取目录不访问模板相关的表；各条目另以模板的 (version, updated_at) 标识，
+列表接口查到的模板行与目录不一致时（如通过 queryset.update() 修改、未发送信号）重新加载目录。
+版本号只在处理写入的进程内更新（LocMemCache 按进程隔离），目录另按 TEMPLATE_CATALOG_TIMEOUT 秒过期，
+其他进程修改模板后最迟在过期后按新的模板参数校验。
+每个模板的参数值校验器（TemplateValidator）在首次使用时编译，随目录条目缓存
+"""
+import re
+import time
+
+from django.conf import settings
+from django.db.models import Prefetch, Q
+
+from .caching import get_model_versions
+from .models import (
+    ProcessCategory,
+    ProcessParameter,
+    ProcessTemplate,
+    TemplateParameter,
+    parse_boolean,
+    parse_date_value,
+    parse_number,
+)
+from .routers import use_primary
+
+CATALOG_MODELS = (ProcessTemplate, TemplateParameter, ProcessParameter, ProcessCategory)
+
+# 枚举值以中英文逗号分隔
+_ENUM_SEPARATOR_RE = re.compile(r'[,，]')
+
+
+def _accept(raw):
+    return None
+
+
+def compile_check(parameter):
+    """按参数定义生成取值检查函数：值合法时返回 None，否则返回错误信息"""
+    parameter_type = parameter.parameter_type
+    if parameter_type == 'number':
+        low, high = parameter.min_value, parameter.max_value
+
+        def check_number(raw):
+            number = parse_number(raw)
+            if number is None:
+                return '必须是数值'
+            if low is not None and number < low:
+                return f'不能小于 {low:g}'
+            if high is not None and number > high:
+                return f'不能大于 {high:g}'
+            return None
+        return check_number
+
+    if parameter_type == 'enum':
+        options = [option.strip() for option in _ENUM_SEPARATOR_RE.split(parameter.enum_values or '') if option.strip()]
+        if not options:
+            return _accept
+        allowed = set(options)
+        message = f'必须是 {"、".join(options)} 之一'
+        return lambda raw: None if raw.strip() in allowed else message
+
+    if parameter_type == 'boolean':
+        return lambda raw: None if parse_boolean(raw) is not None else '必须是布尔值（是/否、true/false）'
+    if parameter_type == 'date':
+        return lambda raw: None if parse_date_value(raw) is not None else '必须是日期（YYYY-MM-DD）'
+    return _accept
+
+
+class TemplateValidator:
+    """
+    按模板编译的参数值校验器
+    每个参数的类型、范围和枚举检查在编译时生成一次，校验时每个值只做一次字典查找和一次检查函数调用；
+    validate_batch 一次校验整批导入数据
+    """
+
+    def __init__(self, template_parameters):
+        self.checks = {}
+        self.required = {}
+        for item in template_parameters:
+            parameter = item.parameter
+            self.checks[parameter.code] = (item, compile_check(parameter))
+            if item.is_required or parameter.is_required:
+                self.required[parameter.code] = item.default_value or parameter.default_value
+
+    def validate(self, values):
+        """
+        校验一条记录的参数值 {参数编码: 值}，返回 (有效值 [(TemplateParameter, 值)], 错误 {参数编码: [错误信息]})
+        不属于模板的参数编码忽略；必填参数未提供或为空白时取模板参数或参数定义的默认值，都没有时报错
+        """
+        cleaned = []
+        errors = {}
+        provided = set()
+        for code, raw in values.items():
+            compiled = self.checks.get(code)
+            if compiled is None:
+                continue
+            if code in self.required and (raw is None or not str(raw).strip()):
+                continue
+            provided.add(code)
+            item, check = compiled
+            message = check(raw)
+            if message is None:
+                cleaned.append((item, raw))
+            else:
+                errors[code] = [message]
+        for code, default in self.required.items():
+            if code in provided:
+                continue
+            if default in (None, ''):
+                errors[code] = ['该参数为必填项']
+            else:
+                cleaned.append((self.checks[code][0], default))
+        return cleaned, errors
+
+    def validate_batch(self, records):
+        """校验多条记录的参数值，返回与输入一一对应的 [(有效值, 错误)]"""
+        validate = self.validate
+        return [validate(values) for values in records]
+
+
+class TemplateEntry:
+    """
+    目录中的一个模板：template 为预取了分类与模板参数的模型实例，parameters 为按 order 排序的 TemplateParameter，
+    data 为模板列表接口的默认输出，validator 为参数值校验器，都在首次使用时生成。条目在多个请求间共享，只读不改
+    """
+    __slots__ = ('template', 'key', 'parameters', 'parameters_by_code', 'data', '_validator')
+
+    def __init__(self, template):
+        self.template = template
+        self.key = (template.version, template.updated_at)
+        self.parameters = list(template.templateparameter_set.all())
+        self.parameters_by_code = {item.parameter.code: item for item in self.parameters}
+        self.data = None
+        self._validator = None
+
+    @property
+    def validator(self):
+        if self._validator is None:
+            self._validator = TemplateValidator(self.parameters)
+        return self._validator
+
+
+class TemplateCatalog:
+    def __init__(self, versions, entries, loaded_at=0.0):
+        self.versions = versions
+        self.entries = entries
+        self.loaded_at = loaded_at
+
+    def is_expired(self):
+        return time.monotonic() - self.loaded_at >= getattr(settings, 'TEMPLATE_CATALOG_TIMEOUT', 10)
+
+    def get(self, template_id):
+        return self.entries.get(template_id)
+
+    def find(self, value):
+        """按模板ID或编码查找未删除的模板"""
+        value = str(value).strip()
+        entry = self.entries.get(int(value)) if value.isdigit() else None
+        if entry is None:
+            entry = next((entry for entry in self.entries.values() if entry.template.code == value), None)
+        return entry if entry is not None and not entry.template.is_deleted else None
+
+    def is_current(self, template):
+        """目录中的条目与给定的模板行是否一致"""
+        entry = self.entries.get(template.pk)
+        return entry is not None and entry.key == (template.version, template.updated_at)
+
+
+_catalog = TemplateCatalog(None, {})
+
+
+def load_catalog(versions):
+    """两次查询：模板连同分类，模板参数连同参数定义；目录随版本号缓存，从主库读取"""
+    templates = ProcessTemplate.objects.select_related('category').prefetch_related(
+        Prefetch('templateparameter_set', queryset=TemplateParameter.objects.select_related('parameter'))
+    )
+    loaded_at = time.monotonic()
+    with use_primary():
+        return TemplateCatalog(versions, {template.pk: TemplateEntry(template) for template in templates}, loaded_at)
+
+
+def get_catalog(reload=False):
+    """
+    返回当前的模板目录，版本号变化、目录过期或 reload 为真时重新加载
+    版本号在加载前读取，加载期间发生的修改会使下一次调用再次加载
+    """
+    global _catalog
+    versions = get_model_versions(CATALOG_MODELS)
+    catalog = _catalog
+    if reload or catalog.versions != versions or catalog.is_expired():
+        catalog = _catalog = load_catalog(versions)
+    return catalog
+
+
+def get_entry(template_id):
+    """
+    按模板ID取目录条目，模板不存在时返回 None
+    目录中没有该模板时（如由管理命令或其他进程创建，本进程缓存的版本号没有变化）确认模板存在后重新加载一次目录
+    """
+    entry = get_catalog().get(template_id)
+    if entry is None and ProcessTemplate.objects.filter(pk=template_id).exists():
+        entry = get_catalog(reload=True).get(template_id)
+    return entry
+
+
+def find_entry(value):
+    """按模板ID或编码查找未删除的模板，目录中没有时与 get_entry 一样确认存在后重新加载一次目录"""
+    entry = get_catalog().find(value)
+    if entry is None:
+        value = str(value).strip()
+        condition = Q(code=value) | Q(pk=int(value)) if value.isdigit() else Q(code=value)
+        if ProcessTemplate.objects.filter(condition, is_deleted=False).exists():
+            entry = get_catalog(reload=True).find(value)
+    return entry
@@ -0,0 +1,306 @@
+"""
+基于 .values() 的只读列表快速序列化
+ModelSerializer 每次序列化都要实例化字段对象，并对每一行的每个字段调用 to_representation；
+ValuesSerializer 以对应的 ModelSerializer 为蓝本，启动后首次使用时把字段编译成按 .values() 结果取值的函数，
+选项字段的显示名预先做成映射表，嵌套对象通过关联查找在同一条查询中取出，一对多的嵌套列表按页额外查询一次。
+输出与对应的 ModelSerializer 完全一致（字段、顺序与 fields/expand 稀疏字段集），由 tests.py 中的对照测试保证。
+"""
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+from .serializers import (
+    UserSerializer,
+    ParameterValueSerializer,
+    ProcessDataSerializer,
+    ToolSerializer,
+    CompositeMaterialSerializer,
+    ProcessingParameterSerializer,
+    ProcessingTaskListSerializer,
+    SensorDataSerializer,
+    ProcessingQualitySerializer,
+    ToolWearRecordSerializer,
+)
+
+# 这些字段的 to_representation 对数据库取出的值不做任何转换，直接输出
+PASSTHROUGH_FIELD_TYPES = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+    serializers.ChoiceField,
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+)
+
+_compiled_fields = {}
+
+# serialize() 期间的当前时区，时间字段不必逐值查找
+_serialize_state = threading.local()
+
+
+class CompiledField:
+    """编译后的字段：输出名、依赖的 values() 列和取值函数；一对多嵌套列表的取值函数按页生成"""
+    __slots__ = ('name', 'columns', 'getter', 'related')
+
+    def __init__(self, name, columns, getter=None, related=None):
+        self.name = name
+        self.columns = columns
+        self.getter = getter
+        self.related = related
+
+
+def _value_getter(key, convert=None):
+    if convert is None:
+        return lambda row: row[key]
+    return lambda row: None if row[key] is None else convert(row[key])
+
+
+def _is_iso_datetime_field(field):
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+    return (type(field) is serializers.DateTimeField and not hasattr(field, 'timezone')
+            and isinstance(output_format, str) and output_format.lower() == ISO_8601)
+
+
+def _datetime_getter(key, to_representation):
+    # 与 DateTimeField.to_representation 相同：转换到当前时区后输出 ISO 8601，UTC 以 Z 结尾
+    def getter(row):
+        value = row[key]
+        if value is None:
+            return None
+        current_timezone = getattr(_serialize_state, 'timezone', None)
+        if current_timezone is None or timezone.is_naive(value):
+            return to_representation(value)
+        value = value.astimezone(current_timezone).isoformat()
+        if value.endswith('+00:00'):
+            value = value[:-6] + 'Z'
+        return value
+    return getter
+
+
+def _display_getter(key, choices):
+    # 与 get_FOO_display 一致：不在选项中的值原样输出
+    return lambda row: None if row[key] is None else str(choices.get(row[key], row[key]))
+
+
+def _method_getter(func, keys):
+    return lambda row: func(*[row[key] for key in keys])
+
+
+def _nested_getter(pk_key, fields):
+    getters = [(field.name, field.getter) for field in fields]
+
+    def getter(row):
+        if row[pk_key] is None:
+            return None
+        return {name: get(row) for name, get in getters}
+    return getter
+
+
+class ValuesSerializer:
+    """
+    只读列表快速序列化器基类
+    serializer_class 为对应的 ModelSerializer；nested 声明嵌套序列化器字段对应的 ValuesSerializer；
+    method_fields 以 {字段名: (values 查找列表, 函数)} 声明 SerializerMethodField 的等价实现，
+    函数按查找列表的顺序接收各列的值。未声明的 SerializerMethodField 会在编译时报错，避免输出悄悄不一致
+    """
+    serializer_class = None
+    nested = {}
+    method_fields = {}
+
+    def __init__(self, request=None):
+        fields = self.compile_fields()
+        names = [field.name for field in fields]
+        if hasattr(self.serializer_class, 'select_field_names'):
+            names = set(self.serializer_class.select_field_names(names, request))
+        self.fields = [field for field in fields if field.name in names]
+
+    @classmethod
+    def get_model(cls):
+        return cls.serializer_class.Meta.model
+
+    @classmethod
+    def compile_fields(cls, prefix=''):
+        """编译字段，prefix 为作为嵌套对象时在上层 values() 中的关联查找前缀"""
+        key = (cls, prefix)
+        if key not in _compiled_fields:
+            _compiled_fields[key] = [
+                cls.compile_field(name, field, prefix)
+                for name, field in cls.serializer_class().fields.items()
+            ]
+        return _compiled_fields[key]
+
+    @classmethod
+    def compile_field(cls, name, field, prefix):
+        model = cls.get_model()
+        if name in cls.method_fields:
+            lookups, func = cls.method_fields[name]
+            keys = [prefix + lookup for lookup in lookups]
+            return CompiledField(name, keys, _method_getter(func, keys))
+
+        if isinstance(field, serializers.ListSerializer):
+            if prefix:
+                raise ImproperlyConfigured(f'{cls.__name__}.{name}: 嵌套对象中不支持一对多字段')
+            relation = model._meta.get_field(field.source)
+            return CompiledField(name, [model._meta.pk.attname],
+                                 related=(cls.nested[name], relation.field))
+
+        if isinstance(field, serializers.BaseSerializer):
+            pk_key = prefix + field.source
+            nested_fields = cls.nested[name].compile_fields(f'{pk_key}__')
+            columns = [pk_key] + [column for nested in nested_fields for column in nested.columns]
+            return CompiledField(name, columns, _nested_getter(pk_key, nested_fields))
+
+        if isinstance(field, serializers.SerializerMethodField):
+            raise ImproperlyConfigured(f'{cls.__name__}.method_fields 未声明 {name} 的实现')
+
+        source = field.source
+        if source.startswith('get_') and source.endswith('_display'):
+            model_field = model._meta.get_field(source[len('get_'):-len('_display')])
+            key = prefix + model_field.name
+            return CompiledField(name, [key], _display_getter(key, dict(model_field.flatchoices)))
+
+        key = prefix + source.replace('.', '__')
+        if _is_iso_datetime_field(field):
+            return CompiledField(name, [key], _datetime_getter(key, field.to_representation))
+        convert = None if isinstance(field, PASSTHROUGH_FIELD_TYPES) else field.to_representation
+        return CompiledField(name, [key], _value_getter(key, convert))
+
+    def get_columns(self):
+        columns = [self.get_model()._meta.pk.attname]
+        for field in self.fields:
+            columns.extend(field.columns)
+        return list(dict.fromkeys(columns))
+
+    def get_values_queryset(self, queryset):
+        """
+        把视图集的查询集转换为 values() 查询集
+        排序字段一并取出，游标分页需要从最后一行读取游标位置
+        """
+        columns = self.get_columns()
+        columns.extend(field.lstrip('-') for field in queryset.query.order_by if isinstance(field, str))
+        return queryset.select_related(None).prefetch_related(None).values(*dict.fromkeys(columns))
+
+    def get_related_getter(self, field, rows):
+        """一对多嵌套列表：按本页的主键一次查出所有子记录并分组"""
+        nested_class, foreign_key = field.related
+        pk_key = self.get_model()._meta.pk.attname
+        nested_fields = nested_class.compile_fields()
+        getters = [(nested.name, nested.getter) for nested in nested_fields]
+        columns = [column for nested in nested_fields for column in nested.columns]
+
+        grouped = defaultdict(list)
+        ids = {row[pk_key] for row in rows}
+        if ids:
+            related_rows = nested_class.get_model()._default_manager.filter(
+                **{f'{foreign_key.name}__in': ids}
+            ).values(*dict.fromkeys(columns + [foreign_key.attname]))
+            for related_row in related_rows:
+                grouped[related_row[foreign_key.attname]].append(
+                    {name: get(related_row) for name, get in getters}
+                )
+        return lambda row: grouped.get(row[pk_key], [])
+
+    def serialize(self, rows):
+        """把 values() 结果转换为与 ModelSerializer 相同的输出"""
+        rows = list(rows)
+        _serialize_state.timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+        getters = [
+            (field.name, field.getter if field.related is None else self.get_related_getter(field, rows))
+            for field in self.fields
+        ]
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+
+def _user_full_name(first_name, last_name, username):
+    return f'{first_name} {last_name}'.strip() or username
+
+
+class UserValuesSerializer(ValuesSerializer):
+    serializer_class = UserSerializer
+    method_fields = {'full_name': (('first_name', 'last_name', 'username'), _user_full_name)}
+
+
+def _related_user_name(user_id, first_name, last_name, username):
+    if user_id is None:
+        return None
+    return _user_full_name(first_name, last_name, username)
+
+
+class ParameterValueValuesSerializer(ValuesSerializer):
+    serializer_class = ParameterValueSerializer
+
+
+class ProcessDataValuesSerializer(ValuesSerializer):
+    serializer_class = ProcessDataSerializer
+    nested = {
+        'operator_info': UserValuesSerializer,
+        'parameter_values': ParameterValueValuesSerializer,
+    }
+    method_fields = {
+        'operator_name': (
+            ('operator', 'operator__first_name', 'operator__last_name', 'operator__username'),
+            _related_user_name,
+        ),
+    }
+
+
+class ToolValuesSerializer(ValuesSerializer):
+    serializer_class = ToolSerializer
+
+
+class CompositeMaterialValuesSerializer(ValuesSerializer):
+    serializer_class = CompositeMaterialSerializer
+
+
+class ProcessingParameterValuesSerializer(ValuesSerializer):
+    serializer_class = ProcessingParameterSerializer
+
+
+class ProcessingTaskListValuesSerializer(ValuesSerializer):
+    serializer_class = ProcessingTaskListSerializer
+    nested = {
+        'tool_info': ToolValuesSerializer,
+        'material_info': CompositeMaterialValuesSerializer,
+        'operator_info': UserValuesSerializer,
+        'parameters': ProcessingParameterValuesSerializer,
+    }
+    method_fields = {
+        'group_name': (('group__name',), lambda name: "未分配" if name is None else name),
+    }
+
+
+def _file_size_mb(file_size):
+    if file_size:
+        return round(file_size / (1024 * 1024), 2)
+    return None
+
+
+class SensorDataValuesSerializer(ValuesSerializer):
+    serializer_class = SensorDataSerializer
+    method_fields = {
+        'task_info': (
+            ('processing_task', 'processing_task__task_code'),
+            lambda task_id, task_code: None if task_id is None else {'id': task_id, 'task_code': task_code},
+        ),
+        'file_size_mb': (('file_size',), _file_size_mb),
+    }
+
+
+class ProcessingQualityValuesSerializer(ValuesSerializer):
+    serializer_class = ProcessingQualitySerializer
+    nested = {'inspector_info': UserValuesSerializer}
+    method_fields = {
+        'inspector_name': (
+            ('inspector', 'inspector__first_name', 'inspector__last_name', 'inspector__username'),
+            _related_user_name,
+        ),
+    }
+
+
+class ToolWearRecordValuesSerializer(ValuesSerializer):
+    serializer_class = ToolWearRecordSerializer
@@ -0,0 +1,111 @@
+"""
+过滤器后端
+- 按参数值过滤：?parameter=<参数> 只返回含该参数的记录，可再加 ?parameter_min= / ?parameter_max= 按范围过滤
+  （数值型、日期型），或 ?parameter_value= 按值精确匹配。过滤使用参数值的类型化影子列（见 models.TypedValueModel），
+  在数据库中完成
+- 全文检索：?search= 对已注册为检索目标的模型使用倒排索引（见 search.py），不再对各字段做 icontains 全表扫描
+"""
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+
+from .models import (
+    ProcessParameter,
+    ParameterValue,
+    ProcessingParameter,
+    TypedValueModel,
+    infer_parameter_type,
+)
+from .search import SEARCH_TARGETS, filter_by_search
+
+RANGE_TYPES = ('number', 'date')
+
+
+class ParameterValueFilter(BaseFilterBackend):
+    """
+    参数值过滤器基类
+    子类指定参数值模型 value_model、指向被过滤记录的外键 owner_field，并实现 get_parameter_values
+    """
+    parameter_query_param = 'parameter'
+    min_query_param = 'parameter_min'
+    max_query_param = 'parameter_max'
+    value_query_param = 'parameter_value'
+    value_model = None
+    owner_field = None
+
+    def get_parameter_values(self, name, sample):
+        """返回 (该参数的参数值查询集, 参数类型)；sample 为请求中的某个过滤值，可用于推断类型"""
+        raise NotImplementedError
+
+    def parse(self, parameter_type, raw, query_param):
+        value = TypedValueModel.PARSERS[parameter_type](raw)
+        if value is None:
+            raise ValidationError({query_param: [f'无法解析为{dict(ProcessParameter.PARAMETER_TYPES)[parameter_type]}']})
+        return value
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        name = params.get(self.parameter_query_param)
+        if not name:
+            return queryset
+
+        bounds = [(params.get(self.min_query_param), 'gte', self.min_query_param),
+                  (params.get(self.max_query_param), 'lte', self.max_query_param)]
+        exact = params.get(self.value_query_param)
+        sample = next((raw for raw, _, _ in bounds if raw), exact)
+        values, parameter_type = self.get_parameter_values(name, sample)
+
+        typed_field = TypedValueModel.TYPED_FIELDS.get(parameter_type)
+        for raw, lookup, query_param in bounds:
+            if not raw:
+                continue
+            if parameter_type not in RANGE_TYPES:
+                raise ValidationError({query_param: ['只有数值型和日期型参数支持范围过滤']})
+            values = values.filter(**{f'{typed_field}__{lookup}': self.parse(parameter_type, raw, query_param)})
+
+        if exact is not None:
+            if typed_field is None:
+                values = values.filter(**{self.value_model.raw_value_field: exact})
+            else:
+                values = values.filter(**{typed_field: self.parse(parameter_type, exact, self.value_query_param)})
+
+        # 先由 (参数, 类型化值) 索引选出参数值，再按主键取记录
+        return queryset.filter(pk__in=values.values(self.owner_field))
+
+
+class ProcessDataParameterFilter(ParameterValueFilter):
+    """按工艺参数编码过滤工艺数据，参数类型取自 ProcessParameter.parameter_type"""
+    value_model = ParameterValue
+    owner_field = 'process_data_id'
+
+    def get_parameter_values(self, name, sample):
+        parameter = ProcessParameter.objects.filter(code=name, is_deleted=False).values_list(
+            'pk', 'parameter_type'
+        ).first()
+        if parameter is None:
+            raise ValidationError({self.parameter_query_param: [f'参数 {name} 不存在']})
+        parameter_id, parameter_type = parameter
+        return ParameterValue.objects.filter(parameter_id=parameter_id, is_deleted=False), parameter_type
+
+
+class ProcessingTaskParameterFilter(ParameterValueFilter):
+    """按加工参数名称过滤加工任务，加工参数没有类型定义，按请求中的过滤值推断类型"""
+    value_model = ProcessingParameter
+    owner_field = 'task_id'
+
+    def get_parameter_values(self, name, sample):
+        parameter_type = infer_parameter_type(sample) if sample else 'text'
+        return ProcessingParameter.objects.filter(parameter_name=name), parameter_type
+
+
+class IndexedSearchFilter(SearchFilter):
+    """
+    使用全文检索索引的 ?search= 过滤器，检索字段由 search.SEARCH_TARGETS 声明
+    模型不是检索目标，或关键词切分不出词元（如只有标点）时，退回 SearchFilter 按 search_fields 做 icontains 过滤
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if queryset.model._meta.model_name in SEARCH_TARGETS:
+            filtered = filter_by_search(queryset, request.query_params.get(self.search_param, ''))
+            if filtered is not None:
+                return filtered
+        return super().filter_queryset(request, queryset, view)
@@ -0,0 +1,45 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from process_data.models import ParameterValue, ProcessingParameter
+
+
+class Command(BaseCommand):
+    """
+    按主键分块回填参数值的类型化影子列（value_number / value_boolean / value_date）
+    新增影子列的迁移执行后运行一次；通过 queryset.update() 直接修改原始值后也需要重新运行
+    用法: python manage.py backfill_typed_values --chunk-size 2000
+    """
+    help = '分块回填工艺参数值与加工参数的类型化影子列'
+
+    MODELS = {
+        'parameter-values': ParameterValue,
+        'processing-parameters': ProcessingParameter,
+    }
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='每个事务处理的行数')
+        parser.add_argument('--model', choices=sorted(self.MODELS), action='append',
+                            help='只回填指定的模型，可重复指定，默认全部')
+        parser.add_argument('--parameter', help='只回填指定编码的工艺参数的参数值')
+
+    def handle(self, *args, **options):
+        for name in options['model'] or sorted(self.MODELS):
+            model = self.MODELS[name]
+            queryset = model.objects.all()
+            if options['parameter']:
+                if model is not ParameterValue:
+                    continue
+                queryset = queryset.filter(parameter__code=options['parameter'])
+
+            started = time.perf_counter()
+            total_rows = queryset.count()
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name}: 共 {total_rows} 行'))
+            total = model.refresh_typed_values(
+                queryset, options['chunk_size'],
+                progress=lambda done: self.stdout.write(f'  已处理 {done}/{total_rows}'),
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{name}: 回填 {total} 行，耗时 {time.perf_counter() - started:.1f} 秒'
+            ))
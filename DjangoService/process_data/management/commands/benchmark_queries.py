@@ -0,0 +1,177 @@
+import time
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from process_data.models import (
+    Tool,
+    CompositeMaterial,
+    ProcessingTask,
+    SensorData,
+    ProcessingQuality,
+    ToolWearRecord,
+    TaskGroup,
+)
+
+# 基准测试数据的编码前缀，便于识别和清理
+BENCH_PREFIX = 'BENCH-'
+
+
+class Command(BaseCommand):
+    """
+    生成大规模基准测试数据，并输出热点列表查询的执行计划与耗时
+    用法: python manage.py benchmark_queries --tasks 20000 --records-per-task 5
+    """
+    help = '生成基准测试数据并输出列表查询的 EXPLAIN 执行计划和耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=10000, help='生成的加工任务数量')
+        parser.add_argument('--records-per-task', type=int, default=5,
+                            help='每个任务生成的传感器/质量/磨损记录数量')
+        parser.add_argument('--batch-size', type=int, default=2000, help='批量插入的批次大小')
+        parser.add_argument('--repeat', type=int, default=5, help='每条查询的计时重复次数')
+        parser.add_argument('--skip-seed', action='store_true', help='跳过数据生成，只输出执行计划')
+        parser.add_argument('--cleanup', action='store_true', help='删除之前生成的基准测试数据后退出')
+
+    def handle(self, *args, **options):
+        if options['cleanup']:
+            self.cleanup()
+            return
+
+        if not options['skip_seed']:
+            self.seed(options['tasks'], options['records_per_task'], options['batch_size'])
+
+        self.benchmark(options['repeat'])
+
+    def cleanup(self):
+        """删除基准测试数据（任务删除时级联删除其关联记录）"""
+        with transaction.atomic():
+            ProcessingTask.objects.filter(task_code__startswith=BENCH_PREFIX).delete()
+            TaskGroup.objects.filter(name__startswith=BENCH_PREFIX).delete()
+            Tool.objects.filter(code__startswith=BENCH_PREFIX).delete()
+            CompositeMaterial.objects.filter(part_number__startswith=BENCH_PREFIX).delete()
+        self.stdout.write(self.style.SUCCESS('已清理基准测试数据'))
+
+    def seed(self, task_total, records_per_task, batch_size):
+        """批量生成基准测试数据"""
+        started = time.perf_counter()
+        run_id = timezone.now().strftime('%Y%m%d%H%M%S')
+        now = timezone.now()
+
+        tools = Tool.objects.bulk_create([
+            Tool(code=f'{BENCH_PREFIX}{run_id}-T{index}', tool_type='钻头', tool_spec='D6',
+                 initial_wear_threshold=0.3)
+            for index in range(50)
+        ])
+        materials = CompositeMaterial.objects.bulk_create([
+            CompositeMaterial(part_number=f'{BENCH_PREFIX}{run_id}-M{index}', material_type='carbon_fiber',
+                              thickness=5.0, processing_requirements='基准测试')
+            for index in range(50)
+        ])
+        groups = TaskGroup.objects.bulk_create([
+            TaskGroup(name=f'{BENCH_PREFIX}{run_id}-G{index}') for index in range(100)
+        ])
+
+        task_types = [choice for choice, _ in ProcessingTask.TASK_TYPE_CHOICES]
+        task_statuses = [choice for choice, _ in ProcessingTask.TASK_STATUS_CHOICES]
+        sensor_types = [choice for choice, _ in SensorData.SENSOR_TYPE_CHOICES]
+
+        for offset in range(0, task_total, batch_size):
+            with transaction.atomic():
+                tasks = ProcessingTask.objects.bulk_create([
+                    ProcessingTask(
+                        task_code=f'{BENCH_PREFIX}{run_id}-{index}',
+                        processing_time=now - timedelta(minutes=index),
+                        processing_type=random.choice(task_types),
+                        status=random.choice(task_statuses),
+                        tool=random.choice(tools),
+                        composite_material=random.choice(materials),
+                        group=random.choice(groups),
+                        is_deleted=index % 20 == 0,
+                    )
+                    for index in range(offset, min(offset + batch_size, task_total))
+                ])
+
+                sensor_rows, quality_rows, wear_rows = [], [], []
+                for task in tasks:
+                    for record_index in range(records_per_task):
+                        record_time = task.processing_time + timedelta(seconds=record_index)
+                        sensor_rows.append(SensorData(
+                            sensor_type=random.choice(sensor_types),
+                            file_name=f'{task.task_code}-{record_index}.csv',
+                            upload_time=record_time,
+                            processing_task=task,
+                        ))
+                        quality_rows.append(ProcessingQuality(
+                            surface_roughness=random.uniform(0.5, 3.2),
+                            dimensional_tolerance=random.uniform(0.01, 0.1),
+                            inspection_time=record_time,
+                            processing_task=task,
+                        ))
+                        wear_rows.append(ToolWearRecord(
+                            wear_value=random.uniform(0, 0.3),
+                            record_time=record_time,
+                            tool=task.tool,
+                            processing_task=task,
+                        ))
+                SensorData.objects.bulk_create(sensor_rows, batch_size=batch_size)
+                ProcessingQuality.objects.bulk_create(quality_rows, batch_size=batch_size)
+                ToolWearRecord.objects.bulk_create(wear_rows, batch_size=batch_size)
+
+            self.stdout.write(f'已生成任务 {min(offset + batch_size, task_total)}/{task_total}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'数据生成完成，耗时 {time.perf_counter() - started:.1f} 秒'
+        ))
+
+    def get_benchmark_queries(self):
+        """与各列表接口及任务子资源接口一致的热点查询"""
+        task = ProcessingTask.objects.filter(is_deleted=False, sensor_data__isnull=False).first()
+        tool = Tool.objects.filter(wear_records__isnull=False).first()
+        queries = [
+            ('processing-tasks 列表',
+             ProcessingTask.objects.filter(is_deleted=False).order_by('-processing_time')),
+            ('sensor-data 列表',
+             SensorData.objects.filter(is_deleted=False).order_by('-upload_time')),
+            ('tool-wear-records 列表',
+             ToolWearRecord.objects.filter(is_deleted=False).order_by('-record_time')),
+            ('quality-records 列表',
+             ProcessingQuality.objects.filter(is_deleted=False).order_by('-inspection_time')),
+        ]
+        if task:
+            start_time = task.processing_time - timedelta(days=1)
+            queries += [
+                ('任务 sensor_data 子资源（类型 + 时间范围）',
+                 SensorData.objects.filter(processing_task=task, sensor_type='force',
+                                           upload_time__gte=start_time).order_by('upload_time')),
+                ('任务 quality 子资源',
+                 ProcessingQuality.objects.filter(processing_task=task).order_by('-inspection_time')),
+                ('任务 tool_wear 子资源',
+                 ToolWearRecord.objects.filter(processing_task=task).order_by('-record_time')),
+            ]
+        if tool:
+            queries.append((
+                '刀具 wear_records 子资源',
+                ToolWearRecord.objects.filter(tool=tool).order_by('-record_time'),
+            ))
+        return queries
+
+    def benchmark(self, repeat):
+        """输出每条查询首页（50 行）的执行计划与平均耗时"""
+        self.stdout.write(f'数据库后端: {connection.vendor}')
+        for title, queryset in self.get_benchmark_queries():
+            page = queryset[:50]
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {title} =='))
+            self.stdout.write(page.explain())
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                list(page)
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(
+                f'平均 {sum(timings) / len(timings):.2f} ms，最慢 {max(timings):.2f} ms（{repeat} 次）'
+            )
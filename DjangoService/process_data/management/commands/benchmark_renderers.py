@@ -0,0 +1,96 @@
+import io
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.urls import reverse
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from process_data.renderers import (
+    ORJSONParser,
+    ORJSONRenderer,
+    MessagePackParser,
+    MessagePackRenderer,
+    msgpack,
+    orjson,
+)
+
+
+class Command(BaseCommand):
+    """
+    对比默认 JSON、orjson 与 MessagePack 在现有接口上的序列化/解析耗时和响应体大小
+    用法: python manage.py benchmark_renderers --page-size 200 --repeat 20
+    数据量不足时可先执行 python manage.py benchmark_queries 生成基准测试数据
+    """
+    help = '对比 JSON/orjson/MessagePack 的渲染、解析耗时与响应体大小'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=200, help='列表接口每页条数')
+        parser.add_argument('--repeat', type=int, default=20, help='每种格式的计时重复次数')
+
+    def get_formats(self):
+        formats = [('json', JSONRenderer(), JSONParser())]
+        if orjson is not None:
+            formats.append(('orjson', ORJSONRenderer(), ORJSONParser()))
+        else:
+            self.stdout.write(self.style.WARNING('未安装 orjson，跳过 orjson 对比'))
+        if msgpack is not None:
+            formats.append(('msgpack', MessagePackRenderer(), MessagePackParser()))
+        else:
+            self.stdout.write(self.style.WARNING('未安装 msgpack，跳过 MessagePack 对比'))
+        return formats
+
+    def get_endpoints(self, page_size):
+        page = {'page_size': page_size}
+        return [
+            ('processing-tasks 列表', reverse('processingtask-list'), page),
+            ('processing-tasks 列表（expand）', reverse('processingtask-list'),
+             {**page, 'expand': 'tool,composite_material,group'}),
+            ('sensor-data 列表', reverse('sensordata-list'), page),
+            ('tool-wear-records 列表', reverse('toolwearrecord-list'), page),
+            ('quality-records 列表', reverse('processingquality-list'), page),
+            ('task-groups with_tasks', reverse('taskgroup-with-tasks'), {}),
+        ]
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(is_superuser=True).first()
+        if user is None:
+            self.stderr.write('需要至少一个超级用户用于发起请求')
+            return
+        client = APIClient()
+        client.force_authenticate(user=user)
+        formats = self.get_formats()
+        repeat = options['repeat']
+
+        for title, url, params in self.get_endpoints(options['page_size']):
+            response = client.get(url, params)
+            if response.status_code != 200:
+                self.stdout.write(self.style.WARNING(f'{title}: HTTP {response.status_code}，跳过'))
+                continue
+            # 经 JSON 往返得到纯 Python 数据，排除 ReturnDict/Decimal 等类型差异对计时的影响
+            data = json.loads(response.content)
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {title} =='))
+            baseline = None
+            for name, renderer, parser in formats:
+                content = renderer.render(data)
+                render_ms = self.measure(lambda: renderer.render(data), repeat)
+                parse_ms = self.measure(lambda: parser.parse(io.BytesIO(content)), repeat)
+                baseline = baseline or (render_ms, parse_ms, len(content))
+                self.stdout.write(
+                    f'{name:8} 渲染 {render_ms:8.2f} ms ({baseline[0] / render_ms:4.1f}x)  '
+                    f'解析 {parse_ms:8.2f} ms ({baseline[1] / parse_ms:4.1f}x)  '
+                    f'大小 {len(content):>9} B ({len(content) / baseline[2]:.0%})'
+                )
+
+    @staticmethod
+    def measure(func, repeat):
+        """返回 repeat 次调用的最快耗时（毫秒）"""
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings)
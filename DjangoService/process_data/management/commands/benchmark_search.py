@@ -0,0 +1,83 @@
+import time
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from process_data.models import ProcessData, ProcessingTask, SearchToken
+from process_data.search import SEARCH_TARGETS, filter_by_search, rebuild_search_index, search
+
+
+class Command(BaseCommand):
+    """
+    对比关键词搜索使用 icontains 全表扫描与全文检索索引的耗时
+    每种检索类型分别计时“总数 + 第一页 50 条”，并统计全局检索接口的耗时
+    用法: python manage.py benchmark_search --rebuild --keyword 钻孔 --repeat 5
+    数据量不足时可先执行 python manage.py benchmark_queries 生成基准测试数据
+    """
+    help = '对比关键词搜索 icontains 与全文检索索引的耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keyword', action='append', help='检索关键词，可重复指定，默认从现有数据中选取')
+        parser.add_argument('--repeat', type=int, default=5, help='每条查询的计时重复次数')
+        parser.add_argument('--rebuild', action='store_true', help='计时前先全量重建索引')
+
+    def handle(self, *args, **options):
+        if options['rebuild'] or not SearchToken.objects.exists():
+            started = time.perf_counter()
+            totals = rebuild_search_index()
+            self.stdout.write(
+                f'重建索引: {sum(totals.values())} 条记录，{SearchToken.objects.count()} 个索引行，'
+                f'耗时 {time.perf_counter() - started:.1f} 秒'
+            )
+
+        repeat = options['repeat']
+        for keyword in options['keyword'] or self.default_keywords():
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n== 关键词 "{keyword}" =='))
+            for name, target in SEARCH_TARGETS.items():
+                queryset = target.model.objects.filter(is_deleted=False)
+                legacy = queryset.filter(reduce(or_, (Q(**{f'{lookup}__icontains': keyword}) for lookup in target.fields)))
+                indexed = filter_by_search(queryset, keyword)
+                legacy_ms, legacy_count = self.measure(legacy, repeat)
+                if indexed is None:
+                    self.stdout.write(f'{name:18} icontains {legacy_ms:8.2f} ms ({legacy_count} 条)  索引: 关键词无词元')
+                    continue
+                indexed_ms, indexed_count = self.measure(indexed, repeat)
+                self.stdout.write(
+                    f'{name:18} icontains {legacy_ms:8.2f} ms ({legacy_count} 条)  '
+                    f'索引 {indexed_ms:8.2f} ms ({indexed_count} 条)'
+                )
+
+            timings = []
+            for _ in range(repeat):
+                started = time.perf_counter()
+                results = search(keyword)
+                timings.append((time.perf_counter() - started) * 1000)
+            self.stdout.write(f'{"全局检索 top 20":18} {min(timings):8.2f} ms ({len(results)} 条)')
+
+    @staticmethod
+    def default_keywords():
+        """选取选择性不同的关键词：某条工艺数据的完整编码、编码尾部片段、某个任务编码，以及不存在的中文词"""
+        keywords = []
+        data_code = ProcessData.objects.filter(is_deleted=False).order_by('-pk').values_list('code', flat=True).first()
+        if data_code:
+            keywords += [data_code, data_code[-5:]]
+        task_code = ProcessingTask.objects.filter(is_deleted=False).order_by('pk').values_list(
+            'task_code', flat=True).first()
+        if task_code:
+            keywords.append(task_code)
+        keywords.append('钻孔异常')
+        return keywords
+
+    @staticmethod
+    def measure(queryset, repeat):
+        """返回 (repeat 次“总数 + 第一页”的最快耗时（毫秒）, 总数)"""
+        timings = []
+        count = 0
+        for _ in range(repeat):
+            started = time.perf_counter()
+            count = queryset.count()
+            list(queryset.values_list('pk', flat=True)[:50])
+            timings.append((time.perf_counter() - started) * 1000)
+        return min(timings), count
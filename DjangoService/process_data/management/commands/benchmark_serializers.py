@@ -0,0 +1,65 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+
+class Command(BaseCommand):
+    """
+    对比列表接口使用 ModelSerializer 与 .values() 快速序列化（FAST_LIST_SERIALIZATION）的耗时
+    用法: python manage.py benchmark_serializers --page-size 200 --repeat 10
+    数据量不足时可先执行 python manage.py benchmark_queries 生成基准测试数据
+    """
+    help = '对比列表接口 ModelSerializer 与快速序列化的耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page-size', type=int, default=200, help='游标分页每页条数')
+        parser.add_argument('--repeat', type=int, default=10, help='每种模式的计时重复次数')
+
+    def get_endpoints(self, page_size):
+        # 游标分页可以指定每页条数，且不包含 COUNT 查询，耗时差异主要来自序列化
+        page = {'pagination': 'cursor', 'page_size': page_size}
+        return [
+            ('processing-tasks 列表', reverse('processingtask-list'), page),
+            ('processing-tasks 列表（fields=id,task_code,status）', reverse('processingtask-list'),
+             {**page, 'fields': 'id,task_code,status'}),
+            ('sensor-data 列表', reverse('sensordata-list'), page),
+            ('tool-wear-records 列表', reverse('toolwearrecord-list'), page),
+            ('quality-records 列表', reverse('processingquality-list'), {}),
+        ]
+
+    def handle(self, *args, **options):
+        user = get_user_model().objects.filter(is_superuser=True).first()
+        if user is None:
+            self.stderr.write('需要至少一个超级用户用于发起请求')
+            return
+        client = APIClient()
+        client.force_authenticate(user=user)
+        repeat = options['repeat']
+
+        for title, url, params in self.get_endpoints(options['page_size']):
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n== {title} =='))
+            results = {}
+            for fast in (False, True):
+                with override_settings(FAST_LIST_SERIALIZATION=fast):
+                    results[fast] = self.measure(client, url, params, repeat)
+            (standard_ms, standard_content), (fast_ms, fast_content) = results[False], results[True]
+            self.stdout.write(f'ModelSerializer {standard_ms:8.2f} ms')
+            self.stdout.write(f'快速序列化      {fast_ms:8.2f} ms ({standard_ms / fast_ms:.1f}x)')
+            if fast_content != standard_content:
+                self.stdout.write(self.style.ERROR('两种模式的输出不一致'))
+
+    @staticmethod
+    def measure(client, url, params, repeat):
+        """返回 (repeat 次请求的最快耗时（毫秒）, 响应体)"""
+        timings = []
+        content = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            response = client.get(url, params)
+            timings.append((time.perf_counter() - started) * 1000)
+            content = response.content
+        return min(timings), content
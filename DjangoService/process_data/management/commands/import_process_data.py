@@ -0,0 +1,66 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from process_data.catalog import find_entry
+from process_data.imports import ImportFileError, import_process_data, open_csv
+
+
+class Command(BaseCommand):
+    """
+    从 CSV 文件流式导入工艺数据（列格式见 process_data/imports.py），按块校验并批量写入
+    有错误的行跳过，错误按行号输出到标准错误，或用 --errors 写入 CSV 文件（row, code, field, message）
+    用法: python manage.py import_process_data history.csv --template TPL --chunk-size 5000 --errors errors.csv
+    """
+    help = '从 CSV 文件流式导入工艺数据'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV 文件路径')
+        parser.add_argument('--template', required=True, help='模板ID或编码')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='每个事务写入的行数')
+        parser.add_argument('--encoding', default='utf-8-sig', help='文件编码，默认 UTF-8（兼容 BOM）')
+        parser.add_argument('--errors', help='把错误行写入该 CSV 文件，默认输出到标准错误')
+
+    def handle(self, *args, **options):
+        entry = find_entry(options['template'])
+        if entry is None:
+            raise CommandError(f'模板 {options["template"]} 不存在')
+
+        error_file = open(options['errors'], 'w', encoding='utf-8-sig', newline='') if options['errors'] else None
+        error_writer = csv.writer(error_file) if error_file else None
+        if error_writer:
+            error_writer.writerow(['row', 'code', 'field', 'message'])
+        started = time.perf_counter()
+        try:
+            with open(options['path'], 'rb') as file:
+                for progress in import_process_data(entry, open_csv(file, options['encoding']), options['chunk_size']):
+                    if progress.get('done'):
+                        self.stdout.write(self.style.SUCCESS(
+                            f'导入完成: 共 {progress["rows"]} 行，写入 {progress["created"]} 行，'
+                            f'失败 {progress["failed"]} 行，耗时 {progress["seconds"]:.1f} 秒'
+                        ))
+                        continue
+                    self.write_errors(progress['errors'], error_writer)
+                    elapsed = time.perf_counter() - started
+                    self.stdout.write(
+                        f'已处理 {progress["rows"]} 行，写入 {progress["created"]}，失败 {progress["failed"]}，'
+                        f'{progress["rows"] / elapsed:.0f} 行/秒'
+                    )
+        except ImportFileError as exc:
+            raise CommandError('\n'.join(exc.messages))
+        except (OSError, LookupError) as exc:
+            raise CommandError(str(exc))
+        finally:
+            if error_file:
+                error_file.close()
+
+    def write_errors(self, errors, writer):
+        for error in errors:
+            for field, messages in error['errors'].items():
+                for message in messages:
+                    if writer:
+                        writer.writerow([error['row'], error['code'] or '', field, message])
+                    else:
+                        sys.stderr.write(f'第 {error["row"]} 行 {error["code"] or ""} {field}: {message}\n')
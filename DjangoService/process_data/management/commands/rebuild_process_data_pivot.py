@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from process_data.models import ProcessData
+from process_data.pivot import rebuild_pivot
+
+
+class Command(BaseCommand):
+    """
+    分块全量重建工艺数据宽表（ProcessDataPivot）
+    宽表平时随参数值的写入增量刷新；首次部署、通过 queryset.update() 直接修改参数值或导入历史数据后运行
+    用法: python manage.py rebuild_process_data_pivot --template TPL001
+    """
+    help = '分块重建工艺数据参数值宽表'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--template', help='只重建指定编码的工艺模板')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='每个事务处理的工艺数据条数')
+
+    def handle(self, *args, **options):
+        queryset = ProcessData.objects.all()
+        if options['template']:
+            queryset = queryset.filter(template__code=options['template'])
+
+        started = time.perf_counter()
+        total_rows = queryset.count()
+        total = rebuild_pivot(
+            queryset, options['chunk_size'],
+            progress=lambda done: self.stdout.write(f'已处理 {done}/{total_rows}'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'重建完成，共 {total} 条工艺数据，耗时 {time.perf_counter() - started:.1f} 秒'
+        ))
@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from process_data.search import SEARCH_TARGETS, rebuild_search_index
+
+
+class Command(BaseCommand):
+    """
+    分块全量重建全文检索索引（SearchToken）
+    索引平时随记录的写入增量维护；首次部署、调整检索字段或权重、通过 queryset.update() 直接修改记录后运行
+    用法: python manage.py rebuild_search_index --target processdata --target tool
+    """
+    help = '分块重建全文检索索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(SEARCH_TARGETS), action='append',
+                            help='只重建指定的检索类型，可重复指定，默认全部')
+        parser.add_argument('--chunk-size', type=int, default=1000, help='每个事务处理的记录条数')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        totals = rebuild_search_index(
+            options['target'], options['chunk_size'],
+            progress=lambda target, done: self.stdout.write(f'{target}: 已处理 {done}'),
+        )
+        for target, total in totals.items():
+            self.stdout.write(f'{target}: 共 {total} 条')
+        self.stdout.write(self.style.SUCCESS(f'重建完成，耗时 {time.perf_counter() - started:.1f} 秒'))
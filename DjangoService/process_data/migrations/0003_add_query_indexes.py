@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('process_data', '0002_alter_sensordata_options_remove_sensordata_timestamp_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='processdata',
+            index=models.Index(fields=['is_deleted', 'created_at'], name='pdata_deleted_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingquality',
+            index=models.Index(fields=['is_deleted', 'inspection_time'], name='quality_deleted_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingquality',
+            index=models.Index(fields=['processing_task', 'inspection_time'], name='quality_task_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingtask',
+            index=models.Index(fields=['is_deleted', 'processing_time'], name='ptask_deleted_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sensordata',
+            index=models.Index(fields=['is_deleted', 'upload_time'], name='sensor_deleted_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='sensordata',
+            index=models.Index(fields=['processing_task', 'sensor_type', 'upload_time'], name='sensor_task_type_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='toolwearrecord',
+            index=models.Index(fields=['is_deleted', 'record_time'], name='wear_deleted_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='toolwearrecord',
+            index=models.Index(fields=['tool', 'record_time'], name='wear_tool_time_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='toolwearrecord',
+            index=models.Index(fields=['processing_task', 'record_time'], name='wear_task_time_idx'),
+        ),
+    ]
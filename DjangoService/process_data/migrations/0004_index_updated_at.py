@@ -0,0 +1,78 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('process_data', '0003_add_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='compositematerial',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='更新时间'),
+        ),
+        migrations.AlterField(
+            model_name='parametervalue',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='更新时间'),
+        ),
+        migrations.AlterField(
+            model_name='processcategory',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='更新时间'),
+        ),
+        migrations.AlterField(
+            model_name='processdata',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='更新时间'),
+        ),
+        migrations.AlterField(
+            model_name='processingquality',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='更新时间'),
+        ),
+        migrations.AlterField(
+            model_name='processingtask',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='更新时间'),
+        ),
+        migrations.AlterField(
+            model_name='processparameter',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='更新时间'),
+        ),
+        migrations.AlterField(
+            model_name='processtemplate',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='更新时间'),
+        ),
+        migrations.AlterField(
+            model_name='sensordata',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='更新时间'),
+        ),
+        migrations.AlterField(
+            model_name='taskgroup',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='更新时间'),
+        ),
+        migrations.AlterField(
+            model_name='templateparameter',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='更新时间'),
+        ),
+        migrations.AlterField(
+            model_name='tool',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='更新时间'),
+        ),
+        migrations.AlterField(
+            model_name='toolwearrecord',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, db_index=True, verbose_name='更新时间'),
+        ),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('process_data', '0004_index_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parametervalue',
+            name='value_boolean',
+            field=models.BooleanField(blank=True, editable=False, null=True, verbose_name='布尔值'),
+        ),
+        migrations.AddField(
+            model_name='parametervalue',
+            name='value_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='日期值'),
+        ),
+        migrations.AddField(
+            model_name='parametervalue',
+            name='value_number',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='数值'),
+        ),
+        migrations.AddField(
+            model_name='processingparameter',
+            name='value_boolean',
+            field=models.BooleanField(blank=True, editable=False, null=True, verbose_name='布尔值'),
+        ),
+        migrations.AddField(
+            model_name='processingparameter',
+            name='value_date',
+            field=models.DateField(blank=True, editable=False, null=True, verbose_name='日期值'),
+        ),
+        migrations.AddField(
+            model_name='processingparameter',
+            name='value_number',
+            field=models.FloatField(blank=True, editable=False, null=True, verbose_name='数值'),
+        ),
+        migrations.AddIndex(
+            model_name='parametervalue',
+            index=models.Index(fields=['parameter', 'value_number'], name='pvalue_param_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parametervalue',
+            index=models.Index(fields=['parameter', 'value_date'], name='pvalue_param_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingparameter',
+            index=models.Index(fields=['parameter_name', 'value_number'], name='pparam_name_number_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='processingparameter',
+            index=models.Index(fields=['parameter_name', 'value_date'], name='pparam_name_date_idx'),
+        ),
+    ]
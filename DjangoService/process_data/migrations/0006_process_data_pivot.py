@@ -0,0 +1,53 @@
+# Generated by Django 5.2.1 on 2026-10-17 04:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_pivot_rows(apps, schema_editor):
+    """按主键分块为已有的工艺数据生成宽表行，与 pivot.refresh_pivot_rows 的结果一致"""
+    ProcessData = apps.get_model('process_data', 'ProcessData')
+    ParameterValue = apps.get_model('process_data', 'ParameterValue')
+    ProcessDataPivot = apps.get_model('process_data', 'ProcessDataPivot')
+    queryset = ProcessData.objects.filter(is_deleted=False).order_by('pk').values_list('pk', 'template_id')
+    last_pk = 0
+    while True:
+        templates = dict(queryset.filter(pk__gt=last_pk)[:1000])
+        if not templates:
+            break
+        values = {pk: {} for pk in templates}
+        parameter_values = ParameterValue.objects.filter(
+            process_data_id__in=templates, is_deleted=False
+        ).values_list('process_data_id', 'parameter_id', 'value')
+        for process_data_id, parameter_id, value in parameter_values:
+            values[process_data_id][str(parameter_id)] = value
+        ProcessDataPivot.objects.bulk_create([
+            ProcessDataPivot(process_data_id=pk, template_id=template_id, values=values[pk])
+            for pk, template_id in templates.items()
+        ])
+        last_pk = max(templates)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('process_data', '0005_typed_parameter_values'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProcessDataPivot',
+            fields=[
+                ('process_data', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='pivot', serialize=False, to='process_data.processdata', verbose_name='工艺数据')),
+                ('values', models.JSONField(default=dict, verbose_name='参数值')),
+                ('refreshed_at', models.DateTimeField(auto_now=True, verbose_name='刷新时间')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='process_data.processtemplate', verbose_name='工艺模板')),
+            ],
+            options={
+                'verbose_name': '工艺数据宽表',
+                'verbose_name_plural': '工艺数据宽表',
+                'indexes': [models.Index(fields=['template', 'process_data'], name='pivot_template_data_idx')],
+            },
+        ),
+        migrations.RunPython(fill_pivot_rows, migrations.RunPython.noop),
+    ]
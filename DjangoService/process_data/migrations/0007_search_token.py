@@ -0,0 +1,61 @@
+# Generated by Django 5.2.1 on 2026-10-17 05:01
+
+from collections import Counter
+
+from django.db import migrations, models
+
+
+def build_search_index(apps, schema_editor):
+    """为已有记录建立索引行，切分规则与检索字段取自 search.py，按主键分块读取"""
+    from process_data.search import SEARCH_TARGETS, tokenize
+
+    SearchToken = apps.get_model('process_data', 'SearchToken')
+    for name, target in SEARCH_TARGETS.items():
+        model = apps.get_model('process_data', target.model.__name__)
+        weights = list(target.fields.values())
+        queryset = model.objects.filter(is_deleted=False).order_by('pk').values_list('pk', *target.fields)
+        last_pk = 0
+        while True:
+            rows = list(queryset.filter(pk__gt=last_pk)[:1000])
+            if not rows:
+                break
+            tokens = []
+            for pk, *values in rows:
+                token_weights = Counter()
+                for value, weight in zip(values, weights):
+                    if value:
+                        for token, count in tokenize(value).items():
+                            token_weights[token] += count * weight
+                tokens.extend(
+                    SearchToken(token=token, target=name, object_id=pk, weight=weight)
+                    for token, weight in token_weights.items()
+                )
+            SearchToken.objects.bulk_create(tokens, batch_size=2000)
+            last_pk = rows[-1][0]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('process_data', '0006_process_data_pivot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=64, verbose_name='词元')),
+                ('target', models.CharField(max_length=32, verbose_name='记录类型')),
+                ('object_id', models.BigIntegerField(verbose_name='记录ID')),
+                ('weight', models.PositiveIntegerField(verbose_name='权重')),
+            ],
+            options={
+                'verbose_name': '全文检索词元',
+                'verbose_name_plural': '全文检索词元',
+                'indexes': [models.Index(fields=['target', 'object_id'], name='search_token_object_idx')],
+                'constraints': [models.UniqueConstraint(fields=('target', 'token', 'object_id'), name='search_token_unique')],
+            },
+        ),
+        migrations.RunPython(build_search_index, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-17 05:10
+
+from django.db import migrations, models
+
+
+def fill_category_paths(apps, schema_editor):
+    """按父子关系在内存中计算已有分类的物化路径"""
+    ProcessCategory = apps.get_model('process_data', 'ProcessCategory')
+    parents = dict(ProcessCategory.objects.values_list('pk', 'parent_id'))
+    paths = {}
+
+    def build(pk):
+        if pk not in paths:
+            parent_id = parents[pk]
+            paths[pk] = f'{build(parent_id) if parent_id else ""}{pk}/'
+        return paths[pk]
+
+    categories = list(ProcessCategory.objects.only('pk'))
+    for category in categories:
+        category.path = build(category.pk)
+    ProcessCategory.objects.bulk_update(categories, ['path'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('process_data', '0007_search_token'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='processcategory',
+            name='path',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=255, verbose_name='物化路径'),
+        ),
+        migrations.RunPython(fill_category_paths, migrations.RunPython.noop),
+    ]
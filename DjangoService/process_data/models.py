@@ -1,25 +1,163 @@
-from django.db import models
+import math
+
+from django.db import models, transaction
+from django.db.models import Value
+from django.db.models.functions import Concat, Substr
 from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 from django.contrib.auth.models import User
 
+TRUE_STRINGS = {'true', '1', 'yes', 'y', 'on', '是', '真'}
+FALSE_STRINGS = {'false', '0', 'no', 'n', 'off', '否', '假'}
+
+
+def parse_number(raw):
+    """解析数值，无法解析或非有限值时返回 None"""
+    try:
+        number = float(str(raw).strip())
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def parse_boolean(raw):
+    text = str(raw).strip().lower()
+    if text in TRUE_STRINGS:
+        return True
+    if text in FALSE_STRINGS:
+        return False
+    return None
+
+
+def parse_date_value(raw):
+    """解析日期，带时间的值取其日期部分"""
+    text = str(raw).strip()
+    try:
+        value = parse_date(text)
+        if value is None:
+            value = parse_datetime(text)
+            value = value.date() if value else None
+    except ValueError:
+        return None
+    return value
+
+
+def infer_parameter_type(raw):
+    """推断无类型定义的参数值的类型，依次尝试数值、布尔和日期"""
+    if parse_number(raw) is not None:
+        return 'number'
+    if parse_boolean(raw) is not None:
+        return 'boolean'
+    if parse_date_value(raw) is not None:
+        return 'date'
+    return 'text'
+
 
 class BaseModel(models.Model):
     """基础模型，提供共有字段"""
     created_at = models.DateTimeField('创建时间', default=timezone.now)
-    updated_at = models.DateTimeField('更新时间', auto_now=True)
+    updated_at = models.DateTimeField('更新时间', auto_now=True, db_index=True)
     is_deleted = models.BooleanField('是否删除', default=False)
     
     class Meta:
         abstract = True
 
 
+class TypedValueQuerySet(models.QuerySet):
+    """
+    写入时同步类型化影子列的查询集
+    bulk_create / bulk_update 不经过 save()，在这里补齐；queryset.update() 修改原始值后需执行 backfill_typed_values
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        self.model.fill_typed_values(objs)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        if self.model.raw_value_field in fields:
+            self.model.fill_typed_values(objs)
+            fields = list(dict.fromkeys([*fields, *TypedValueModel.TYPED_FIELDS.values()]))
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+
+class TypedValueModel(models.Model):
+    """
+    以文本保存的参数值的类型化影子列
+    原始值按参数类型解析后写入 value_number / value_boolean / value_date，供数据库按范围过滤和排序；
+    无法解析或类型不匹配时为空。子类通过 raw_value_field 指定原始值字段，并实现 get_parameter_types
+    """
+    TYPED_FIELDS = {'number': 'value_number', 'boolean': 'value_boolean', 'date': 'value_date'}
+    PARSERS = {'number': parse_number, 'boolean': parse_boolean, 'date': parse_date_value}
+    raw_value_field = None
+
+    value_number = models.FloatField('数值', null=True, blank=True, editable=False)
+    value_boolean = models.BooleanField('布尔值', null=True, blank=True, editable=False)
+    value_date = models.DateField('日期值', null=True, blank=True, editable=False)
+
+    objects = TypedValueQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def get_parameter_types(cls, objs):
+        """返回与 objs 一一对应的参数类型"""
+        raise NotImplementedError
+
+    @classmethod
+    def fill_typed_values(cls, objs):
+        for obj, parameter_type in zip(objs, cls.get_parameter_types(objs)):
+            obj.set_typed_value(parameter_type)
+
+    @classmethod
+    def refresh_typed_values(cls, queryset=None, chunk_size=2000, progress=None):
+        """按主键分块重新计算类型化影子列，每块一个事务；progress 在每块完成后以累计行数调用，返回总行数"""
+        queryset = (cls.objects.all() if queryset is None else queryset).order_by('pk')
+        total = 0
+        last_pk = None
+        while True:
+            chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            objs = list(chunk[:chunk_size])
+            if not objs:
+                return total
+            cls.fill_typed_values(objs)
+            with transaction.atomic():
+                cls.objects.bulk_update(objs, list(cls.TYPED_FIELDS.values()), batch_size=chunk_size)
+            last_pk = objs[-1].pk
+            total += len(objs)
+            if progress is not None:
+                progress(total)
+
+    def set_typed_value(self, parameter_type):
+        raw = getattr(self, self.raw_value_field)
+        for typed_type, field_name in self.TYPED_FIELDS.items():
+            value = None
+            if typed_type == parameter_type and raw not in (None, ''):
+                value = self.PARSERS[typed_type](raw)
+            setattr(self, field_name, value)
+
+    def save(self, *args, **kwargs):
+        self.fill_typed_values([self])
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and self.raw_value_field in update_fields:
+            kwargs['update_fields'] = {*update_fields, *self.TYPED_FIELDS.values()}
+        super().save(*args, **kwargs)
+
+
 class ProcessCategory(BaseModel):
-    """工艺分类"""
+    """
+    工艺分类
+    path 为物化路径，由根到自身的分类ID以 "/" 连接并以 "/" 结尾（如 3/17/42/），
+    子树查询是一次 path 前缀的索引查找；save() 维护自身及子孙的路径，queryset.update() 修改 parent 不会同步
+    """
     name = models.CharField('分类名称', max_length=100)
     code = models.CharField('分类编码', max_length=50, unique=True)
     description = models.TextField('描述', blank=True, null=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, verbose_name='父分类', 
                                blank=True, null=True, related_name='children')
+    path = models.CharField('物化路径', max_length=255, default='', editable=False, db_index=True)
     
     class Meta:
         verbose_name = '工艺分类'
@@ -28,6 +166,29 @@ class ProcessCategory(BaseModel):
     
     def __str__(self):
         return self.name
+    
+    def build_path(self):
+        parent_path = ProcessCategory.objects.values_list('path', flat=True).get(pk=self.parent_id) if self.parent_id else ''
+        return f'{parent_path}{self.pk}/'
+    
+    def save(self, *args, **kwargs):
+        """保存后补写物化路径；父分类变更时一并改写全部子孙路径的前缀"""
+        super().save(*args, **kwargs)
+        old_path = self.path
+        new_path = self.build_path()
+        if new_path == old_path:
+            return
+        ProcessCategory.objects.filter(pk=self.pk).update(path=new_path)
+        if old_path:
+            ProcessCategory.objects.filter(path__startswith=old_path).exclude(pk=self.pk).update(
+                path=Concat(Value(new_path), Substr('path', len(old_path) + 1))
+            )
+        self.path = new_path
+    
+    def get_descendants(self, include_self=False):
+        """全部子孙分类（含已删除的）"""
+        queryset = ProcessCategory.objects.filter(path__startswith=self.path)
+        return queryset if include_self else queryset.exclude(pk=self.pk)
 
 
 class ProcessParameter(BaseModel):
@@ -59,6 +220,15 @@ class ProcessParameter(BaseModel):
     
     def __str__(self):
         return f"{self.name}({self.code})"
+    
+    def save(self, *args, **kwargs):
+        type_changed = self.pk is not None and ProcessParameter.objects.filter(
+            pk=self.pk
+        ).exclude(parameter_type=self.parameter_type).exists()
+        super().save(*args, **kwargs)
+        # 参数类型变化后按新类型重新解析已有的参数值
+        if type_changed:
+            ParameterValue.refresh_typed_values(ParameterValue.objects.filter(parameter=self))
 
 
 class ProcessTemplate(BaseModel):
@@ -116,28 +286,92 @@ class ProcessData(BaseModel):
         verbose_name = '工艺数据'
         verbose_name_plural = verbose_name
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_deleted', 'created_at'], name='pdata_deleted_created_idx'),
+        ]
     
     def __str__(self):
         return self.name
 
 
-class ParameterValue(BaseModel):
-    """参数值记录"""
+class ParameterValueQuerySet(TypedValueQuerySet):
+    """参数值批量写入后刷新所属工艺数据的宽表行（单条保存与删除由信号处理，见 signals.py）"""
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._schedule_pivot_refresh(objs)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        self._schedule_pivot_refresh(objs)
+        return rows
+
+    @staticmethod
+    def _schedule_pivot_refresh(objs):
+        from .pivot import schedule_pivot_refresh
+        schedule_pivot_refresh(obj.process_data_id for obj in objs)
+
+
+class ParameterValue(TypedValueModel, BaseModel):
+    """参数值记录，类型化影子列按 ProcessParameter.parameter_type 解析"""
     process_data = models.ForeignKey(ProcessData, on_delete=models.CASCADE, 
                                    verbose_name='工艺数据', related_name='parameter_values')
     parameter = models.ForeignKey(ProcessParameter, on_delete=models.CASCADE, 
                                 verbose_name='工艺参数')
     value = models.TextField('参数值')
     
+    objects = ParameterValueQuerySet.as_manager()
+    raw_value_field = 'value'
+    
     class Meta:
         verbose_name = '参数值'
         verbose_name_plural = verbose_name
         unique_together = ['process_data', 'parameter']
+        indexes = [
+            models.Index(fields=['parameter', 'value_number'], name='pvalue_param_number_idx'),
+            models.Index(fields=['parameter', 'value_date'], name='pvalue_param_date_idx'),
+        ]
+    
+    @classmethod
+    def get_parameter_types(cls, objs):
+        """已加载的参数直接读取类型，其余的一次查询取出"""
+        parameter_field = cls._meta.get_field('parameter')
+        missing = {obj.parameter_id for obj in objs if not parameter_field.is_cached(obj)}
+        types = {}
+        if missing:
+            types = dict(ProcessParameter.objects.filter(pk__in=missing).values_list('pk', 'parameter_type'))
+        return [
+            obj.parameter.parameter_type if parameter_field.is_cached(obj) else types.get(obj.parameter_id)
+            for obj in objs
+        ]
     
     def __str__(self):
         return f"{self.process_data.code} - {self.parameter.name}: {self.value}"
 
 
+class ProcessDataPivot(models.Model):
+    """
+    工艺数据参数值宽表，每条未删除的工艺数据一行
+    values 以 {参数ID: 参数值} 保存该数据的全部参数值，列由模板的 TemplateParameter 决定（见 pivot.py）；
+    参数值或工艺数据变化后在事务提交时按工艺数据增量刷新，不需要定时全量重建
+    """
+    process_data = models.OneToOneField(ProcessData, on_delete=models.CASCADE, primary_key=True,
+                                        verbose_name='工艺数据', related_name='pivot')
+    template = models.ForeignKey(ProcessTemplate, on_delete=models.CASCADE, verbose_name='工艺模板',
+                                 related_name='+')
+    values = models.JSONField('参数值', default=dict)
+    refreshed_at = models.DateTimeField('刷新时间', auto_now=True)
+
+    class Meta:
+        verbose_name = '工艺数据宽表'
+        verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['template', 'process_data'], name='pivot_template_data_idx'),
+        ]
+
+
 # --------- 复合材料加工相关模型 ---------
 
 class Tool(BaseModel):
@@ -224,19 +458,24 @@ class ProcessingTask(BaseModel):
         verbose_name = '加工任务'
         verbose_name_plural = verbose_name
         ordering = ['-processing_time']
+        indexes = [
+            models.Index(fields=['is_deleted', 'processing_time'], name='ptask_deleted_time_idx'),
+        ]
     
     def __str__(self):
         return f"{self.task_code} - {self.get_processing_type_display()} ({self.get_status_display()})"
 
 
-class ProcessingParameter(models.Model):
-    """加工参数模型"""
+class ProcessingParameter(TypedValueModel):
+    """加工参数模型，没有参数类型定义，类型化影子列按参数值推断的类型写入"""
     task = models.ForeignKey(ProcessingTask, on_delete=models.CASCADE, related_name='parameters', verbose_name="关联任务")
     parameter_name = models.CharField(max_length=100, verbose_name="参数名称")
     parameter_value = models.CharField(max_length=100, verbose_name="参数值")
     unit = models.CharField(max_length=50, blank=True, null=True, verbose_name="单位")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="创建时间")
 
+    raw_value_field = 'parameter_value'
+
     def __str__(self):
         return f"{self.parameter_name}: {self.parameter_value} {self.unit or ''}"
 
@@ -244,6 +483,14 @@ class ProcessingParameter(models.Model):
         verbose_name = "加工参数"
         verbose_name_plural = verbose_name
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['parameter_name', 'value_number'], name='pparam_name_number_idx'),
+            models.Index(fields=['parameter_name', 'value_date'], name='pparam_name_date_idx'),
+        ]
+
+    @classmethod
+    def get_parameter_types(cls, objs):
+        return [infer_parameter_type(obj.parameter_value) for obj in objs]
 
 
 class SensorData(BaseModel):
@@ -271,6 +518,10 @@ class SensorData(BaseModel):
         verbose_name = '传感器数据'
         verbose_name_plural = verbose_name
         ordering = ['-upload_time']
+        indexes = [
+            models.Index(fields=['is_deleted', 'upload_time'], name='sensor_deleted_time_idx'),
+            models.Index(fields=['processing_task', 'sensor_type', 'upload_time'], name='sensor_task_type_time_idx'),
+        ]
     
     def __str__(self):
         return f"{self.get_sensor_type_display()} - {self.file_name}"
@@ -302,6 +553,10 @@ class ProcessingQuality(BaseModel):
     class Meta:
         verbose_name = '加工质量'
         verbose_name_plural = verbose_name
+        indexes = [
+            models.Index(fields=['is_deleted', 'inspection_time'], name='quality_deleted_time_idx'),
+            models.Index(fields=['processing_task', 'inspection_time'], name='quality_task_time_idx'),
+        ]
     
     def __str__(self):
         return f"质量 - {self.processing_task.task_code} ({self.inspection_time})"
@@ -323,6 +578,11 @@ class ToolWearRecord(BaseModel):
         verbose_name = '刀具磨损记录'
         verbose_name_plural = verbose_name
         ordering = ['-record_time']
+        indexes = [
+            models.Index(fields=['is_deleted', 'record_time'], name='wear_deleted_time_idx'),
+            models.Index(fields=['tool', 'record_time'], name='wear_tool_time_idx'),
+            models.Index(fields=['processing_task', 'record_time'], name='wear_task_time_idx'),
+        ]
     
     def __str__(self):
         return f"磨损 - {self.tool.code} ({self.record_time})"
@@ -342,3 +602,25 @@ class TaskGroup(BaseModel):
         verbose_name = "加工任务组"
         verbose_name_plural = verbose_name
         ordering = ['-created_at']
+
+
+class SearchToken(models.Model):
+    """
+    全文检索倒排索引，每个 (词元, 记录) 一行
+    target 为记录的模型名（如 processdata），weight 为词元在各检索字段中的出现次数乘以字段权重之和；
+    由 search.py 在记录写入的事务提交后维护，不直接修改
+    """
+    token = models.CharField('词元', max_length=64)
+    target = models.CharField('记录类型', max_length=32)
+    object_id = models.BigIntegerField('记录ID')
+    weight = models.PositiveIntegerField('权重')
+
+    class Meta:
+        verbose_name = '全文检索词元'
+        verbose_name_plural = verbose_name
+        constraints = [
+            models.UniqueConstraint(fields=['target', 'token', 'object_id'], name='search_token_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['target', 'object_id'], name='search_token_object_idx'),
+        ]
@@ -0,0 +1,56 @@
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+
+
+class TimeCursorPagination(CursorPagination):
+    """
+    基于时间字段的游标分页
+    排序沿用查询集上的排序（如 -upload_time），并追加 id 保证顺序稳定，
+    翻页时按索引定位而不是 OFFSET 扫描，深页与首页开销相同
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+
+    def get_ordering(self, request, queryset, view):
+        self.ordering = tuple(queryset.query.order_by) or tuple(queryset.model._meta.ordering)
+        ordering = super().get_ordering(request, queryset, view)
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('-id' if ordering[0].startswith('-') else 'id',)
+        return ordering
+
+
+class SwitchablePagination(PageNumberPagination):
+    """
+    默认使用页码分页（返回 count），请求携带 ?pagination=cursor 或 ?cursor= 时切换为游标分页
+    """
+    mode_query_param = 'pagination'
+    cursor_mode = 'cursor'
+    cursor_pagination_class = TimeCursorPagination
+
+    def __init__(self):
+        self.cursor_paginator = None
+
+    def use_cursor(self, request):
+        """判断本次请求是否使用游标分页"""
+        return (
+            request.query_params.get(self.mode_query_param) == self.cursor_mode
+            or self.cursor_pagination_class.cursor_query_param in request.query_params
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request):
+            self.cursor_paginator = self.cursor_pagination_class()
+            page = self.cursor_paginator.paginate_queryset(queryset, request, view)
+            self.display_page_controls = self.cursor_paginator.display_page_controls
+            return page
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
@@ -0,0 +1,126 @@
+"""
+工艺数据参数值宽表的刷新与读取
+ParameterValue/ProcessData 变化时记录受影响的工艺数据，在事务提交后合并刷新对应的 ProcessDataPivot 行；
+读取时按模板的 TemplateParameter 顺序展开为列，数值型、布尔型参数输出对应类型，便于直接做矩阵分析
+"""
+import threading
+
+from django.db import transaction
+from rest_framework.fields import DateTimeField
+
+from .models import (
+    ProcessData,
+    ProcessDataPivot,
+    ParameterValue,
+    TemplateParameter,
+    parse_boolean,
+    parse_number,
+)
+
+# 工艺数据本身的列，位于参数列之前
+DATA_COLUMNS = ('id', 'code', 'name', 'batch_number', 'created_at')
+
+_pending = threading.local()
+
+
+def schedule_pivot_refresh(process_data_ids):
+    """
+    在事务提交后刷新给定工艺数据的宽表行
+    同一事务内多次修改只在第一个提交回调中刷新一次；回滚的修改最迟随下一次提交刷新，刷新本身是幂等的
+    """
+    pending = getattr(_pending, 'ids', None)
+    if pending is None:
+        pending = _pending.ids = set()
+    pending.update(process_data_ids)
+    transaction.on_commit(flush_pivot_refresh)
+
+
+def flush_pivot_refresh():
+    ids = getattr(_pending, 'ids', None)
+    if ids:
+        _pending.ids = set()
+        refresh_pivot_rows(ids)
+
+
+def refresh_pivot_rows(process_data_ids):
+    """按参数值重新生成给定工艺数据的宽表行，已删除的工艺数据删除其宽表行"""
+    process_data_ids = list(process_data_ids)
+    templates = dict(
+        ProcessData.objects.filter(pk__in=process_data_ids, is_deleted=False).values_list('pk', 'template_id')
+    )
+    values = {pk: {} for pk in templates}
+    parameter_values = ParameterValue.objects.filter(
+        process_data_id__in=templates, is_deleted=False
+    ).values_list('process_data_id', 'parameter_id', 'value')
+    for process_data_id, parameter_id, value in parameter_values:
+        values[process_data_id][str(parameter_id)] = value
+
+    with transaction.atomic():
+        ProcessDataPivot.objects.filter(pk__in=process_data_ids).delete()
+        ProcessDataPivot.objects.bulk_create([
+            ProcessDataPivot(process_data_id=pk, template_id=template_id, values=values[pk])
+            for pk, template_id in templates.items()
+        ])
+    return len(templates)
+
+
+def rebuild_pivot(queryset=None, chunk_size=1000, progress=None):
+    """按主键分块全量重建宽表，progress 在每块完成后以累计行数调用，返回总行数"""
+    queryset = (ProcessData.objects.all() if queryset is None else queryset).order_by('pk')
+    total = 0
+    last_pk = None
+    while True:
+        chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        ids = list(chunk.values_list('pk', flat=True)[:chunk_size])
+        if not ids:
+            return total
+        refresh_pivot_rows(ids)
+        last_pk = ids[-1]
+        total += len(ids)
+        if progress is not None:
+            progress(total)
+
+
+def _cell_converter(parameter_type):
+    if parameter_type == 'number':
+        return parse_number
+    if parameter_type == 'boolean':
+        return parse_boolean
+    return None
+
+
+def get_pivot_parameters(template):
+    """模板的参数列定义，按 TemplateParameter.order 排序"""
+    return list(
+        TemplateParameter.objects.filter(template=template, is_deleted=False, parameter__is_deleted=False)
+        .order_by('order', 'id')
+        .values('parameter_id', 'parameter__code', 'parameter__name', 'parameter__unit', 'parameter__parameter_type')
+    )
+
+
+def iter_pivot_rows(template, parameters, after=None, limit=None):
+    """
+    按工艺数据ID升序产出宽表行（列表，顺序为 DATA_COLUMNS + 参数列）
+    after 为上一页最后一行的ID（键集分页）；limit 为空时产出全部行，内部按块读取
+    """
+    cells = [(str(parameter['parameter_id']), _cell_converter(parameter['parameter__parameter_type']))
+             for parameter in parameters]
+    queryset = ProcessDataPivot.objects.filter(template=template).order_by('process_data_id').values_list(
+        *(f'process_data__{column}' for column in DATA_COLUMNS), 'values'
+    )
+    if after is not None:
+        queryset = queryset.filter(process_data_id__gt=after)
+    if limit is not None:
+        queryset = queryset[:limit]
+
+    # 时间列与其他接口一样按当前时区输出
+    format_datetime = DateTimeField().to_representation
+    created_at_index = DATA_COLUMNS.index('created_at')
+    for *row, values in queryset.iterator(chunk_size=2000):
+        row[created_at_index] = format_datetime(row[created_at_index])
+        for key, convert in cells:
+            value = values.get(key)
+            if value is not None and convert is not None:
+                value = convert(value)
+            row.append(value)
+        yield row
@@ -0,0 +1,79 @@
+"""
+快速 JSON（orjson）与二进制 MessagePack 的渲染器和解析器
+通过 Accept 请求头进行内容协商：默认返回 JSON，客户端声明 application/msgpack 时返回 MessagePack。
+orjson、msgpack 均为可选依赖：未安装 orjson 时 JSON 渲染/解析退回 DRF 默认实现，
+未安装 msgpack 时 settings 中不会启用 MessagePack 渲染器和解析器。
+"""
+from rest_framework import renderers
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 可选依赖
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - 可选依赖
+    msgpack = None
+
+# orjson 不能直接处理的类型（Decimal、惰性翻译字符串、查询集等）交给 DRF 的编码器处理；
+# datetime 也交给 DRF 编码器，保证与默认 JSONRenderer 的时间格式一致
+_drf_encoder = JSONEncoder()
+
+
+def _default(obj):
+    return _drf_encoder.default(obj)
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """使用 orjson 的 JSON 渲染器，输出与 DRF 默认 JSONRenderer 等价"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # 需要缩进输出时（如可浏览 API）使用默认实现
+        if orjson is None or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        return orjson.dumps(
+            data, default=_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+
+
+class ORJSONParser(JSONParser):
+    """使用 orjson 的 JSON 解析器"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON 解析错误 - {exc}')
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """MessagePack 渲染器"""
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_default, use_bin_type=True, datetime=False)
+
+
+class MessagePackParser(BaseParser):
+    """MessagePack 解析器"""
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False, strict_map_key=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+            raise ParseError(f'MessagePack 解析错误 - {exc}')
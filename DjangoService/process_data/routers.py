@@ -0,0 +1,97 @@
+"""
+数据库读写分离：配置了只读副本（settings.DATABASE_READ_REPLICA 为副本的数据库别名）时，
+只读请求的查询发往副本，写入和其余查询发往主库。
+ReplicaRoutingMiddleware 按请求决定能否读副本：GET/HEAD/OPTIONS 请求，且客户端最近 REPLICA_READ_AFTER_WRITE_SECONDS 秒内
+没有写入（写入请求的响应设置 Cookie 标记）时读副本；请求中发生写入后，该请求余下的查询改读主库。
+请求之外（管理命令、事务提交回调）以及 use_primary() 块内的查询始终读主库；
+先读后写的逻辑应使用 select_for_update()（按写入路由）或放在 use_primary() 内，避免按副本中滞后的数据写入。
+按模型版本号失效的缓存（接口响应缓存、模板目录）和增量变更接口在 use_primary() 内读主库，
+避免把副本中滞后的数据写入新版本号的缓存，或因复制延迟漏掉变更
+"""
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+PRIMARY_COOKIE_NAME = 'db_read_primary'
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+_state = threading.local()
+
+
+def get_replica_alias():
+    """只读副本的数据库别名，未配置时返回 None"""
+    return getattr(settings, 'DATABASE_READ_REPLICA', None)
+
+
+@contextmanager
+def use_primary():
+    """块内的查询读主库"""
+    previous = getattr(_state, 'read_replica', False)
+    _state.read_replica = False
+    try:
+        yield
+    finally:
+        _state.read_replica = previous
+
+
+class ReplicaRouter:
+    """只读请求中的查询读副本，写入始终发往主库"""
+
+    def db_for_read(self, model, **hints):
+        if getattr(_state, 'read_replica', False):
+            return get_replica_alias() or DEFAULT_DB_ALIAS
+        return DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # 本请求写入后不再读副本，响应中标记客户端在一段时间内读主库
+        _state.read_replica = False
+        _state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # 副本与主库是同一份数据，从副本读出的对象可以关联到主库的对象
+        databases = {DEFAULT_DB_ALIAS, get_replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class ReplicaRoutingMiddleware:
+    """按请求方法和读写标记 Cookie 决定本请求能否读副本，未配置副本时不做任何处理"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not get_replica_alias():
+            return self.get_response(request)
+
+        read_replica = request.method in SAFE_METHODS and PRIMARY_COOKIE_NAME not in request.COOKIES
+        _state.read_replica = read_replica
+        _state.wrote = False
+        try:
+            response = self.get_response(request)
+            wrote = _state.wrote
+        finally:
+            _state.read_replica = False
+            _state.wrote = False
+
+        if read_replica and response.streaming and not wrote:
+            # 流式响应（导出等）的内容在中间件返回后才生成
+            response.streaming_content = self._read_replica(response.streaming_content)
+        seconds = getattr(settings, 'REPLICA_READ_AFTER_WRITE_SECONDS', 5)
+        if wrote and seconds > 0:
+            response.set_cookie(PRIMARY_COOKIE_NAME, '1', max_age=seconds, httponly=True,
+                                samesite=settings.SESSION_COOKIE_SAMESITE)
+        return response
+
+    @staticmethod
+    def _read_replica(content):
+        _state.read_replica = True
+        try:
+            yield from content
+        finally:
+            _state.read_replica = False
@@ -0,0 +1,278 @@
+"""
+全文检索：维护倒排索引表 SearchToken，MySQL 与 SQLite 上行为一致
+文本先做 NFKC 规范化并转小写再切分词元：连续的字母数字整体作为一个词（如编码 BTPL-001 切为 btpl 和 001），
+汉字没有词边界，连续的汉字取相邻两字的二元组和单字。
+检索时字母数字按词前缀匹配，汉字按二元组（单个汉字按单字）匹配；关键词的全部片段都命中的记录才返回（多个关键词为“且”），
+按命中词元的权重之和排序。与 icontains 不同，字母数字不能从词的中间开始匹配（与 MySQL FULLTEXT 的前缀检索一致）。
+记录保存、删除后经信号（见 signals.py）或批量写入后显式调用 schedule_search_index，在事务提交后合并重建其索引行
+"""
+import re
+import threading
+import unicodedata
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.db import connection, transaction
+from django.db.models import OuterRef, Q, Subquery, Sum
+
+from .models import (
+    ProcessData,
+    Tool,
+    CompositeMaterial,
+    ProcessingTask,
+    SensorData,
+    SearchToken,
+)
+
+# 连续的字母数字，或连续的汉字（CJK 统一表意文字及扩展 A、兼容表意文字）
+_TERM_RE = re.compile(r'[0-9a-z]+|[\u3400-\u9fff\uf900-\ufaff]+')
+
+MAX_TOKEN_LENGTH = 64
+
+_pending = threading.local()
+
+
+class SearchTarget:
+    """
+    检索目标：fields 以 {values 查找: 权重} 声明参与检索的字段，可以跨外键（如 operator__username），
+    外键对象修改这些字段后其关联记录会重新索引；title/subtitle 为全局检索结果显示的字段
+    """
+
+    def __init__(self, model, fields, title, subtitle=None):
+        self.model = model
+        self.name = model._meta.model_name
+        self.fields = fields
+        self.title = title
+        self.subtitle = subtitle
+
+    def get_dependencies(self):
+        """返回 [(关联模型, 外键名, 关联模型上参与检索的字段集合)]"""
+        dependencies = {}
+        for lookup in self.fields:
+            if '__' in lookup:
+                foreign_key, field_name = lookup.split('__', 1)
+                dependencies.setdefault(foreign_key, set()).add(field_name)
+        return [
+            (self.model._meta.get_field(foreign_key).related_model, foreign_key, field_names)
+            for foreign_key, field_names in dependencies.items()
+        ]
+
+
+SEARCH_TARGETS = {
+    target.name: target
+    for target in (
+        SearchTarget(ProcessData, {'code': 8, 'name': 6, 'batch_number': 4, 'operator__username': 2, 'remark': 1},
+                     title='name', subtitle='code'),
+        SearchTarget(ProcessingTask, {'task_code': 8, 'operator__username': 2, 'notes': 1},
+                     title='task_code', subtitle='notes'),
+        SearchTarget(Tool, {'code': 8, 'tool_type': 4, 'tool_spec': 4, 'description': 1},
+                     title='code', subtitle='tool_spec'),
+        SearchTarget(CompositeMaterial, {'part_number': 8, 'description': 1},
+                     title='part_number', subtitle='description'),
+        SearchTarget(SensorData, {'file_name': 6, 'sensor_id': 6, 'processing_task__task_code': 4},
+                     title='file_name', subtitle='sensor_id'),
+    )
+}
+
+
+def _is_cjk(char):
+    return char >= '\u3400'
+
+
+def _normalize(text):
+    return unicodedata.normalize('NFKC', str(text)).lower()
+
+
+def tokenize(text):
+    """把字段值切分为词元，返回 {词元: 出现次数}"""
+    counts = Counter()
+    for term in _TERM_RE.findall(_normalize(text)):
+        if _is_cjk(term[0]):
+            counts.update(term)
+            counts.update(term[index:index + 2] for index in range(len(term) - 1))
+        else:
+            counts[term[:MAX_TOKEN_LENGTH]] += 1
+    return counts
+
+
+def query_terms(text):
+    """
+    把检索关键词切分为 [(词元, 是否前缀匹配)]：字母数字按词前缀匹配，汉字取二元组、单个汉字取单字精确匹配
+    关键词中没有字母数字和汉字时返回空列表
+    """
+    terms = set()
+    for term in _TERM_RE.findall(_normalize(text)):
+        if not _is_cjk(term[0]):
+            terms.add((term[:MAX_TOKEN_LENGTH], True))
+        elif len(term) == 1:
+            terms.add((term, False))
+        else:
+            terms.update((term[index:index + 2], False) for index in range(len(term) - 1))
+    return sorted(terms)
+
+
+def _term_condition(token, prefix):
+    if not prefix:
+        return Q(token=token)
+    if connection.vendor == 'sqlite':
+        # SQLite 的 LIKE 不区分大小写，用不上索引；词元只含小写字母和数字，改用按二进制序的等价范围条件
+        return Q(token__gte=token, token__lt=token[:-1] + chr(ord(token[-1]) + 1))
+    return Q(token__startswith=token)
+
+
+def index_objects(target, ids):
+    """重建给定记录的索引行，已删除（含软删除）的记录只删除其索引行"""
+    config = SEARCH_TARGETS[target]
+    ids = list(ids)
+    weights = list(config.fields.values())
+    rows = config.model.objects.filter(pk__in=ids, is_deleted=False).values_list('pk', *config.fields)
+
+    tokens = []
+    for pk, *values in rows:
+        token_weights = Counter()
+        for value, weight in zip(values, weights):
+            if value:
+                for token, count in tokenize(value).items():
+                    token_weights[token] += count * weight
+        tokens.extend(
+            SearchToken(token=token, target=target, object_id=pk, weight=weight)
+            for token, weight in token_weights.items()
+        )
+
+    with transaction.atomic():
+        SearchToken.objects.filter(target=target, object_id__in=ids).delete()
+        SearchToken.objects.bulk_create(tokens, batch_size=2000)
+    return len(tokens)
+
+
+def schedule_search_index(model, ids):
+    """在事务提交后重建给定记录的索引行，同一事务内的修改合并为一次"""
+    target = model._meta.model_name
+    if target not in SEARCH_TARGETS:
+        return
+    pending = getattr(_pending, 'targets', None)
+    if pending is None:
+        pending = _pending.targets = {}
+    pending.setdefault(target, set()).update(ids)
+    transaction.on_commit(flush_search_index)
+
+
+def flush_search_index():
+    pending = getattr(_pending, 'targets', None)
+    if pending:
+        _pending.targets = {}
+        for target, ids in pending.items():
+            index_objects(target, ids)
+
+
+def get_search_dependents(model):
+    """返回以该模型为外键并索引其字段的检索目标 [(检索目标, 外键名, 字段集合)]"""
+    return [
+        (target, foreign_key, field_names)
+        for target in SEARCH_TARGETS.values()
+        for related_model, foreign_key, field_names in target.get_dependencies()
+        if related_model is model
+    ]
+
+
+def rebuild_search_index(targets=None, chunk_size=1000, progress=None):
+    """按主键分块全量重建索引，progress 在每块完成后以 (检索目标, 累计行数) 调用，返回 {检索目标: 行数}"""
+    totals = {}
+    for name in targets or SEARCH_TARGETS:
+        queryset = SEARCH_TARGETS[name].model.objects.order_by('pk')
+        total = 0
+        last_pk = None
+        while True:
+            chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            ids = list(chunk.values_list('pk', flat=True)[:chunk_size])
+            if not ids:
+                break
+            index_objects(name, ids)
+            last_pk = ids[-1]
+            total += len(ids)
+            if progress is not None:
+                progress(name, total)
+        totals[name] = total
+    return totals
+
+
+def _matching_ids(terms, target):
+    """
+    命中全部关键词片段的记录 ID 子查询
+    每个片段单独走一次 (target, token) 索引的范围扫描再取交集；写成一条 OR 条件再分组计数时，
+    SQLite 会改用 (target, object_id) 索引扫描该类型的全部词元
+    """
+    first, *rest = terms
+    queryset = SearchToken.objects.filter(_term_condition(*first), target=target)
+    for term in rest:
+        queryset = queryset.filter(
+            object_id__in=SearchToken.objects.filter(_term_condition(*term), target=target).values('object_id')
+        )
+    return queryset.values('object_id')
+
+
+def _search_condition(terms):
+    return reduce(or_, (_term_condition(*term) for term in terms))
+
+
+def filter_by_search(queryset, text):
+    """按索引过滤查询集，关键词切分不出词元时返回 None，由调用方退回原来的过滤方式"""
+    terms = query_terms(text)
+    if not terms:
+        return None
+    return queryset.filter(pk__in=_matching_ids(terms, queryset.model._meta.model_name))
+
+
+def annotate_search_score(queryset, text):
+    """为查询集附加相关度 search_score（命中词元的权重之和）"""
+    terms = query_terms(text)
+    target = queryset.model._meta.model_name
+    scores = SearchToken.objects.filter(
+        _search_condition(terms), target=target, object_id=OuterRef('pk')
+    ).values('object_id').annotate(score=Sum('weight')).values('score')
+    return queryset.annotate(search_score=Subquery(scores))
+
+
+def search(text, targets=None, limit=20):
+    """
+    跨类型全局检索，按相关度降序返回 [{'type', 'id', 'score', 'title', 'subtitle'}]
+    相关度相同时较新的记录（ID 较大）在前
+    """
+    terms = query_terms(text)
+    targets = [name for name in (targets or SEARCH_TARGETS) if name in SEARCH_TARGETS]
+    if not terms or not targets:
+        return []
+
+    # 每种类型取相关度最高的 limit 条，合并后再取前 limit 条
+    hits = []
+    for name in targets:
+        hits.extend(
+            SearchToken.objects.filter(_search_condition(terms), target=name, object_id__in=_matching_ids(terms, name))
+            .values('target', 'object_id').annotate(score=Sum('weight')).order_by('-score', '-object_id')[:limit]
+        )
+    hits.sort(key=lambda hit: (-hit['score'], -hit['object_id']))
+    del hits[limit:]
+    by_target = {}
+    for hit in hits:
+        by_target.setdefault(hit['target'], []).append(hit['object_id'])
+
+    # 每种类型一次查询取显示字段；索引刷新前已删除的记录不返回
+    display = {}
+    for name, ids in by_target.items():
+        config = SEARCH_TARGETS[name]
+        lookups = [lookup for lookup in (config.title, config.subtitle) if lookup]
+        for pk, *values in config.model.objects.filter(pk__in=ids, is_deleted=False).values_list('pk', *lookups):
+            display[name, pk] = values + [None] * (2 - len(values))
+
+    return [
+        {
+            'type': hit['target'],
+            'id': hit['object_id'],
+            'score': hit['score'],
+            'title': display[hit['target'], hit['object_id']][0],
+            'subtitle': display[hit['target'], hit['object_id']][1],
+        }
+        for hit in hits
+        if (hit['target'], hit['object_id']) in display
+    ]
@@ -1,5 +1,13 @@
+from collections import defaultdict
+
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+from django.db import connections, router, transaction
+from django.db.models import Count
 from django.contrib.auth.models import User
+from .caching import invalidate_model_cache
+from .catalog import get_entry
+from .search import schedule_search_index
 from .models import (
     ProcessCategory,
     ProcessParameter,
@@ -20,7 +28,209 @@ from .models import (
 )
 
 
-class UserSerializer(serializers.ModelSerializer):
+class DynamicFieldsMixin:
+    """
+    支持稀疏字段集和按需展开的序列化器混入类
+    - ?fields=id,status 只输出指定的字段
+    - ?expand=tool_info,parameters 只展开指定的嵌套对象，Meta.expandable_fields 中未指定的嵌套字段不输出
+    两个参数都未携带时输出保持不变。Meta.expandable_fields 以 {字段名: [关联查找]} 声明嵌套字段
+    及其依赖的 select_related/prefetch_related 查找，视图集据此裁剪查询计划
+    """
+    fields_query_param = 'fields'
+    expand_query_param = 'expand'
+
+    @classmethod
+    def parse_sparse_params(cls, request):
+        """解析请求中的 fields / expand 参数，未携带的参数返回 None"""
+        if request is None or request.method not in SAFE_METHODS:
+            return None, None
+        params = request.query_params
+        requested_fields = expand = None
+        if cls.fields_query_param in params:
+            requested_fields = {name for name in params[cls.fields_query_param].split(',') if name}
+        if cls.expand_query_param in params:
+            expand = {name for name in params[cls.expand_query_param].split(',') if name}
+        return requested_fields, expand
+
+    @classmethod
+    def get_omitted_lookups(cls, request):
+        """返回本次请求不输出的嵌套字段所依赖的关联查找"""
+        requested_fields, expand = cls.parse_sparse_params(request)
+        if requested_fields is None and expand is None:
+            return set()
+        wanted = (requested_fields or set()) | (expand or set())
+        expandable_fields = getattr(cls.Meta, 'expandable_fields', {})
+        omitted = set()
+        for field_name, lookups in expandable_fields.items():
+            if field_name not in wanted:
+                omitted.update(lookups)
+        return omitted
+
+    @classmethod
+    def select_field_names(cls, field_names, request):
+        """按 fields / expand 参数筛选输出的字段名，保持原有顺序"""
+        requested_fields, expand = cls.parse_sparse_params(request)
+        if requested_fields is None and expand is None:
+            return list(field_names)
+
+        expandable_fields = getattr(cls.Meta, 'expandable_fields', {})
+        if requested_fields is not None:
+            wanted = requested_fields | (expand or set())
+            return [name for name in field_names if name in wanted]
+        return [name for name in field_names if name not in expandable_fields or name in expand]
+
+    def get_fields(self):
+        fields = super().get_fields()
+        # 仅作用于顶层序列化器（或顶层列表的子序列化器），嵌套序列化器保持完整输出
+        root = self.root
+        if root is not self and getattr(root, 'child', None) is not self:
+            return fields
+
+        keep = self.select_field_names(fields, self.context.get('request'))
+        return {name: fields[name] for name in keep}
+
+
+class CachedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """在同一次序列化中缓存主键查找结果，批量校验时同一个关联对象只查询一次"""
+
+    def to_internal_value(self, data):
+        cache = self.context.setdefault('_related_object_cache', {})
+        key = (self.get_queryset().model, str(data))
+        if key not in cache:
+            cache[key] = super().to_internal_value(data)
+        return cache[key]
+
+
+class BulkCreateListSerializer(serializers.ListSerializer):
+    """
+    批量创建用的列表序列化器
+    逐项校验，errors 与提交顺序一一对应；子序列化器 Meta.bulk_unique_field 声明的唯一字段
+    在一次查询内校验；校验通过后使用 bulk_create 写入，context['upsert'] 为真时按唯一字段更新已存在的记录
+    """
+    batch_size = 500
+
+    @property
+    def unique_field(self):
+        return getattr(self.child.Meta, 'bulk_unique_field', None)
+
+    @property
+    def upsert(self):
+        return bool(self.context.get('upsert')) and self.unique_field is not None
+
+    def to_internal_value(self, data):
+        unique_errors = []
+        if self.unique_field and isinstance(data, list):
+            unique_errors = self.validate_unique_field(data)
+
+        try:
+            validated_data = super().to_internal_value(data)
+        except serializers.ValidationError as exc:
+            if not any(unique_errors) or not isinstance(exc.detail, list):
+                raise
+            # 合并逐项校验错误与唯一字段错误，逐项校验的字段错误优先
+            raise serializers.ValidationError([
+                {**unique_error, **item_error}
+                for unique_error, item_error in zip(unique_errors, exc.detail)
+            ])
+
+        if any(unique_errors):
+            raise serializers.ValidationError(unique_errors)
+        return validated_data
+
+    def validate_unique_field(self, data):
+        """
+        校验唯一字段：批次内不能重复，非 upsert 模式下也不能与已有记录重复
+        返回与提交顺序一一对应的错误列表
+        """
+        field = self.unique_field
+        values = [item.get(field) if isinstance(item, dict) else None for item in data]
+        errors = [{} for _ in values]
+
+        first_index = {}
+        for index, value in enumerate(values):
+            if not isinstance(value, (str, int)):
+                continue
+            if value in first_index:
+                errors[index][field] = [f'与第 {first_index[value] + 1} 项重复']
+            else:
+                first_index[value] = index
+
+        if not self.upsert and first_index:
+            model = self.child.Meta.model
+            existing = set(
+                model.objects.filter(**{f'{field}__in': list(first_index)}).values_list(field, flat=True)
+            )
+            for index, value in enumerate(values):
+                if value in existing and field not in errors[index]:
+                    errors[index][field] = [f'{value} 已存在']
+
+        return errors
+
+    def get_upsert_options(self, model, field_names):
+        concrete_fields = {field.name for field in model._meta.concrete_fields}
+        update_fields = set(field_names) | {'updated_at', 'is_deleted'}
+        options = {
+            'batch_size': self.batch_size,
+            'update_conflicts': True,
+            'update_fields': sorted((update_fields & concrete_fields) - {self.unique_field}),
+        }
+        # MySQL 的 ON DUPLICATE KEY UPDATE 不能指定冲突字段，按表上的唯一约束判断冲突
+        if connections[router.db_for_write(model)].features.supports_update_conflicts_with_target:
+            options['unique_fields'] = [self.unique_field]
+        return options
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        related_data = [self.child.pop_bulk_related_data(attrs) for attrs in validated_data]
+        instances = [model(**attrs) for attrs in validated_data]
+
+        if self.upsert:
+            # 每项只更新其提交的字段（校验后的数据含未提交字段的默认值，按原始数据的键筛选）：
+            # 按提交的字段集合分组，每组一次 upsert，未提交的可选字段保留原值；冲突行若已软删除则恢复
+            groups = {}
+            for instance, attrs, item in zip(instances, validated_data, self.initial_data):
+                submitted = frozenset(name for name in attrs if name in item)
+                groups.setdefault(submitted, []).append(instance)
+            for field_names, group in groups.items():
+                model.objects.bulk_create(group, **self.get_upsert_options(model, field_names))
+        else:
+            model.objects.bulk_create(instances, batch_size=self.batch_size)
+
+        # 部分数据库（如 MySQL）批量插入后不回填主键，upsert 时冲突行的主键也不可靠，按唯一字段补查
+        if self.unique_field and (self.upsert or any(instance.pk is None for instance in instances)):
+            field = self.unique_field
+            pk_map = dict(
+                model.objects.filter(
+                    **{f'{field}__in': [getattr(instance, field) for instance in instances]}
+                ).values_list(field, 'pk')
+            )
+            for instance in instances:
+                instance.pk = pk_map.get(getattr(instance, field))
+
+        self.child.bulk_create_related(instances, related_data)
+        # bulk_create 不发送 post_save 信号；未回填主键的记录（MySQL 且无唯一字段）需执行 rebuild_search_index 补建索引
+        schedule_search_index(model, [instance.pk for instance in instances if instance.pk is not None])
+        invalidate_model_cache(model)
+        return instances
+
+
+class BulkCreateSerializerMixin:
+    """
+    批量创建序列化器混入类，配合 BulkCreateListSerializer 使用
+    子类可重写 pop_bulk_related_data / bulk_create_related 处理嵌套的关联数据
+    """
+    serializer_related_field = CachedPrimaryKeyRelatedField
+
+    def pop_bulk_related_data(self, attrs):
+        """从单项数据中取出需要在主记录写入后再写入的关联数据"""
+        return None
+
+    def bulk_create_related(self, instances, related_data):
+        """主记录写入后批量写入关联数据"""
+        pass
+
+
+class UserSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """用户序列化器"""
     full_name = serializers.SerializerMethodField()
     
@@ -59,21 +269,26 @@ class UserCreateUpdateSerializer(serializers.ModelSerializer):
         return instance
 
 
-class ProcessCategorySerializer(serializers.ModelSerializer):
+class ProcessCategorySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """工艺分类序列化器"""
     class Meta:
         model = ProcessCategory
         fields = '__all__'
+    
+    def validate_parent(self, parent):
+        if parent is not None and self.instance is not None and parent.path.startswith(self.instance.path):
+            raise serializers.ValidationError('不能把分类移动到自身或其子分类下')
+        return parent
 
 
-class ProcessParameterSerializer(serializers.ModelSerializer):
+class ProcessParameterSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """工艺参数序列化器"""
     class Meta:
         model = ProcessParameter
         fields = '__all__'
 
 
-class TemplateParameterSerializer(serializers.ModelSerializer):
+class TemplateParameterSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """模板参数关联序列化器"""
     parameter_info = ProcessParameterSerializer(source='parameter', read_only=True)
     
@@ -81,9 +296,10 @@ class TemplateParameterSerializer(serializers.ModelSerializer):
         model = TemplateParameter
         fields = ['id', 'template', 'parameter', 'parameter_info', 'order', 
                   'is_required', 'default_value', 'created_at', 'updated_at']
+        expandable_fields = {'parameter_info': ['parameter']}
 
 
-class ProcessTemplateSerializer(serializers.ModelSerializer):
+class ProcessTemplateSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """工艺模板序列化器"""
     category_name = serializers.CharField(source='category.name', read_only=True)
     template_parameters = TemplateParameterSerializer(
@@ -94,9 +310,10 @@ class ProcessTemplateSerializer(serializers.ModelSerializer):
         model = ProcessTemplate
         fields = ['id', 'name', 'code', 'description', 'category', 'category_name',
                  'version', 'is_active', 'created_at', 'updated_at', 'template_parameters']
+        expandable_fields = {'template_parameters': ['templateparameter_set__parameter']}
 
 
-class ParameterValueSerializer(serializers.ModelSerializer):
+class ParameterValueSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """参数值序列化器"""
     parameter_name = serializers.CharField(source='parameter.name', read_only=True)
     parameter_code = serializers.CharField(source='parameter.code', read_only=True)
@@ -109,12 +326,10 @@ class ParameterValueSerializer(serializers.ModelSerializer):
                  'parameter_type', 'parameter_unit', 'value', 'created_at', 'updated_at']
 
 
-class ProcessDataSerializer(serializers.ModelSerializer):
+class ProcessDataSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """工艺数据记录序列化器"""
     template_name = serializers.CharField(source='template.name', read_only=True)
-    parameter_values = ParameterValueSerializer(
-        source='parameter_values', many=True, read_only=True
-    )
+    parameter_values = ParameterValueSerializer(many=True, read_only=True)
     operator_info = UserSerializer(source='operator', read_only=True)
     operator_name = serializers.SerializerMethodField()
     
@@ -122,6 +337,10 @@ class ProcessDataSerializer(serializers.ModelSerializer):
         model = ProcessData
         fields = ['id', 'template', 'template_name', 'code', 'name', 'batch_number', 
                  'operator', 'operator_info', 'operator_name', 'remark', 'created_at', 'updated_at', 'parameter_values']
+        expandable_fields = {
+            'operator_info': [],
+            'parameter_values': ['parameter_values__parameter'],
+        }
     
     def get_operator_name(self, obj):
         if obj.operator:
@@ -129,8 +348,33 @@ class ProcessDataSerializer(serializers.ModelSerializer):
         return None
 
 
+class CatalogTemplateField(serializers.PrimaryKeyRelatedField):
+    """按模板目录（见 catalog.py）解析模板ID，目录有效时不查询模板表"""
+    
+    def __init__(self, **kwargs):
+        kwargs.setdefault('queryset', ProcessTemplate.objects.all())
+        super().__init__(**kwargs)
+    
+    def to_internal_value(self, data):
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            template_id = int(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        entry = get_entry(template_id)
+        if entry is None:
+            self.fail('does_not_exist', pk_value=data)
+        return entry.template
+
+
 class ProcessDataCreateSerializer(serializers.ModelSerializer):
-    """创建工艺数据的序列化器"""
+    """
+    创建工艺数据的序列化器，模板及其参数定义从模板目录读取
+    parameter_values 为 {参数编码: 值}，按模板编译的校验器检查类型、范围、枚举和必填，
+    工艺数据与全部参数值在一个事务内写入，参数值一次 bulk_create
+    """
+    template = CatalogTemplateField()
     parameter_values = serializers.DictField(child=serializers.CharField(), write_only=True)
     
     class Meta:
@@ -138,40 +382,39 @@ class ProcessDataCreateSerializer(serializers.ModelSerializer):
         fields = ['template', 'code', 'name', 'batch_number', 'operator', 
                  'remark', 'parameter_values']
     
+    def validate(self, attrs):
+        entry = get_entry(attrs['template'].pk)
+        if entry is None:
+            raise serializers.ValidationError({'template': ['模板不存在']})
+        values, errors = entry.validator.validate(attrs.get('parameter_values', {}))
+        if errors:
+            raise serializers.ValidationError({'parameter_values': errors})
+        attrs['parameter_values'] = values
+        return attrs
+    
     def create(self, validated_data):
-        # 提取参数值数据并移除
-        parameter_values_data = validated_data.pop('parameter_values', {})
-        
-        # 创建工艺数据记录
-        process_data = ProcessData.objects.create(**validated_data)
-        
-        # 获取模板关联的参数
-        template = validated_data.get('template')
-        template_parameters = TemplateParameter.objects.filter(template=template)
-        
-        # 创建参数值记录
-        for template_param in template_parameters:
-            param_code = template_param.parameter.code
-            if param_code in parameter_values_data:
-                ParameterValue.objects.create(
-                    process_data=process_data,
-                    parameter=template_param.parameter,
-                    value=parameter_values_data[param_code]
-                )
-        
+        values = validated_data.pop('parameter_values', [])
+        with transaction.atomic():
+            process_data = ProcessData.objects.create(**validated_data)
+            ParameterValue.objects.bulk_create([
+                ParameterValue(process_data=process_data, parameter=template_param.parameter, value=value)
+                for template_param, value in values
+            ])
+        # bulk_create 不发送 post_save 信号
+        invalidate_model_cache(ParameterValue)
         return process_data
 
 
 # 复合材料加工相关序列化器
 
-class ToolSerializer(serializers.ModelSerializer):
+class ToolSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """刀具序列化器"""
     class Meta:
         model = Tool
         fields = '__all__'
 
 
-class CompositeMaterialSerializer(serializers.ModelSerializer):
+class CompositeMaterialSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """复合材料构件序列化器"""
     material_type_display = serializers.CharField(source='get_material_type_display', read_only=True)
     
@@ -180,14 +423,14 @@ class CompositeMaterialSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class ProcessingParameterSerializer(serializers.ModelSerializer):
-    """加工参数序列化器"""
+class ProcessingParameterSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
+    """加工参数序列化器，类型化影子列只用于查询，不输出"""
     class Meta:
         model = ProcessingParameter
-        exclude = ['task']
+        exclude = ['task', 'value_number', 'value_boolean', 'value_date']
 
 
-class SensorDataSerializer(serializers.ModelSerializer):
+class SensorDataSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """传感器数据序列化器"""
     sensor_type_display = serializers.CharField(source='get_sensor_type_display', read_only=True)
     processing_task_code = serializers.CharField(source='processing_task.task_code', read_only=True)
@@ -223,6 +466,13 @@ class SensorDataCreateSerializer(serializers.ModelSerializer):
                  'processing_task', 'sensor_id', 'description']
 
 
+class SensorDataBulkSerializer(BulkCreateSerializerMixin, SensorDataCreateSerializer):
+    """批量创建传感器数据的序列化器"""
+
+    class Meta(SensorDataCreateSerializer.Meta):
+        list_serializer_class = BulkCreateListSerializer
+
+
 class SensorDataUpdateSerializer(serializers.ModelSerializer):
     """用于更新传感器元数据的序列化器"""
     class Meta:
@@ -230,7 +480,7 @@ class SensorDataUpdateSerializer(serializers.ModelSerializer):
         fields = ['sensor_type', 'processing_task', 'sensor_id', 'description']
 
 
-class ProcessingQualitySerializer(serializers.ModelSerializer):
+class ProcessingQualitySerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """加工质量序列化器"""
     defect_type_display = serializers.CharField(source='get_defect_type_display', read_only=True)
     inspector_info = UserSerializer(source='inspector', read_only=True)
@@ -244,6 +494,7 @@ class ProcessingQualitySerializer(serializers.ModelSerializer):
             'inspector', 'inspector_info', 'inspector_name', 'images', 'remarks',
             'created_at', 'updated_at'
         ]
+        expandable_fields = {'inspector_info': []}
     
     def get_inspector_name(self, obj):
         if obj.inspector:
@@ -251,7 +502,7 @@ class ProcessingQualitySerializer(serializers.ModelSerializer):
         return None
 
 
-class ToolWearRecordSerializer(serializers.ModelSerializer):
+class ToolWearRecordSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """刀具磨损记录序列化器"""
     tool_code = serializers.CharField(source='tool.code', read_only=True)
     
@@ -260,17 +511,49 @@ class ToolWearRecordSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
-class TaskGroupSerializer(serializers.ModelSerializer):
+class ToolWearRecordBulkSerializer(BulkCreateSerializerMixin, serializers.ModelSerializer):
+    """批量创建刀具磨损记录的序列化器"""
+
+    class Meta:
+        model = ToolWearRecord
+        fields = ['wear_value', 'record_time', 'tool', 'processing_task',
+                  'measurement_method', 'position', 'images']
+        list_serializer_class = BulkCreateListSerializer
+
+
+class TaskGroupSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """任务组序列化器"""
     created_by = UserSerializer(read_only=True)
     task_count = serializers.SerializerMethodField()
+    status_counts = serializers.SerializerMethodField()
 
     class Meta:
         model = TaskGroup
-        fields = ['id', 'name', 'description', 'created_by', 'created_at', 'task_count']
+        fields = ['id', 'name', 'description', 'created_by', 'created_at', 'task_count', 'status_counts']
 
     def get_task_count(self, obj):
-        return obj.tasks.count()
+        # 优先使用视图集聚合查询得到的注解，避免逐行 COUNT
+        if hasattr(obj, 'task_count'):
+            return obj.task_count
+        return obj.tasks.filter(is_deleted=False).count()
+
+    def get_status_counts(self, obj):
+        """各状态任务数量（计划中 / 进行中 / 已完成）"""
+        if hasattr(obj, 'planned_count'):
+            return {
+                'planned': obj.planned_count,
+                'in_progress': obj.in_progress_count,
+                'completed': obj.completed_count,
+            }
+        counts = dict(
+            obj.tasks.filter(is_deleted=False, status__in=['planned', 'in_progress', 'completed'])
+            .values_list('status').annotate(count=Count('id'))
+        )
+        return {
+            'planned': counts.get('planned', 0),
+            'in_progress': counts.get('in_progress', 0),
+            'completed': counts.get('completed', 0),
+        }
 
     def create(self, validated_data):
         # 自动设置创建者
@@ -278,7 +561,7 @@ class TaskGroupSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class ProcessingTaskListSerializer(serializers.ModelSerializer):
+class ProcessingTaskListSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """加工任务列表序列化器 - 使用嵌套序列化器返回完整对象"""
     tool_info = ToolSerializer(source='tool', read_only=True)
     material_info = CompositeMaterialSerializer(source='composite_material', read_only=True)
@@ -297,6 +580,12 @@ class ProcessingTaskListSerializer(serializers.ModelSerializer):
             'processing_time', 'duration', 'notes', 'parameters',
             'group', 'group_name'
         ]
+        expandable_fields = {
+            'tool_info': ['tool'],
+            'material_info': ['composite_material'],
+            'operator_info': ['operator'],
+            'parameters': ['parameters'],
+        }
         
     def get_group_name(self, obj):
         if obj.group:
@@ -304,21 +593,27 @@ class ProcessingTaskListSerializer(serializers.ModelSerializer):
         return "未分配"
 
 
-class ProcessingTaskDetailSerializer(serializers.ModelSerializer):
+class ProcessingTaskDetailSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     """加工任务详情序列化器"""
     tool = ToolSerializer(read_only=True)
     composite_material = CompositeMaterialSerializer(read_only=True)
     operator = UserSerializer(read_only=True)
-    parameters = ProcessingParameterSerializer(source='processingparameter_set', many=True, read_only=True)
+    parameters = ProcessingParameterSerializer(many=True, read_only=True)
     sensor_data = SensorDataSerializer(many=True, read_only=True)
-    quality_records = ProcessingQualitySerializer(source='processingquality_set', many=True, read_only=True)
-    tool_wear_records = ToolWearRecordSerializer(source='toolwearrecord_set', many=True, read_only=True)
+    quality_records = ProcessingQualitySerializer(many=True, read_only=True)
+    tool_wear_records = ToolWearRecordSerializer(many=True, read_only=True)
     processing_type_display = serializers.CharField(source='get_processing_type_display', read_only=True)
     status_display = serializers.CharField(source='get_status_display', read_only=True)
     
     class Meta:
         model = ProcessingTask
         fields = '__all__'
+        expandable_fields = {
+            'parameters': ['parameters'],
+            'sensor_data': ['sensor_data'],
+            'quality_records': ['quality_records__inspector'],
+            'tool_wear_records': ['tool_wear_records__tool'],
+        }
 
 
 class ProcessingTaskCreateUpdateSerializer(serializers.ModelSerializer):
@@ -333,14 +628,17 @@ class ProcessingTaskCreateUpdateSerializer(serializers.ModelSerializer):
             'notes', 'parameters', 'group'
         ]
 
+    @transaction.atomic
     def create(self, validated_data):
         """创建任务并关联参数"""
         parameters_data = validated_data.pop('parameters', [])
         task = ProcessingTask.objects.create(**validated_data)
-        for param_data in parameters_data:
-            ProcessingParameter.objects.create(task=task, **param_data)
+        ProcessingParameter.objects.bulk_create([
+            ProcessingParameter(task=task, **param_data) for param_data in parameters_data
+        ])
         return task
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         """更新任务并同步参数"""
         parameters_data = validated_data.pop('parameters', None)
@@ -350,10 +648,64 @@ class ProcessingTaskCreateUpdateSerializer(serializers.ModelSerializer):
 
         # 如果提交了参数数据，则进行同步
         if parameters_data is not None:
-            # 先删除旧的参数
-            instance.parameters.all().delete()
-            # 再创建新的参数
-            for param_data in parameters_data:
-                ProcessingParameter.objects.create(task=instance, **param_data)
+            self.sync_parameters(instance, parameters_data)
         
-        return instance 
\ No newline at end of file
+        return instance 
+
+    @staticmethod
+    def sync_parameters(task, parameters_data):
+        """
+        按参数名称对比提交的参数与已有参数，只写入有变化的行：
+        值或单位变化的批量更新，新增的批量创建，未提交的删除，未变化的保留（保留其 created_at）
+        """
+        existing = defaultdict(list)
+        for parameter in task.parameters.order_by('id'):
+            existing[parameter.parameter_name].append(parameter)
+
+        to_create = []
+        to_update = []
+        for param_data in parameters_data:
+            matches = existing.get(param_data['parameter_name'])
+            if not matches:
+                to_create.append(ProcessingParameter(task=task, **param_data))
+                continue
+            parameter = matches.pop(0)
+            value = param_data.get('parameter_value', parameter.parameter_value)
+            unit = param_data.get('unit', parameter.unit)
+            if (value, unit) != (parameter.parameter_value, parameter.unit):
+                parameter.parameter_value = value
+                parameter.unit = unit
+                to_update.append(parameter)
+
+        to_delete = [parameter.id for matches in existing.values() for parameter in matches]
+        if to_delete:
+            ProcessingParameter.objects.filter(id__in=to_delete).delete()
+        if to_update:
+            ProcessingParameter.objects.bulk_update(to_update, ['parameter_value', 'unit'])
+        if to_create:
+            ProcessingParameter.objects.bulk_create(to_create)
+
+
+class ProcessingTaskBulkSerializer(BulkCreateSerializerMixin, ProcessingTaskCreateUpdateSerializer):
+    """批量创建/更新加工任务的序列化器，task_code 的唯一性由 BulkCreateListSerializer 整批校验"""
+
+    class Meta(ProcessingTaskCreateUpdateSerializer.Meta):
+        list_serializer_class = BulkCreateListSerializer
+        bulk_unique_field = 'task_code'
+        extra_kwargs = {'task_code': {'validators': []}}
+
+    def pop_bulk_related_data(self, attrs):
+        return attrs.pop('parameters', None)
+
+    def bulk_create_related(self, tasks, parameters_list):
+        """批量写入加工参数，upsert 时提交了参数的任务先清除旧参数"""
+        if self.parent.upsert:
+            replaced_ids = [task.pk for task, parameters in zip(tasks, parameters_list)
+                            if parameters is not None]
+            ProcessingParameter.objects.filter(task_id__in=replaced_ids).delete()
+
+        ProcessingParameter.objects.bulk_create([
+            ProcessingParameter(task=task, **param_data)
+            for task, parameters in zip(tasks, parameters_list)
+            for param_data in parameters or []
+        ], batch_size=BulkCreateListSerializer.batch_size)
@@ -0,0 +1,68 @@
+"""
+模型信号处理：模型保存或删除后使依赖它的接口响应缓存失效，参数值变化后刷新工艺数据宽表，
+检索目标及其外键对象变化后重建全文检索索引
+"""
+from django.db.models.signals import post_save, post_delete, pre_delete
+
+from .caching import invalidate_model_cache
+from .models import ProcessData, ParameterValue
+from .pivot import schedule_pivot_refresh
+from .search import SEARCH_TARGETS, get_search_dependents, schedule_search_index
+
+
+def invalidate_response_cache(sender, **kwargs):
+    invalidate_model_cache(sender)
+
+
+def connect_cache_invalidation(models):
+    """为给定模型注册 post_save/post_delete 缓存失效处理"""
+    for model in models:
+        uid = f'response_cache:{model._meta.label_lower}'
+        post_save.connect(invalidate_response_cache, sender=model, dispatch_uid=f'{uid}:save')
+        post_delete.connect(invalidate_response_cache, sender=model, dispatch_uid=f'{uid}:delete')
+
+
+def refresh_pivot_for_parameter_value(sender, instance, **kwargs):
+    schedule_pivot_refresh([instance.process_data_id])
+
+
+def refresh_pivot_for_process_data(sender, instance, **kwargs):
+    schedule_pivot_refresh([instance.pk])
+
+
+def connect_pivot_refresh():
+    """注册工艺数据宽表的增量刷新；批量写入参数值由 ParameterValueQuerySet 处理"""
+    post_save.connect(refresh_pivot_for_parameter_value, sender=ParameterValue, dispatch_uid='pivot:value:save')
+    post_delete.connect(refresh_pivot_for_parameter_value, sender=ParameterValue, dispatch_uid='pivot:value:delete')
+    post_save.connect(refresh_pivot_for_process_data, sender=ProcessData, dispatch_uid='pivot:data:save')
+
+
+def index_search_record(sender, instance, **kwargs):
+    schedule_search_index(sender, [instance.pk])
+
+
+def index_search_dependents(sender, instance, update_fields=None, **kwargs):
+    """外键对象修改了被索引的字段（或被删除）时，重新索引引用它的记录"""
+    for target, foreign_key, field_names in get_search_dependents(sender):
+        if update_fields is not None and not field_names & set(update_fields):
+            continue
+        schedule_search_index(
+            target.model, target.model.objects.filter(**{foreign_key: instance.pk}).values_list('pk', flat=True)
+        )
+
+
+def connect_search_index():
+    """
+    注册全文检索索引的增量维护；批量写入由调用方显式调用 schedule_search_index
+    外键对象删除时在 pre_delete 中收集引用它的记录，SET_NULL 生效后再重新索引
+    """
+    related_models = set()
+    for target in SEARCH_TARGETS.values():
+        uid = f'search:{target.name}'
+        post_save.connect(index_search_record, sender=target.model, dispatch_uid=f'{uid}:save')
+        post_delete.connect(index_search_record, sender=target.model, dispatch_uid=f'{uid}:delete')
+        related_models.update(related_model for related_model, _, _ in target.get_dependencies())
+    for model in related_models:
+        uid = f'search:dependents:{model._meta.label_lower}'
+        post_save.connect(index_search_dependents, sender=model, dispatch_uid=f'{uid}:save')
+        pre_delete.connect(index_search_dependents, sender=model, dispatch_uid=f'{uid}:delete')
@@ -1,6 +1,26 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import math
+import os
+import struct
+import tempfile
+import unittest
+import unittest.mock
+import zipfile
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
+from rest_framework.renderers import JSONRenderer
 from rest_framework.test import APIClient
 from django.contrib.auth.models import User
 
@@ -11,7 +31,41 @@ from .models import (
     TemplateParameter,
     ProcessData,
     ParameterValue,
+    ProcessDataPivot,
+    Tool,
+    CompositeMaterial,
+    ProcessingTask,
+    ProcessingParameter,
+    SensorData,
+    ProcessingQuality,
+    ToolWearRecord,
+    TaskGroup,
+    SearchToken,
 )
+from .catalog import get_catalog
+from .imports import ProcessDataImport
+from . import routers
+from .renderers import ORJSONRenderer, msgpack
+from .routers import PRIMARY_COOKIE_NAME, ReplicaRouter, use_primary
+from .search import flush_search_index, query_terms, tokenize
+from .serializers import ProcessTemplateSerializer
+from .views import ProcessDataViewSet, ProcessingTaskViewSet, ProcessingQualityViewSet, ToolWearRecordViewSet
+
+
+class QueryBudgetMixin:
+    """查询预算断言助手：请求接口并断言 SQL 查询次数不超过给定上限"""
+    
+    def assertQueryBudget(self, url, budget, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        query_count = len(ctx.captured_queries)
+        self.assertLessEqual(
+            query_count, budget,
+            f"{url} 执行了 {query_count} 次查询，超出预算 {budget}:\n" +
+            "\n".join(query['sql'] for query in ctx.captured_queries)
+        )
+        return response
 
 
 class ProcessCategoryTests(TestCase):
@@ -48,6 +102,67 @@ class ProcessCategoryTests(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(len(response.data['results']), 1)
+    
+    def create_children(self, parent, prefix, count):
+        return [
+            ProcessCategory.objects.create(name=f'{prefix}{index}', code=f'{prefix}{index}', parent=parent)
+            for index in range(count)
+        ]
+    
+    def test_tree_nested_in_one_query(self):
+        """测试分类树一次查询返回全部层级，已删除分类连同其子树不返回"""
+        url = reverse('processcategory-tree')
+        children = self.create_children(self.category, 'A', 2)
+        grandchildren = self.create_children(children[0], 'B', 2)
+        deep = grandchildren[1]
+        for level in range(5):
+            deep = ProcessCategory.objects.create(name=f'C{level}', code=f'C{level}', parent=deep)
+        deleted = ProcessCategory.objects.create(name='删除', code='Z', parent=self.category, is_deleted=True)
+        ProcessCategory.objects.create(name='删除的子分类', code='ZZ', parent=deleted)
+        ProcessCategory.objects.create(name='根分类2', code='ROOT2')
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual([node['code'] for node in response.data], ['ROOT2', 'TEST001'])
+        root = response.data[1]
+        self.assertEqual([node['code'] for node in root['children']], ['A0', 'A1'])
+        self.assertEqual([node['code'] for node in root['children'][0]['children']], ['B0', 'B1'])
+        node = root['children'][0]['children'][1]
+        for level in range(5):
+            node = node['children'][0]
+            self.assertEqual(node['code'], f'C{level}')
+        self.assertEqual(node['children'], [])
+        
+        response = self.client.get(url, {'root': children[0].id})
+        self.assertEqual([node['code'] for node in response.data], ['A0'])
+        self.assertEqual([node['code'] for node in response.data[0]['children']], ['B0', 'B1'])
+        self.assertEqual(self.client.get(url, {'root': deleted.id}).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(self.client.get(url, {'root': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_materialized_path(self):
+        """测试物化路径随新建和移动分类维护，子树可按路径前缀查询，不能移动到自身子树下"""
+        child, = self.create_children(self.category, 'A', 1)
+        grandchild, = self.create_children(child, 'B', 1)
+        self.assertEqual(grandchild.path, f'{self.category.id}/{child.id}/{grandchild.id}/')
+        self.assertEqual(set(self.category.get_descendants()), {child, grandchild})
+        
+        other = ProcessCategory.objects.create(name='其他', code='OTHER')
+        response = self.client.patch(
+            reverse('processcategory-detail', args=[child.id]), {'parent': other.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        grandchild.refresh_from_db()
+        self.assertEqual(grandchild.path, f'{other.id}/{child.id}/{grandchild.id}/')
+        self.assertEqual(list(self.category.get_descendants()), [])
+        self.assertEqual(set(other.get_descendants(include_self=True)), {other, child, grandchild})
+        
+        response = self.client.patch(
+            reverse('processcategory-detail', args=[other.id]), {'parent': grandchild.id}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('parent', response.data)
 
 
 class ProcessTemplateTests(TestCase):
@@ -155,3 +270,2066 @@ class ProcessDataTests(TestCase):
         # 验证参数值是否创建
         process_data = ProcessData.objects.first()
         self.assertEqual(ParameterValue.objects.filter(process_data=process_data).count(), 1)
+
+
+class TaskGroupWithTasksTests(TestCase):
+    """测试任务分组树状数据接口"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='staffuser', password='testpassword', is_staff=True
+        )
+        self.client.force_authenticate(user=self.user)
+        
+        self.tool = Tool.objects.create(
+            code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+        )
+        self.material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.0,
+            processing_requirements='无'
+        )
+        self.task_index = 0
+    
+    def _create_group_with_tasks(self, name, task_count=2):
+        group = TaskGroup.objects.create(name=name, created_by=self.user)
+        for _ in range(task_count):
+            self._create_task(group)
+        return group
+    
+    def _create_task(self, group=None):
+        self.task_index += 1
+        return ProcessingTask.objects.create(
+            task_code=f'TASK{self.task_index:04d}',
+            processing_time=timezone.now(),
+            processing_type='drilling',
+            tool=self.tool,
+            composite_material=self.material,
+            operator=self.user,
+            group=group
+        )
+    
+    def _fetch_tree(self):
+        url = reverse('taskgroup-with-tasks')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response, len(ctx.captured_queries)
+    
+    def test_payload_shape(self):
+        """测试返回的数据结构"""
+        group = self._create_group_with_tasks('分组A', task_count=2)
+        self._create_task()
+        
+        response, _ = self._fetch_tree()
+        results = response.data['results']
+        self.assertEqual(response.data['count'], 2)
+        
+        unassigned = results[0]
+        self.assertIsNone(unassigned['id'])
+        self.assertTrue(unassigned['is_default'])
+        self.assertEqual(len(unassigned['tasks']), 1)
+        
+        group_data = results[1]
+        self.assertEqual(group_data['id'], group.id)
+        self.assertEqual(group_data['created_by']['username'], 'staffuser')
+        self.assertEqual(len(group_data['tasks']), 2)
+        task_data = group_data['tasks'][0]
+        self.assertEqual(task_data['tool_info']['code'], 'T001')
+        self.assertEqual(task_data['material_info']['material_type_display'], '碳纤维')
+        self.assertEqual(task_data['operator_info']['username'], 'staffuser')
+    
+    def test_query_count_independent_of_group_count(self):
+        """测试查询次数不随分组数量增长"""
+        self._create_group_with_tasks('分组0')
+        self._create_task()
+        _, baseline_queries = self._fetch_tree()
+        
+        for index in range(1, 20):
+            self._create_group_with_tasks(f'分组{index}')
+        response, queries = self._fetch_tree()
+        
+        self.assertEqual(response.data['count'], 21)
+        self.assertEqual(queries, baseline_queries)
+    
+    def test_group_list_task_counts(self):
+        """测试分组列表返回聚合的任务数量及状态统计"""
+        group = self._create_group_with_tasks('分组A', task_count=3)
+        tasks = list(group.tasks.all())
+        tasks[0].status = 'completed'
+        tasks[0].save()
+        tasks[1].status = 'in_progress'
+        tasks[1].save()
+        deleted_task = self._create_task(group)
+        deleted_task.is_deleted = True
+        deleted_task.save()
+        TaskGroup.objects.create(name='空分组', created_by=self.user)
+        
+        response = self.client.get(reverse('taskgroup-list'))
+        groups = {item['name']: item for item in response.data['results']}
+        self.assertEqual(groups['分组A']['task_count'], 3)
+        self.assertEqual(
+            groups['分组A']['status_counts'],
+            {'planned': 1, 'in_progress': 1, 'completed': 1}
+        )
+        self.assertEqual(groups['空分组']['task_count'], 0)
+        self.assertEqual(
+            groups['空分组']['status_counts'],
+            {'planned': 0, 'in_progress': 0, 'completed': 0}
+        )
+
+
+class QueryBudgetTests(QueryBudgetMixin, TestCase):
+    """测试各列表和详情接口的查询次数上限"""
+    
+    # (路由名称, 查询预算)，预算与返回的行数无关
+    # 未使用响应缓存的接口另含一次条件请求校验值的聚合查询
+    LIST_BUDGETS = [
+        ('processcategory-list', 2),
+        ('processparameter-list', 3),
+        ('processtemplate-list', 5),
+        ('processdata-list', 5),
+        ('processdata-search', 4),
+        ('tool-list', 2),
+        ('compositematerial-list', 2),
+        ('processingtask-list', 4),
+        ('sensordata-list', 3),
+        ('processingquality-list', 3),
+        ('toolwearrecord-list', 3),
+        ('user-list', 2),
+        ('taskgroup-list', 2),
+    ]
+    DETAIL_BUDGETS = [
+        ('processtemplate-detail', 'template', 4),
+        ('processdata-detail', 'process_data', 4),
+        ('processingtask-detail', 'task', 8),
+        ('sensordata-detail', 'sensor_data', 2),
+        ('processingquality-detail', 'quality', 2),
+        ('toolwearrecord-detail', 'wear_record', 2),
+        ('taskgroup-detail', 'group', 1),
+    ]
+    ROW_COUNT = 12
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='admin', password='testpassword', is_staff=True
+        )
+        self.client.force_authenticate(user=self.user)
+        
+        category = ProcessCategory.objects.create(name='分类', code='CAT')
+        parameters = [
+            ProcessParameter.objects.create(
+                name=f'参数{index}', code=f'P{index}', parameter_type='number'
+            )
+            for index in range(3)
+        ]
+        
+        for index in range(self.ROW_COUNT):
+            operator = User.objects.create_user(username=f'operator{index}')
+            template = ProcessTemplate.objects.create(
+                name=f'模板{index}', code=f'TPL{index}', category=category
+            )
+            for order, parameter in enumerate(parameters):
+                TemplateParameter.objects.create(template=template, parameter=parameter, order=order)
+            process_data = ProcessData.objects.create(
+                template=template, code=f'D{index}', name=f'数据{index}',
+                batch_number=f'B{index}', operator=operator
+            )
+            for parameter in parameters:
+                ParameterValue.objects.create(process_data=process_data, parameter=parameter, value='1')
+            
+            tool = Tool.objects.create(
+                code=f'T{index}', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+            )
+            material = CompositeMaterial.objects.create(
+                part_number=f'M{index}', material_type='carbon_fiber', thickness=5.0,
+                processing_requirements='无'
+            )
+            task = ProcessingTask.objects.create(
+                task_code=f'TASK{index}', processing_time=timezone.now(),
+                processing_type='milling', tool=tool, composite_material=material,
+                operator=operator, group=TaskGroup.objects.create(name=f'组{index}')
+            )
+            for param_index in range(3):
+                ProcessingParameter.objects.create(
+                    task=task, parameter_name=f'参数{param_index}', parameter_value='100'
+                )
+            for _ in range(2):
+                sensor_data = SensorData.objects.create(sensor_type='force', processing_task=task)
+                quality = ProcessingQuality.objects.create(
+                    surface_roughness=1.2, dimensional_tolerance=0.1,
+                    inspection_time=timezone.now(), processing_task=task, inspector=operator
+                )
+                wear_record = ToolWearRecord.objects.create(
+                    wear_value=0.1, record_time=timezone.now(), tool=tool, processing_task=task
+                )
+        
+        self.objects = {
+            'template': template,
+            'process_data': process_data,
+            'task': task,
+            'sensor_data': sensor_data,
+            'quality': quality,
+            'wear_record': wear_record,
+            'group': task.group,
+        }
+    
+    def test_list_budgets(self):
+        """测试列表接口的查询次数不随行数增长"""
+        for route_name, budget in self.LIST_BUDGETS:
+            with self.subTest(route=route_name):
+                response = self.assertQueryBudget(reverse(route_name), budget)
+                self.assertTrue(response.data['results'])
+    
+    def test_detail_budgets(self):
+        """测试详情接口的查询次数不随关联数据增长"""
+        for route_name, key, budget in self.DETAIL_BUDGETS:
+            with self.subTest(route=route_name):
+                self.assertQueryBudget(reverse(route_name, args=[self.objects[key].id]), budget)
+    
+    def test_task_detail_includes_related_records(self):
+        """测试加工任务详情返回参数、质量和磨损记录"""
+        task = self.objects['task']
+        response = self.client.get(reverse('processingtask-detail', args=[task.id]))
+        self.assertEqual(len(response.data['parameters']), 3)
+        self.assertEqual(len(response.data['quality_records']), 2)
+        self.assertEqual(len(response.data['tool_wear_records']), 2)
+        self.assertEqual(response.data['tool_wear_records'][0]['tool_code'], task.tool.code)
+
+
+class CursorPaginationTests(TestCase):
+    """测试时间排序接口的游标分页模式"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        
+        tool = Tool.objects.create(
+            code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+        )
+        material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.0,
+            processing_requirements='无'
+        )
+        self.task = ProcessingTask.objects.create(
+            task_code='TASK001', processing_time=timezone.now(), processing_type='drilling',
+            tool=tool, composite_material=material
+        )
+        # 部分记录共享相同的上传时间，验证并列时的翻页稳定性
+        base_time = timezone.now()
+        self.sensor_ids = [
+            SensorData.objects.create(
+                sensor_type='force', processing_task=self.task,
+                upload_time=base_time - timedelta(minutes=index // 2)
+            ).id
+            for index in range(7)
+        ]
+    
+    def test_default_is_page_number(self):
+        """测试默认仍为页码分页"""
+        response = self.client.get(reverse('sensordata-list'))
+        self.assertEqual(response.data['count'], 7)
+    
+    def test_cursor_pages_cover_all_rows(self):
+        """测试游标分页逐页遍历覆盖全部记录且无重复"""
+        response = self.client.get(reverse('sensordata-list'), {'pagination': 'cursor', 'page_size': 3})
+        self.assertNotIn('count', response.data)
+        
+        seen_ids = []
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen_ids.extend(item['id'] for item in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        
+        self.assertEqual(len(seen_ids), len(set(seen_ids)))
+        self.assertEqual(set(seen_ids), set(self.sensor_ids))
+        times = list(
+            SensorData.objects.filter(id__in=seen_ids).order_by('-upload_time', '-id').values_list('id', flat=True)
+        )
+        self.assertEqual(seen_ids, times)
+    
+    def test_cursor_on_task_sub_resource(self):
+        """测试任务子资源按自身排序字段进行游标分页"""
+        url = reverse('processingtask-sensor-data', args=[self.task.id])
+        response = self.client.get(url, {'pagination': 'cursor', 'page_size': 5})
+        self.assertEqual(len(response.data['results']), 5)
+        self.assertIsNotNone(response.data['next'])
+
+
+class SparseFieldsetTests(QueryBudgetMixin, TestCase):
+    """测试 ?fields= / ?expand= 稀疏字段集"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        
+        tool = Tool.objects.create(
+            code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+        )
+        material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.0,
+            processing_requirements='无'
+        )
+        for index in range(3):
+            task = ProcessingTask.objects.create(
+                task_code=f'TASK{index}', processing_time=timezone.now(), processing_type='drilling',
+                tool=tool, composite_material=material, operator=self.user
+            )
+            ProcessingParameter.objects.create(task=task, parameter_name='转速', parameter_value='3000')
+        self.url = reverse('processingtask-list')
+    
+    def test_default_output_unchanged(self):
+        """测试未携带参数时输出完整字段"""
+        response = self.client.get(self.url)
+        row = response.data['results'][0]
+        for name in ('tool_info', 'material_info', 'operator_info', 'parameters', 'group_name'):
+            self.assertIn(name, row)
+    
+    def test_fields_trims_output_and_queries(self):
+        """测试 ?fields= 只输出指定字段且不再查询嵌套对象"""
+        response = self.assertQueryBudget(self.url, 3, {'fields': 'id,status'})
+        self.assertEqual(set(response.data['results'][0]), {'id', 'status'})
+        self.assertEqual(response.data['count'], 3)
+    
+    def test_expand_opts_into_nested_objects(self):
+        """测试 ?expand= 只展开指定的嵌套对象"""
+        response = self.assertQueryBudget(self.url, 4, {'expand': 'parameters'})
+        row = response.data['results'][0]
+        self.assertEqual(len(row['parameters']), 1)
+        self.assertIn('task_code', row)
+        self.assertIn('group_name', row)
+        for name in ('tool_info', 'material_info', 'operator_info'):
+            self.assertNotIn(name, row)
+    
+    def test_fields_with_expand(self):
+        """测试 fields 与 expand 组合使用"""
+        response = self.client.get(self.url, {'fields': 'id', 'expand': 'tool_info'})
+        row = response.data['results'][0]
+        self.assertEqual(set(row), {'id', 'tool_info'})
+        self.assertEqual(row['tool_info']['code'], 'T001')
+
+
+class DashboardSummaryTests(QueryBudgetMixin, TestCase):
+    """测试看板统计接口"""
+    
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        
+        tool = Tool.objects.create(
+            code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+        )
+        material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.0,
+            processing_requirements='无'
+        )
+        # 任务数量超过一页，验证统计不受分页影响
+        statuses = ['planned'] * 30 + ['in_progress'] * 20 + ['completed'] * 15
+        for index, task_status in enumerate(statuses):
+            ProcessingTask.objects.create(
+                task_code=f'TASK{index:03d}', processing_time=timezone.now(), processing_type='drilling',
+                tool=tool, composite_material=material, status=task_status
+            )
+        deleted = ProcessingTask.objects.get(task_code='TASK000')
+        deleted.is_deleted = True
+        deleted.save()
+        self.latest_task = ProcessingTask.objects.get(task_code='TASK064')
+        self.latest_task.notes = '最近更新'
+        self.latest_task.save()
+        
+        for file_size in (1024, 2048):
+            SensorData.objects.create(
+                sensor_type='force', processing_task=self.latest_task, file_size=file_size
+            )
+        self.url = reverse('dashboard_summary')
+    
+    def test_summary_counts(self):
+        """测试统计数据覆盖全部记录而非第一页"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['task_count'], 64)
+        self.assertEqual(response.data['status_counts']['planned'], 29)
+        self.assertEqual(response.data['status_counts']['in_progress'], 20)
+        self.assertEqual(response.data['status_counts']['completed'], 15)
+        self.assertEqual(response.data['status_counts']['aborted'], 0)
+        self.assertEqual(response.data['pending_count'], 49)
+        self.assertEqual(response.data['sensor_data'], {'count': 2, 'total_size': 3072})
+        
+        activities = response.data['recent_activities']
+        self.assertEqual(len(activities), 5)
+        self.assertEqual(activities[0]['task_code'], 'TASK064')
+        self.assertEqual(activities[0]['status_display'], '已完成')
+    
+    def test_summary_is_cached(self):
+        """测试缓存命中时不访问数据库"""
+        self.assertQueryBudget(self.url, 5)
+        self.assertQueryBudget(self.url, 0)
+    
+    def test_user_count_only_for_staff(self):
+        """测试用户数只返回给管理员，普通用户的缓存不会带出用户数"""
+        response = self.client.get(self.url)
+        self.assertNotIn('user_count', response.data)
+        
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['user_count'], 1)
+        self.assertEqual(response.data['task_count'], 64)
+        
+        self.user.is_staff = False
+        self.user.save()
+        self.assertNotIn('user_count', self.client.get(self.url).data)
+
+
+class BulkCreateTests(TestCase):
+    """测试批量创建接口"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        
+        self.tool = Tool.objects.create(
+            code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+        )
+        self.material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.0,
+            processing_requirements='无'
+        )
+        self.task = ProcessingTask.objects.create(
+            task_code='TASK-EXIST', processing_time=timezone.now(), processing_type='drilling',
+            tool=self.tool, composite_material=self.material
+        )
+    
+    def task_item(self, task_code, **extra):
+        item = {
+            'task_code': task_code,
+            'processing_time': timezone.now().isoformat(),
+            'processing_type': 'drilling',
+            'tool': self.tool.id,
+            'composite_material': self.material.id,
+            'parameters': [{'parameter_name': '转速', 'parameter_value': '3000', 'unit': 'rpm'}],
+        }
+        item.update(extra)
+        return item
+    
+    def test_bulk_create_tasks(self):
+        """测试批量创建任务及其参数，查询次数与条数无关"""
+        items = [self.task_item(f'BULK{index:03d}') for index in range(50)]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(reverse('processingtask-bulk-create'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['count'], 50)
+        self.assertEqual(len(response.data['ids']), 50)
+        self.assertLess(len(ctx.captured_queries), 15)
+        self.assertEqual(ProcessingParameter.objects.filter(task__task_code__startswith='BULK').count(), 50)
+    
+    def test_bulk_create_reports_errors_per_item(self):
+        """测试任一项校验失败时整批不写入，并按顺序返回每一项的错误"""
+        items = [
+            self.task_item('BULK001'),
+            self.task_item('TASK-EXIST'),
+            self.task_item('BULK001'),
+            self.task_item('BULK002', tool=99999),
+        ]
+        response = self.client.post(reverse('processingtask-bulk-create'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['errors']
+        self.assertEqual(len(errors), 4)
+        self.assertEqual(errors[0], {})
+        self.assertIn('task_code', errors[1])
+        self.assertIn('task_code', errors[2])
+        self.assertIn('tool', errors[3])
+        self.assertFalse(ProcessingTask.objects.filter(task_code__startswith='BULK').exists())
+    
+    def test_bulk_upsert_tasks(self):
+        """测试 upsert 按 task_code 更新已有任务并替换参数"""
+        items = [
+            self.task_item('TASK-EXIST', status='completed'),
+            self.task_item('BULK001'),
+        ]
+        url = reverse('processingtask-bulk-create') + '?upsert=true'
+        response = self.client.post(url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIn(self.task.id, response.data['ids'])
+        self.task.refresh_from_db()
+        self.assertEqual(self.task.status, 'completed')
+        self.assertEqual(self.task.parameters.count(), 1)
+        self.assertEqual(ProcessingTask.objects.count(), 2)
+    
+    def test_bulk_upsert_keeps_fields_not_submitted(self):
+        """测试 upsert 只更新每项提交的字段，其他项提交的可选字段不覆盖该项的原值；软删除的记录被恢复"""
+        ProcessingTask.objects.filter(pk=self.task.pk).update(notes='keep', status='completed', duration=30)
+        deleted = ProcessingTask.objects.create(
+            task_code='TASK-DELETED', processing_time=timezone.now(), processing_type='drilling',
+            tool=self.tool, composite_material=self.material, is_deleted=True
+        )
+        items = [
+            self.task_item('TASK-EXIST'),
+            self.task_item('TASK-DELETED', notes='新备注', status='in_progress', duration=10),
+        ]
+        url = reverse('processingtask-bulk-create') + '?upsert=true'
+        response = self.client.post(url, items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.task.refresh_from_db()
+        self.assertEqual((self.task.notes, self.task.status, self.task.duration), ('keep', 'completed', 30))
+        deleted.refresh_from_db()
+        self.assertFalse(deleted.is_deleted)
+        self.assertEqual((deleted.notes, deleted.status, deleted.duration), ('新备注', 'in_progress', 10))
+        self.assertEqual(set(response.data['ids']), {self.task.id, deleted.id})
+    
+    def test_bulk_create_sensor_data_and_wear_records(self):
+        """测试批量创建传感器数据与磨损记录"""
+        sensor_items = [
+            {'sensor_type': 'force', 'processing_task': self.task.id, 'file_size': 100 * index}
+            for index in range(10)
+        ]
+        response = self.client.post(reverse('sensordata-bulk-create'), sensor_items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(SensorData.objects.filter(processing_task=self.task).count(), 10)
+        
+        wear_items = [
+            {'wear_value': 0.01 * index, 'record_time': timezone.now().isoformat(),
+             'tool': self.tool.id, 'processing_task': self.task.id}
+            for index in range(10)
+        ]
+        response = self.client.post(reverse('toolwearrecord-bulk-create'), wear_items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.tool.wear_records.count(), 10)
+        
+        response = self.client.post(reverse('toolwearrecord-bulk-create'), {'wear_value': 1}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class TaskParameterSyncTests(TestCase):
+    """测试更新任务时按参数名称差量同步加工参数"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        
+        tool = Tool.objects.create(
+            code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+        )
+        material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.0,
+            processing_requirements='无'
+        )
+        self.task = ProcessingTask.objects.create(
+            task_code='TASK001', processing_time=timezone.now(), processing_type='drilling',
+            tool=tool, composite_material=material
+        )
+        self.parameters = [
+            ProcessingParameter.objects.create(
+                task=self.task, parameter_name=f'参数{index}', parameter_value=str(index), unit='mm'
+            )
+            for index in range(20)
+        ]
+        self.payload = {
+            'task_code': 'TASK001',
+            'processing_time': self.task.processing_time.isoformat(),
+            'processing_type': 'drilling',
+            'tool': tool.id,
+            'composite_material': material.id,
+        }
+        self.url = reverse('processingtask-detail', args=[self.task.id])
+    
+    def test_only_changed_rows_are_written(self):
+        """测试未变化的参数保留原记录，变化的更新、新增的创建、缺少的删除"""
+        parameters = [
+            {'parameter_name': p.parameter_name, 'parameter_value': p.parameter_value, 'unit': p.unit}
+            for p in self.parameters[1:]
+        ]
+        parameters[0]['parameter_value'] = '100'
+        parameters.append({'parameter_name': '新参数', 'parameter_value': '1', 'unit': 'rpm'})
+        
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.put(self.url, {**self.payload, 'parameters': parameters}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertLess(len(ctx.captured_queries), 15)
+        
+        current = {p.parameter_name: p for p in self.task.parameters.all()}
+        self.assertEqual(len(current), 20)
+        self.assertNotIn('参数0', current)
+        self.assertEqual(current['参数1'].parameter_value, '100')
+        self.assertEqual(current['参数1'].id, self.parameters[1].id)
+        self.assertEqual(current['参数5'].created_at, self.parameters[5].created_at)
+        self.assertEqual(current['新参数'].unit, 'rpm')
+    
+    def test_parameters_untouched_when_omitted(self):
+        """测试未提交参数时不修改已有参数"""
+        response = self.client.patch(self.url, {'notes': '备注'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.task.parameters.count(), 20)
+
+
+class BatchCloneTests(TestCase):
+    """测试批量复制加工任务"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        
+        tool = Tool.objects.create(
+            code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+        )
+        material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.0,
+            processing_requirements='无'
+        )
+        self.source_group = TaskGroup.objects.create(name='源分组', created_by=self.user)
+        self.target_group = TaskGroup.objects.create(name='目标分组', created_by=self.user)
+        self.tasks = []
+        for index in range(30):
+            task = ProcessingTask.objects.create(
+                task_code=f'TASK{index:03d}', processing_time=timezone.now(), processing_type='drilling',
+                tool=tool, composite_material=material, status='completed', group=self.source_group
+            )
+            for param_index in range(3):
+                ProcessingParameter.objects.create(
+                    task=task, parameter_name=f'参数{param_index}', parameter_value=str(index)
+                )
+            self.tasks.append(task)
+        self.url = reverse('processingtask-batch-clone')
+    
+    def test_clone_group_into_target_group(self):
+        """测试复制整个分组，查询次数与任务数无关"""
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, {
+                'source_group': self.source_group.id, 'target_group': self.target_group.id
+            }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['count'], 30)
+        self.assertLess(len(ctx.captured_queries), 15)
+        
+        clones = ProcessingTask.objects.filter(group=self.target_group)
+        self.assertEqual(clones.count(), 30)
+        self.assertFalse(clones.exclude(status='planned').exists())
+        self.assertEqual(ProcessingParameter.objects.filter(task__group=self.target_group).count(), 90)
+        self.assertEqual(ProcessingTask.objects.filter(group=self.source_group).count(), 30)
+        
+        clone = ProcessingTask.objects.get(id=response.data['id_map'][str(self.tasks[5].id)])
+        self.assertTrue(clone.task_code.startswith('TASK005-Copy-'))
+        self.assertEqual(set(clone.parameters.values_list('parameter_value', flat=True)), {'5'})
+    
+    def test_clone_task_ids_twice_and_ungrouped(self):
+        """测试按ID复制到未分组，重复复制时编码不冲突"""
+        payload = {'task_ids': [self.tasks[1].id, self.tasks[0].id], 'target_group': None}
+        first = self.client.post(self.url, payload, format='json')
+        second = self.client.post(self.url, payload, format='json')
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        codes = ProcessingTask.objects.filter(group__isnull=True).values_list('task_code', flat=True)
+        self.assertEqual(len(set(codes)), 4)
+        self.assertTrue(ProcessingTask.objects.get(id=first.data['ids'][0]).task_code.startswith('TASK001'))
+    
+    def test_duplicate_task_ids_and_string_group(self):
+        """测试重复的任务ID只复制一次且副本带全部参数，目标分组ID可以是字符串"""
+        response = self.client.post(self.url, {
+            'task_ids': [self.tasks[0].id, self.tasks[0].id], 'target_group': str(self.target_group.id)
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['count'], 1)
+        clone = ProcessingTask.objects.get(group=self.target_group)
+        self.assertEqual(clone.parameters.count(), 3)
+    
+    def test_invalid_requests(self):
+        """测试参数错误"""
+        response = self.client.post(self.url, {'task_ids': [99999]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        other = User.objects.create_user(username='other', password='testpassword')
+        foreign_group = TaskGroup.objects.create(name='他人分组', created_by=other)
+        response = self.client.post(self.url, {
+            'task_ids': [self.tasks[0].id], 'target_group': foreign_group.id
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_single_clone_keeps_original(self):
+        """测试单个克隆不修改原任务"""
+        response = self.client.post(reverse('processingtask-clone', args=[self.tasks[0].id]))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.tasks[0].refresh_from_db()
+        self.assertEqual(self.tasks[0].task_code, 'TASK000')
+        self.assertEqual(self.tasks[0].parameters.count(), 3)
+        self.assertEqual(response.data['task_code'], 'TASK000 (复制)')
+        self.assertEqual(len(response.data['parameters']), 3)
+
+
+class ResponseCacheTests(QueryBudgetMixin, TestCase):
+    """测试参考数据列表接口的响应缓存及信号失效"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.tool = Tool.objects.create(
+            code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+        )
+        self.group = TaskGroup.objects.create(name='分组', created_by=self.user)
+        material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.0,
+            processing_requirements='无'
+        )
+        self.task = ProcessingTask.objects.create(
+            task_code='TASK001', processing_time=timezone.now(), processing_type='drilling',
+            tool=self.tool, composite_material=material, group=self.group
+        )
+    
+    def test_warm_read_skips_database(self):
+        """测试缓存命中时不访问数据库，查询参数不同则分别缓存"""
+        url = reverse('tool-list')
+        self.assertQueryBudget(url, 5)
+        self.assertQueryBudget(url, 0)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(url, {'search': 'T001'})
+        self.assertGreater(len(ctx.captured_queries), 0)
+    
+    def test_save_and_delete_invalidate(self):
+        """测试模型保存与删除后缓存立即失效"""
+        url = reverse('tool-list')
+        self.assertEqual(self.client.get(url).data['count'], 1)
+        Tool.objects.create(code='T002', tool_type='铣刀', tool_spec='D8', initial_wear_threshold=0.3)
+        self.assertEqual(self.client.get(url).data['count'], 2)
+        Tool.objects.get(code='T002').delete()
+        self.assertEqual(self.client.get(url).data['count'], 1)
+    
+    def test_dependent_model_invalidates_task_groups(self):
+        """测试任务变更（包括批量复制）使任务组列表的统计缓存失效"""
+        url = reverse('taskgroup-list')
+        self.assertEqual(self.client.get(url).data['results'][0]['status_counts']['planned'], 1)
+        self.task.status = 'completed'
+        self.task.save()
+        counts = self.client.get(url).data['results'][0]['status_counts']
+        self.assertEqual((counts['planned'], counts['completed']), (0, 1))
+        
+        self.client.post(reverse('processingtask-batch-clone'), {'task_ids': [self.task.id]}, format='json')
+        self.assertEqual(self.client.get(url).data['results'][0]['task_count'], 2)
+    
+    def test_cache_is_per_user(self):
+        """测试不同用户的缓存互不共享"""
+        url = reverse('taskgroup-list')
+        self.assertEqual(self.client.get(url).data['count'], 1)
+        other = User.objects.create_user(username='other', password='testpassword')
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(url).data['count'], 0)
+
+
+class ConditionalGetTests(QueryBudgetMixin, TestCase):
+    """测试 ETag/Last-Modified 条件请求"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.tool = Tool.objects.create(
+            code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+        )
+        material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.0,
+            processing_requirements='无'
+        )
+        self.tasks = [
+            ProcessingTask.objects.create(
+                task_code=f'TASK{index:03d}', processing_time=timezone.now(), processing_type='drilling',
+                tool=self.tool, composite_material=material
+            )
+            for index in range(3)
+        ]
+        self.list_url = reverse('processingtask-list')
+    
+    def get_with_etag(self, url, etag, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        return response, len(ctx.captured_queries)
+    
+    def test_not_modified_without_serializing(self):
+        """测试 If-None-Match 命中时返回 304，只执行一次聚合查询"""
+        response = self.client.get(self.list_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        
+        response, query_count = self.get_with_etag(self.list_url, etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(query_count, 1)
+        
+        detail_url = reverse('processingtask-detail', args=[self.tasks[0].id])
+        detail_etag = self.client.get(detail_url)['ETag']
+        self.assertNotEqual(detail_etag, etag)
+        response, _ = self.get_with_etag(detail_url, detail_etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+    
+    def test_etag_changes_with_data_and_params(self):
+        """测试数据、关联数据或查询参数变化时 ETag 随之变化"""
+        etag = self.client.get(self.list_url)['ETag']
+        self.assertNotEqual(self.client.get(self.list_url, {'status': 'planned'})['ETag'], etag)
+        
+        self.tasks[1].status = 'completed'
+        self.tasks[1].save()
+        response, _ = self.get_with_etag(self.list_url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        
+        self.tool.code = 'T001-B'
+        self.tool.save()
+        response, _ = self.get_with_etag(self.list_url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        etag = response['ETag']
+        ProcessingTask.objects.filter(id=self.tasks[2].id).delete()
+        response, _ = self.get_with_etag(self.list_url, etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+    
+    def test_cached_reference_data_not_modified(self):
+        """测试使用响应缓存的接口按版本号校验，304 不访问数据库"""
+        url = reverse('tool-list')
+        etag = self.client.get(url)['ETag']
+        response, query_count = self.get_with_etag(url, etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(query_count, 0)
+    
+    def test_missing_object_is_not_found(self):
+        """测试对象不存在时仍返回 404"""
+        response = self.client.get(reverse('processingtask-detail', args=[99999]), HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ChangeFeedTests(TestCase):
+    """测试增量变更接口"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        self.tools = [
+            Tool.objects.create(
+                code=f'T{index:03d}', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+            )
+            for index in range(5)
+        ]
+        self.url = reverse('tool-changes')
+    
+    def backdate(self, seconds):
+        """把已有记录的修改时间回退，模拟较早的同步"""
+        Tool.objects.update(updated_at=timezone.now() - timedelta(seconds=seconds))
+    
+    def test_initial_load_and_watermark(self):
+        """测试首次请求返回全部未删除记录，水位比当前时间回退安全间隔"""
+        self.tools[0].is_deleted = True
+        self.tools[0].save()
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['changed']), 4)
+        self.assertEqual(response.data['deleted'], [])
+        self.assertFalse(response.data['has_more'])
+        self.assertLess(
+            datetime.fromisoformat(response.data['watermark']),
+            timezone.now() - timedelta(seconds=4)
+        )
+    
+    def test_changes_since_watermark(self):
+        """测试只返回水位之后新增、修改和软删除的记录"""
+        self.backdate(60)
+        since = (timezone.now() - timedelta(seconds=30)).isoformat()
+        
+        self.tools[1].tool_spec = 'D8'
+        self.tools[1].save()
+        self.client.delete(reverse('tool-detail', args=[self.tools[2].id]))
+        new_tool = Tool.objects.create(
+            code='T100', tool_type='铣刀', tool_spec='D10', initial_wear_threshold=0.3
+        )
+        
+        response = self.client.get(self.url, {'updated_since': since})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        changed = {row['id']: row for row in response.data['changed']}
+        self.assertEqual(set(changed), {self.tools[1].id, new_tool.id})
+        self.assertEqual(changed[self.tools[1].id]['tool_spec'], 'D8')
+        self.assertEqual(response.data['deleted'], [self.tools[2].id])
+    
+    def test_has_more_pages_through_changes(self):
+        """测试超过 limit 时分批返回，按水位继续请求可取完全部变更"""
+        seen = set()
+        params = {'limit': 2}
+        for _ in range(5):
+            response = self.client.get(self.url, params)
+            seen.update(row['id'] for row in response.data['changed'])
+            if not response.data['has_more']:
+                break
+            params.update(updated_since=response.data['watermark'], after_id=response.data['after_id'])
+        self.assertEqual(seen, {tool.id for tool in self.tools})
+    
+    def test_same_updated_at_pages_by_id(self):
+        """测试同一修改时间的记录超过 limit 条时按ID继续分批，不会原地循环"""
+        self.backdate(60)
+        since = Tool.objects.first().updated_at.isoformat()
+        seen = []
+        params = {'limit': 2, 'updated_since': since}
+        for _ in range(5):
+            response = self.client.get(self.url, params)
+            seen.extend(row['id'] for row in response.data['changed'])
+            if not response.data['has_more']:
+                break
+            params.update(updated_since=response.data['watermark'], after_id=response.data['after_id'])
+        self.assertEqual(seen, sorted(tool.id for tool in self.tools))
+        self.assertFalse(response.data['has_more'])
+    
+    def test_task_changes_use_list_representation(self):
+        """测试加工任务的变更与列表接口的行格式一致，并支持 expand"""
+        material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.0,
+            processing_requirements='无'
+        )
+        ProcessingTask.objects.create(
+            task_code='TASK001', processing_time=timezone.now(), processing_type='drilling',
+            tool=self.tools[0], composite_material=material
+        )
+        list_row = self.client.get(reverse('processingtask-list'), {'expand': 'parameters'}).data['results'][0]
+        response = self.client.get(reverse('processingtask-changes'), {'expand': 'parameters'})
+        self.assertEqual(response.data['changed'][0], list_row)
+    
+    def test_cursor_only(self):
+        """测试 updated_since=now 只返回当前游标，之后的修改从该游标增量返回"""
+        response = self.client.get(self.url, {'updated_since': 'now'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['changed'], [])
+        self.assertIsNone(response.data['after_id'])
+        self.assertFalse(response.data['has_more'])
+        
+        self.backdate(60)
+        self.tools[1].tool_spec = 'D8'
+        self.tools[1].save()
+        response = self.client.get(self.url, {'updated_since': response.data['watermark']})
+        self.assertEqual([row['id'] for row in response.data['changed']], [self.tools[1].id])
+    
+    def test_invalid_watermark(self):
+        """测试水位格式错误"""
+        response = self.client.get(self.url, {'updated_since': 'yesterday'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_invalid_limit(self):
+        """测试 limit 不是正整数时返回 400"""
+        for limit in ('0', '-3', 'abc'):
+            response = self.client.get(self.url, {'limit': limit})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, limit)
+
+
+class BatchRequestTests(TestCase):
+    """测试批量请求接口"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        # 检索索引在事务提交后写入
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tool = Tool.objects.create(
+                code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+            )
+            CompositeMaterial.objects.create(
+                part_number='P001', material_type='carbon_fiber', thickness=5.0,
+                processing_requirements='无'
+            )
+        self.url = reverse('api_batch')
+    
+    def test_sub_responses_match_direct_requests(self):
+        """测试子请求的结果与直接请求一致并按顺序返回"""
+        response = self.client.post(self.url, [
+            {'path': 'tools/'},
+            {'path': '/api/composite-materials/', 'params': {'search': 'P001'}},
+            {'path': f'tools/{self.tool.id}/'},
+            {'path': 'dashboard/summary/'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data
+        self.assertEqual([item['status'] for item in results], [200, 200, 200, 200])
+        self.assertEqual(results[0]['body'], self.client.get(reverse('tool-list')).data)
+        self.assertEqual(results[1]['body']['count'], 1)
+        self.assertEqual(results[2]['body']['code'], 'T001')
+        self.assertEqual(results[3]['body']['task_count'], 0)
+        self.assertIn('ETag', results[0]['headers'])
+    
+    def test_conditional_sub_request(self):
+        """测试子请求转发 If-None-Match"""
+        etag = self.client.get(reverse('tool-list'))['ETag']
+        response = self.client.post(self.url, [
+            {'path': 'tools/', 'headers': {'If-None-Match': etag}},
+        ], format='json')
+        self.assertEqual(response.data[0]['status'], 304)
+        self.assertIsNone(response.data[0]['body'])
+    
+    def test_sub_request_errors(self):
+        """测试子请求错误分别返回，不影响其他子请求"""
+        response = self.client.post(self.url, [
+            {'path': 'no-such-route/'},
+            {'path': 'tools/', 'method': 'DELETE'},
+            {'path': 'batch/'},
+            {'path': 'tools/99999/'},
+            {'path': 'users/'},
+            {'path': 'tools/'},
+        ], format='json')
+        self.assertEqual([item['status'] for item in response.data], [404, 405, 400, 404, 403, 200])
+    
+    def test_streaming_sub_request(self):
+        """测试返回流式响应的子请求（导出）单独返回 400，不影响其他子请求"""
+        response = self.client.post(self.url, [
+            {'path': 'processing-tasks/export/', 'params': {'export_format': 'csv'}},
+            {'path': 'tools/'},
+        ], format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['status'] for item in response.data], [400, 200])
+        self.assertIn('error', response.data[0]['body'])
+    
+    def test_requires_authentication(self):
+        """测试未登录时拒绝批量请求"""
+        self.client.force_authenticate(user=None)
+        response = self.client.post(self.url, [{'path': 'tools/'}], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+
+class FastListTests(TestCase):
+    """测试列表接口的 .values() 快速序列化与 ModelSerializer 输出一致"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            username='inspector', password='testpassword', first_name='张', last_name='三'
+        )
+        self.client.force_authenticate(user=self.user)
+        operator = User.objects.create_user(username='operator')
+        tool = Tool.objects.create(
+            code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+        )
+        material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.5,
+            processing_requirements='无'
+        )
+        group = TaskGroup.objects.create(name='分组A', created_by=self.user)
+        now = timezone.now()
+        for index in range(6):
+            task = ProcessingTask.objects.create(
+                task_code=f'TASK{index:03d}', processing_time=now - timedelta(hours=index),
+                processing_type=['drilling', 'milling', 'cutting'][index % 3],
+                status=['planned', 'completed'][index % 2], duration=index or None,
+                tool=tool, composite_material=material,
+                operator=[operator, self.user, None][index % 3],
+                group=group if index % 2 else None, notes='备注' if index % 2 else None,
+            )
+            for parameter_index in range(index % 3):
+                ProcessingParameter.objects.create(
+                    task=task, parameter_name=f'参数{parameter_index}', parameter_value=str(parameter_index),
+                    unit='rpm' if parameter_index else None
+                )
+            SensorData.objects.create(
+                sensor_type=['force', 'vibration'][index % 2], processing_task=task,
+                file_size=[0, 1024, 5 * 1024 * 1024][index % 3], sensor_id=f'S{index}'
+            )
+            ProcessingQuality.objects.create(
+                surface_roughness=1.6, dimensional_tolerance=0.05, defect_type='none',
+                inspection_time=now - timedelta(minutes=index), processing_task=task,
+                inspector=self.user if index % 2 else None
+            )
+            ToolWearRecord.objects.create(
+                wear_value=0.1 * index, record_time=now - timedelta(minutes=index),
+                tool=tool, processing_task=task, position='刃口' if index % 2 else None
+            )
+        # 选项之外的历史值按原样输出
+        ProcessingTask.objects.filter(task_code='TASK005').update(status='legacy')
+    
+    def assertSameOutput(self, url, params=None):
+        with override_settings(FAST_LIST_SERIALIZATION=False):
+            expected = self.client.get(url, params)
+        with override_settings(FAST_LIST_SERIALIZATION=True):
+            actual = self.client.get(url, params)
+        self.assertEqual(actual.status_code, expected.status_code)
+        self.assertEqual(actual.content, expected.content)
+        return actual
+    
+    def test_output_matches_model_serializers(self):
+        """测试四个列表接口在各种参数下的输出与 ModelSerializer 逐字节一致"""
+        cases = {
+            'processingtask-list': [
+                None, {'fields': 'id,status,group_name'}, {'expand': 'parameters,operator_info'},
+                {'fields': 'id', 'expand': 'tool_info'}, {'status': 'completed'}, {'ordering': 'status'},
+            ],
+            'sensordata-list': [None, {'fields': 'id,task_info,file_size_mb'}, {'sensor_type': 'force'}],
+            'processingquality-list': [None, {'expand': 'inspector_info'}, {'fields': 'inspector_name'}],
+            'toolwearrecord-list': [None, {'ordering': 'wear_value'}, {'fields': 'tool_code,position'}],
+        }
+        for route, param_sets in cases.items():
+            for params in param_sets:
+                with self.subTest(route=route, params=params):
+                    self.assertSameOutput(reverse(route), params)
+    
+    def test_cursor_pagination(self):
+        """测试游标分页逐页输出一致"""
+        url = reverse('processingtask-list')
+        params = {'pagination': 'cursor', 'page_size': 2}
+        pages = 0
+        while url:
+            response = self.assertSameOutput(url, params)
+            url, params = response.data['next'], None
+            pages += 1
+        self.assertEqual(pages, 3)
+    
+    def test_bypasses_model_serializer(self):
+        """测试快速序列化不经过 ModelSerializer"""
+        from .serializers import ProcessingTaskListSerializer
+        with unittest.mock.patch.object(
+            ProcessingTaskListSerializer, 'to_representation', side_effect=AssertionError
+        ):
+            response = self.client.get(reverse('processingtask-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 6)
+
+
+class TypedParameterValueTests(TestCase):
+    """测试参数值的类型化影子列与按参数值范围过滤"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        category = ProcessCategory.objects.create(name='分类', code='CAT')
+        template = ProcessTemplate.objects.create(name='模板', code='TPL', category=category)
+        self.speed = ProcessParameter.objects.create(name='主轴转速', code='SPEED', parameter_type='number')
+        self.coolant = ProcessParameter.objects.create(name='冷却', code='COOLANT', parameter_type='boolean')
+        self.calibrated = ProcessParameter.objects.create(name='校准日期', code='CAL', parameter_type='date')
+        self.note = ProcessParameter.objects.create(name='备注', code='NOTE', parameter_type='text')
+        
+        rows = [('6000', 'true', '2024-01-05'), ('8000', '否', '2024-02-10'),
+                ('10000.5', '1', '2024-03-15T08:00:00'), ('12000', 'false', 'bad'), ('abc', '', '2024-05-01')]
+        values = []
+        for index, (speed, coolant, calibrated) in enumerate(rows):
+            process_data = ProcessData.objects.create(
+                template=template, code=f'D{index}', name=f'数据{index}', batch_number=f'B{index}'
+            )
+            # 一部分逐条保存，一部分批量写入，两条写入路径都会填充影子列
+            ParameterValue.objects.create(process_data=process_data, parameter=self.speed, value=speed)
+            values += [
+                ParameterValue(process_data=process_data, parameter_id=self.coolant.id, value=coolant),
+                ParameterValue(process_data=process_data, parameter_id=self.calibrated.id, value=calibrated),
+                ParameterValue(process_data=process_data, parameter_id=self.note.id, value=f'备注{index}'),
+            ]
+        ParameterValue.objects.bulk_create(values)
+        self.url = reverse('processdata-list')
+    
+    def codes(self, params, url=None, key='code'):
+        response = self.client.get(url or self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        return sorted(row[key] for row in response.data['results'])
+    
+    def test_typed_columns_populated(self):
+        """测试按参数类型解析影子列，无法解析的值为空"""
+        typed = {
+            (value.process_data.code, value.parameter.code): (value.value_number, value.value_boolean, value.value_date)
+            for value in ParameterValue.objects.select_related('process_data', 'parameter')
+        }
+        self.assertEqual(typed[('D2', 'SPEED')], (10000.5, None, None))
+        self.assertEqual(typed[('D4', 'SPEED')], (None, None, None))
+        self.assertEqual(typed[('D1', 'COOLANT')], (None, False, None))
+        self.assertEqual(typed[('D2', 'CAL')], (None, None, datetime(2024, 3, 15).date()))
+        self.assertEqual(typed[('D3', 'CAL')], (None, None, None))
+        self.assertEqual(typed[('D0', 'NOTE')], (None, None, None))
+    
+    def test_range_filters(self):
+        """测试数值和日期范围过滤、布尔和文本精确匹配"""
+        self.assertEqual(self.codes({'parameter': 'SPEED', 'parameter_min': 8000, 'parameter_max': 12000}),
+                         ['D1', 'D2', 'D3'])
+        self.assertEqual(self.codes({'parameter': 'SPEED', 'parameter_max': '7000'}), ['D0'])
+        self.assertEqual(self.codes({'parameter': 'CAL', 'parameter_min': '2024-02-01'}), ['D1', 'D2', 'D4'])
+        self.assertEqual(self.codes({'parameter': 'COOLANT', 'parameter_value': '是'}), ['D0', 'D2'])
+        self.assertEqual(self.codes({'parameter': 'NOTE', 'parameter_value': '备注3'}), ['D3'])
+        self.assertEqual(len(self.codes({'parameter': 'NOTE'})), 5)
+    
+    def test_invalid_filters(self):
+        """测试未知参数、不支持范围过滤的类型和无法解析的边界返回 400"""
+        for params in ({'parameter': 'MISSING'},
+                       {'parameter': 'NOTE', 'parameter_min': '1'},
+                       {'parameter': 'SPEED', 'parameter_min': 'abc'}):
+            with self.subTest(params=params):
+                response = self.client.get(self.url, params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_parameter_type_change_reparses_values(self):
+        """测试修改参数类型后按新类型重新解析已有参数值"""
+        self.note.parameter_type = 'number'
+        self.note.save()
+        self.assertFalse(ParameterValue.objects.filter(parameter=self.note, value_number__isnull=False).exists())
+        self.speed.parameter_type = 'text'
+        self.speed.save()
+        self.assertFalse(ParameterValue.objects.filter(parameter=self.speed, value_number__isnull=False).exists())
+    
+    def test_backfill_command(self):
+        """测试回填命令分块重新计算影子列"""
+        ParameterValue.objects.filter(parameter=self.speed).update(value='9000', value_number=None)
+        call_command('backfill_typed_values', '--chunk-size', '3', '--model', 'parameter-values', stdout=io.StringIO())
+        self.assertEqual(
+            list(ParameterValue.objects.filter(parameter=self.speed).values_list('value_number', flat=True)),
+            [9000.0] * 5
+        )
+    
+    def test_processing_task_parameter_filter(self):
+        """测试按加工参数名称和推断类型过滤加工任务"""
+        tool = Tool.objects.create(code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3)
+        material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.0, processing_requirements='无'
+        )
+        tasks = [
+            {'task_code': f'TASK{index}', 'processing_time': timezone.now().isoformat(),
+             'processing_type': 'drilling', 'tool': tool.id, 'composite_material': material.id,
+             'parameters': [{'parameter_name': '转速', 'parameter_value': speed},
+                            {'parameter_name': '冷却', 'parameter_value': coolant}]}
+            for index, (speed, coolant) in enumerate([('6000', 'true'), ('9000', 'false'), ('11000', 'true')])
+        ]
+        response = self.client.post(reverse('processingtask-bulk-create'), tasks, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        url = reverse('processingtask-list')
+        self.assertEqual(
+            self.codes({'parameter': '转速', 'parameter_min': '8000', 'parameter_max': '12000'}, url, 'task_code'),
+            ['TASK1', 'TASK2']
+        )
+        self.assertEqual(self.codes({'parameter': '冷却', 'parameter_value': 'true'}, url, 'task_code'),
+                         ['TASK0', 'TASK2'])
+        # 参数修改通过 bulk_update 写入，影子列同步更新
+        task = ProcessingTask.objects.get(task_code='TASK0')
+        response = self.client.patch(reverse('processingtask-detail', args=[task.id]), {
+            'parameters': [{'parameter_name': '转速', 'parameter_value': '10000'}]
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.codes({'parameter': '转速', 'parameter_min': '8000'}, url, 'task_code'),
+            ['TASK0', 'TASK1', 'TASK2']
+        )
+
+
+class ProcessDataPivotTests(QueryBudgetMixin, TestCase):
+    """测试工艺数据宽表的增量刷新与分页接口"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        category = ProcessCategory.objects.create(name='分类', code='CAT')
+        self.template = ProcessTemplate.objects.create(name='模板', code='TPL', category=category)
+        self.speed = ProcessParameter.objects.create(name='转速', code='SPEED', parameter_type='number', unit='rpm')
+        self.coolant = ProcessParameter.objects.create(name='冷却', code='COOLANT', parameter_type='boolean')
+        self.note = ProcessParameter.objects.create(name='备注', code='NOTE', parameter_type='text')
+        for order, parameter in enumerate([self.note, self.speed, self.coolant]):
+            TemplateParameter.objects.create(template=self.template, parameter=parameter, order=order)
+        self.url = reverse('processtemplate-pivot', args=[self.template.id])
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.data = [
+                ProcessData.objects.create(
+                    template=self.template, code=f'D{index}', name=f'数据{index}', batch_number=f'B{index}'
+                )
+                for index in range(4)
+            ]
+            ParameterValue.objects.create(process_data=self.data[0], parameter=self.speed, value='8000')
+            ParameterValue.objects.bulk_create([
+                ParameterValue(process_data=process_data, parameter=parameter, value=value)
+                for process_data in self.data[1:]
+                for parameter, value in ((self.speed, '9000.5'), (self.coolant, 'true'), (self.note, '正常'))
+            ])
+    
+    def get_rows(self, params=None):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+    
+    def test_pivot_rows_and_columns(self):
+        """测试每条工艺数据一行、每个模板参数一列，数值和布尔参数按类型输出"""
+        data = self.get_rows()
+        self.assertEqual(data['columns'], ['id', 'code', 'name', 'batch_number', 'created_at', 'NOTE', 'SPEED', 'COOLANT'])
+        self.assertEqual([row[1] for row in data['rows']], ['D0', 'D1', 'D2', 'D3'])
+        self.assertEqual(data['rows'][0][5:], [None, 8000.0, None])
+        self.assertEqual(data['rows'][1][5:], ['正常', 9000.5, True])
+        self.assertEqual(data['parameters'][1]['unit'], 'rpm')
+        self.assertFalse(data['has_more'])
+    
+    def test_incremental_refresh(self):
+        """测试参数值修改、删除和工艺数据软删除后宽表行在提交时刷新"""
+        with self.captureOnCommitCallbacks(execute=True):
+            value = ParameterValue.objects.get(process_data=self.data[1], parameter=self.speed)
+            value.value = '7000'
+            value.save()
+            ParameterValue.objects.filter(process_data=self.data[2], parameter=self.note).delete()
+            self.data[3].is_deleted = True
+            self.data[3].save()
+        rows = {row[1]: row for row in self.get_rows()['rows']}
+        self.assertEqual(set(rows), {'D0', 'D1', 'D2'})
+        self.assertEqual(rows['D1'][6], 7000.0)
+        self.assertIsNone(rows['D2'][5])
+    
+    def test_keyset_paging(self):
+        """测试按 after/limit 键集分页，每页查询次数固定"""
+        first = self.assertQueryBudget(self.url, 4, {'limit': 3}).data
+        self.assertTrue(first['has_more'])
+        second = self.get_rows({'limit': 3, 'after': first['next_after']})
+        self.assertEqual([row[1] for row in first['rows'] + second['rows']], ['D0', 'D1', 'D2', 'D3'])
+        self.assertFalse(second['has_more'])
+        self.assertIsNone(second['next_after'])
+        response = self.client.get(self.url, {'limit': 0})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_rebuild_command(self):
+        """测试重建命令生成与增量刷新相同的宽表"""
+        expected = self.get_rows()['rows']
+        ProcessDataPivot.objects.all().delete()
+        self.assertEqual(self.get_rows()['rows'], [])
+        call_command('rebuild_process_data_pivot', '--template', 'TPL', '--chunk-size', '2', stdout=io.StringIO())
+        self.assertEqual(self.get_rows()['rows'], expected)
+
+
+class RendererTests(TestCase):
+    """测试 orjson/MessagePack 渲染器与解析器"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword', is_staff=True)
+        self.client.force_authenticate(user=self.user)
+        tool = Tool.objects.create(
+            code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+        )
+        material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.5,
+            processing_requirements='无'
+        )
+        group = TaskGroup.objects.create(name='分组', created_by=self.user)
+        for index in range(3):
+            task = ProcessingTask.objects.create(
+                task_code=f'TASK{index:03d}', processing_time=timezone.now(), processing_type='drilling',
+                tool=tool, composite_material=material, operator=self.user, group=group
+            )
+            ProcessingParameter.objects.create(task=task, parameter_name='转速', parameter_value='3000')
+            SensorData.objects.create(sensor_type='force', processing_task=task, file_size=1024)
+        self.urls = [
+            reverse('processingtask-list'),
+            reverse('processingtask-detail', args=[task.id]),
+            reverse('sensordata-list'),
+            reverse('taskgroup-with-tasks'),
+            reverse('dashboard_summary'),
+        ]
+    
+    def test_orjson_output_matches_default_renderer(self):
+        """测试 orjson 渲染结果与 DRF 默认 JSONRenderer 一致"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                expected = json.loads(JSONRenderer().render(response.data))
+                self.assertEqual(json.loads(response.content), expected)
+                self.assertEqual(json.loads(ORJSONRenderer().render(response.data)), expected)
+    
+    @unittest.skipUnless(msgpack, '未安装 msgpack')
+    def test_msgpack_negotiation(self):
+        """测试 Accept: application/msgpack 时返回与 JSON 等价的 MessagePack"""
+        for url in self.urls:
+            with self.subTest(url=url):
+                json_data = json.loads(self.client.get(url).content)
+                response = self.client.get(url, HTTP_ACCEPT='application/msgpack')
+                self.assertEqual(response['Content-Type'], 'application/msgpack')
+                self.assertEqual(msgpack.unpackb(response.content, raw=False, strict_map_key=False), json_data)
+    
+    @unittest.skipUnless(msgpack, '未安装 msgpack')
+    def test_msgpack_request_body(self):
+        """测试解析 MessagePack 请求体"""
+        task = ProcessingTask.objects.first()
+        body = msgpack.packb([{'sensor_type': 'force', 'processing_task': task.id, 'file_size': 1}])
+        response = self.client.post(
+            reverse('sensordata-bulk-create'), body, content_type='application/msgpack'
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        response = self.client.post(
+            reverse('sensordata-bulk-create'), b'\xc1', content_type='application/msgpack'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ExportTests(TestCase):
+    """测试 CSV / NDJSON / npz 流式导出"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword', first_name='张')
+        self.client.force_authenticate(user=self.user)
+        tool = Tool.objects.create(
+            code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3
+        )
+        material = CompositeMaterial.objects.create(
+            part_number='P001', material_type='carbon_fiber', thickness=5.5,
+            processing_requirements='无'
+        )
+        self.processing_time = datetime(2025, 1, 2, 3, 4, 5, tzinfo=dt_timezone.utc)
+        for index in range(5):
+            task = ProcessingTask.objects.create(
+                task_code=f'TASK{index:03d}', processing_time=self.processing_time + timedelta(hours=index),
+                processing_type='drilling', status=['planned', 'completed'][index % 2],
+                duration=index * 10 if index % 2 else None, tool=tool, composite_material=material,
+                operator=self.user if index % 2 else None, notes='备注, "含引号"\n第二行' if index == 1 else None,
+            )
+            ProcessingParameter.objects.create(task=task, parameter_name='转速', parameter_value=str(3000 + index))
+        
+        category = ProcessCategory.objects.create(name='分类', code='CAT')
+        template = ProcessTemplate.objects.create(name='模板', code='TPL', category=category)
+        speed = ProcessParameter.objects.create(name='转速', code='SPEED', parameter_type='number')
+        for index in range(3):
+            process_data = ProcessData.objects.create(
+                template=template, code=f'D{index}', name=f'数据{index}', operator=self.user if index else None
+            )
+            ParameterValue.objects.create(process_data=process_data, parameter=speed, value=str(8000 + index))
+    
+    def export(self, basename, export_format, params=None, **extra):
+        response = self.client.get(reverse(f'{basename}-export'), {'export_format': export_format, **(params or {})}, **extra)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+    
+    def test_ndjson_matches_list_output(self):
+        """测试 NDJSON 每行与列表接口的记录一致，分块边界不丢行也不重复"""
+        viewsets = {
+            'processingtask': ProcessingTaskViewSet,
+            'processdata': ProcessDataViewSet,
+            'toolwearrecord': ToolWearRecordViewSet,
+            'processingquality': ProcessingQualityViewSet,
+        }
+        for basename, viewset in viewsets.items():
+            with self.subTest(basename=basename):
+                expected = sorted(
+                    self.client.get(reverse(f'{basename}-list')).json()['results'], key=lambda row: row['id']
+                )
+                with unittest.mock.patch.object(viewset, 'export_chunk_size', 2):
+                    response, content = self.export(basename, 'ndjson')
+                self.assertEqual([json.loads(line) for line in content.decode('utf-8').splitlines()], expected)
+                self.assertEqual(response['X-Export-Count'], str(len(expected)))
+    
+    def test_csv_flattens_nested_fields_and_applies_filters(self):
+        """测试 CSV 展开嵌套对象、一对多列表输出为 JSON，并按列表接口的过滤参数导出"""
+        response, content = self.export('processingtask', 'csv', {'status': 'completed'})
+        self.assertTrue(response['Content-Disposition'].endswith('.csv"'))
+        self.assertTrue(content.startswith(b'\xef\xbb\xbf'))
+        rows = list(csv.DictReader(io.StringIO(content.decode('utf-8-sig'))))
+        self.assertEqual([row['task_code'] for row in rows], ['TASK001', 'TASK003'])
+        self.assertEqual(rows[0]['notes'], '备注, "含引号"\n第二行')
+        self.assertEqual(rows[0]['tool_info.code'], 'T001')
+        self.assertEqual(rows[0]['operator_info.username'], 'testuser')
+        self.assertEqual(json.loads(rows[0]['parameters'])[0]['parameter_value'], '3001')
+        
+        _, content = self.export('processingtask', 'csv', {'fields': 'id,task_code'})
+        self.assertEqual(content.decode('utf-8-sig').splitlines()[0], 'id,task_code')
+    
+    def test_npz_numeric_columns(self):
+        """测试 npz 按 .npy 格式输出数值、布尔和时间列，空值为 NaN/NaT，文本列不输出"""
+        response, content = self.export('processingtask', 'npz')
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            names = archive.namelist()
+            self.assertIn('duration.npy', names)
+            self.assertNotIn('task_code.npy', names)
+            
+            def load(name, typecode):
+                data = archive.read(f'{name}.npy')
+                self.assertEqual(data[:8], b'\x93NUMPY\x01\x00')
+                header_length = struct.unpack('<H', data[8:10])[0]
+                self.assertEqual((10 + header_length) % 64, 0)
+                self.assertIn("'shape': (5,)", data[10:10 + header_length].decode('latin1'))
+                return list(array(typecode, data[10 + header_length:]))
+            
+            self.assertEqual(load('id', 'd'), [float(task.id) for task in ProcessingTask.objects.order_by('id')])
+            duration = load('duration', 'd')
+            self.assertTrue(math.isnan(duration[0]))
+            self.assertEqual(duration[1], 10.0)
+            self.assertEqual(load('tool_info.id', 'd')[0], float(Tool.objects.get().id))
+            processing_time = load('processing_time', 'q')
+            self.assertEqual(processing_time[0], int(self.processing_time.timestamp()) * 1000000)
+            self.assertEqual(processing_time[1] - processing_time[0], 3600 * 1000000)
+            self.assertEqual(load('operator_info.id', 'd')[1], float(self.user.id))
+    
+    def test_invalid_format_and_accept_header(self):
+        """测试不支持的格式返回 400，Accept 头不影响导出"""
+        response = self.client.get(reverse('processingtask-export'), {'export_format': 'xlsx'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response, content = self.export('processdata', 'csv', HTTP_ACCEPT='text/csv')
+        self.assertEqual(len(content.decode('utf-8-sig').splitlines()), 4)
+
+
+class SearchTests(TestCase):
+    """测试全文检索索引的维护、?search= 过滤与全局检索接口"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='zhangsan', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        category = ProcessCategory.objects.create(name='分类', code='CAT')
+        self.template = ProcessTemplate.objects.create(name='模板', code='TPL', category=category)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tool = Tool.objects.create(
+                code='T-DRILL-06', tool_type='钻头', tool_spec='D6 硬质合金', initial_wear_threshold=0.3
+            )
+            self.material = CompositeMaterial.objects.create(
+                part_number='CF-PANEL-01', material_type='carbon_fiber', thickness=5.0,
+                processing_requirements='无', description='碳纤维蒙皮'
+            )
+            self.task = ProcessingTask.objects.create(
+                task_code='TASK-2025-0001', processing_time=timezone.now(), processing_type='drilling',
+                tool=self.tool, composite_material=self.material, operator=self.user, notes='主轴振动偏大'
+            )
+            self.sensor = SensorData.objects.create(
+                processing_task=self.task, sensor_type='vibration', file_name='vib_0001.csv', sensor_id='ACC-01'
+            )
+            self.exact = ProcessData.objects.create(
+                template=self.template, code='CF-DRILL-001', name='碳纤维钻孔', batch_number='B2025', operator=self.user
+            )
+            self.partial = ProcessData.objects.create(
+                template=self.template, code='AL-MILL-002', name='铝合金铣削', batch_number='B2025',
+                remark='参照 CF-DRILL-001 的钻孔参数'
+            )
+    
+    def get_results(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.data
+        return data['results'] if isinstance(data, dict) else data
+    
+    def search_ids(self, url, keyword):
+        return {item['id'] for item in self.get_results(url, {'search': keyword})}
+    
+    def test_tokenize(self):
+        """测试字母数字按词切分、汉字切分为二元组和单字，检索片段按前缀或二元组匹配"""
+        self.assertEqual(tokenize('CF-Drill 001'), {'cf': 1, 'drill': 1, '001': 1})
+        self.assertEqual(tokenize('钻孔钻'), {'钻': 2, '孔': 1, '钻孔': 1, '孔钻': 1})
+        self.assertEqual(query_terms('ＤＲＩ 碳纤维'), [('dri', True), ('碳纤', False), ('纤维', False)])
+        self.assertEqual(query_terms('钻'), [('钻', False)])
+        self.assertEqual(query_terms('-- !'), [])
+    
+    def test_index_maintained_on_save(self):
+        """测试保存后在事务提交时写入索引，同一记录的多次修改合并为一次重建"""
+        self.assertTrue(SearchToken.objects.filter(target='processdata', object_id=self.exact.id, token='drill').exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.exact.code = 'CF-MILL-001'
+            self.exact.save()
+            self.exact.name = '碳纤维铣削'
+            self.exact.save()
+            self.assertTrue(SearchToken.objects.filter(object_id=self.exact.id, token='drill').exists())
+        tokens = set(SearchToken.objects.filter(target='processdata', object_id=self.exact.id).values_list('token', flat=True))
+        self.assertIn('mill', tokens)
+        self.assertIn('铣削', tokens)
+        self.assertNotIn('drill', tokens)
+        self.assertNotIn('钻孔', tokens)
+    
+    def test_search_filter_on_list_endpoints(self):
+        """测试各列表接口的 ?search= 走索引：字母数字按前缀、汉字按片段匹配，多个关键词同时满足"""
+        data_url = reverse('processdata-list')
+        self.assertEqual(self.search_ids(data_url, 'cf-dri'), {self.exact.id, self.partial.id})
+        self.assertEqual(self.search_ids(data_url, '钻孔 mill'), {self.partial.id})
+        self.assertEqual(self.search_ids(data_url, '纤'), {self.exact.id})
+        self.assertEqual(self.search_ids(data_url, 'zhang'), {self.exact.id})
+        self.assertEqual(self.search_ids(data_url, 'RILL'), set())
+        self.assertEqual(self.search_ids(reverse('processingtask-list'), '振动 2025'), {self.task.id})
+        self.assertEqual(self.search_ids(reverse('tool-list'), '硬质'), {self.tool.id})
+        self.assertEqual(self.search_ids(reverse('compositematerial-list'), 'panel'), {self.material.id})
+        self.assertEqual(self.search_ids(reverse('sensordata-list'), 'task-2025'), {self.sensor.id})
+        # 切分不出词元时退回 search_fields 的 icontains 过滤
+        self.assertEqual(self.search_ids(reverse('tool-list'), '-'), {self.tool.id})
+    
+    def test_related_changes_reindex(self):
+        """测试外键对象修改被索引的字段后重新索引引用它的记录，修改其他字段不触发"""
+        data_url = reverse('processdata-list')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.user.last_login = timezone.now()
+            self.user.save(update_fields=['last_login'])
+        self.assertNotIn(flush_search_index, callbacks)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.username = 'lisi'
+            self.user.save()
+        self.assertEqual(self.search_ids(data_url, 'zhang'), set())
+        self.assertEqual(self.search_ids(data_url, 'lisi'), {self.exact.id})
+        self.assertEqual(self.search_ids(reverse('processingtask-list'), 'lisi'), {self.task.id})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.task.task_code = 'TASK-2026-0001'
+            self.task.save()
+        self.assertEqual(self.search_ids(reverse('sensordata-list'), '2026'), {self.sensor.id})
+    
+    def test_soft_delete_removes_from_index(self):
+        """测试软删除后删除索引行，不再出现在检索结果中"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.partial.is_deleted = True
+            self.partial.save()
+        self.assertFalse(SearchToken.objects.filter(target='processdata', object_id=self.partial.id).exists())
+        self.assertEqual(self.search_ids(reverse('processdata-list'), 'b2025'), {self.exact.id})
+    
+    def test_processdata_search_action_ranked(self):
+        """测试高级搜索按相关度排序：编码命中的记录排在只有备注命中的记录之前"""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.partial.name = '碳纤维钻孔复查'
+            self.partial.save()
+        results = self.get_results(reverse('processdata-search'), {'keyword': 'CF-DRILL-001'})
+        self.assertEqual([item['id'] for item in results], [self.exact.id, self.partial.id])
+        results = self.get_results(reverse('processdata-search'), {'keyword': '复查'})
+        self.assertEqual([item['id'] for item in results], [self.partial.id])
+    
+    def test_global_search(self):
+        """测试全局检索跨类型按相关度返回，可按类型筛选，参数错误返回 400"""
+        url = reverse('api_search')
+        response = self.client.get(url, {'q': '碳纤维'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual(
+            [(item['type'], item['id']) for item in results],
+            [('processdata', self.exact.id), ('compositematerial', self.material.id)],
+        )
+        self.assertEqual((results[0]['title'], results[0]['subtitle']), ('碳纤维钻孔', 'CF-DRILL-001'))
+        self.assertEqual((results[1]['title'], results[1]['subtitle']), ('CF-PANEL-01', '碳纤维蒙皮'))
+        self.assertGreater(results[0]['score'], results[1]['score'])
+        
+        response = self.client.get(url, {'q': '碳纤维', 'types': 'compositematerial', 'limit': 1})
+        self.assertEqual([item['id'] for item in response.data['results']], [self.material.id])
+        self.assertEqual(self.client.get(url, {'q': ''}).data['results'], [])
+        self.assertEqual(self.client.get(url, {'q': 'x', 'types': 'user'}).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(url, {'q': 'x', 'limit': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_bulk_create_indexed(self):
+        """测试批量创建（不发送 post_save 信号）的记录也写入索引"""
+        items = [
+            {
+                'task_code': f'BULK-{index:03d}', 'processing_time': timezone.now().isoformat(),
+                'processing_type': 'drilling', 'tool': self.tool.id, 'composite_material': self.material.id,
+            }
+            for index in range(3)
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('processingtask-bulk-create'), items, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.search_ids(reverse('processingtask-list'), 'bulk'), set(response.data['ids']))
+    
+    def test_rebuild_command(self):
+        """测试重建命令生成与增量维护相同的索引"""
+        expected = set(SearchToken.objects.values_list('token', 'target', 'object_id', 'weight'))
+        SearchToken.objects.all().delete()
+        call_command('rebuild_search_index', '--chunk-size', '1', stdout=io.StringIO())
+        self.assertEqual(set(SearchToken.objects.values_list('token', 'target', 'object_id', 'weight')), expected)
+        call_command('rebuild_search_index', '--target', 'tool', stdout=io.StringIO())
+        self.assertEqual(set(SearchToken.objects.values_list('token', 'target', 'object_id', 'weight')), expected)
+
+
+class TemplateCatalogTests(TestCase):
+    """测试模板目录：模板列表与工艺数据录入复用预取的模板参数"""
+    
+    TEMPLATE_TABLES = ('process_data_processtemplate', 'process_data_templateparameter', 'process_data_processparameter')
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        category = ProcessCategory.objects.create(name='分类', code='CAT')
+        self.parameters = [
+            ProcessParameter.objects.create(name=f'参数{index}', code=f'P{index}', parameter_type='number')
+            for index in range(3)
+        ]
+        self.templates = []
+        for index in range(3):
+            template = ProcessTemplate.objects.create(name=f'模板{index}', code=f'TPL{index}', category=category)
+            for order, parameter in enumerate(self.parameters[:index + 1]):
+                TemplateParameter.objects.create(template=template, parameter=parameter, order=order)
+            self.templates.append(template)
+        self.url = reverse('processtemplate-list')
+    
+    def list_templates(self, params=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results'], ctx.captured_queries
+    
+    def test_list_matches_serializer_output(self):
+        """测试目录输出与按查询计划序列化的结果一致，目录加载后每次列表只查询模板行"""
+        all_fields = ','.join(ProcessTemplateSerializer.Meta.fields)
+        expected, _ = self.list_templates({'fields': all_fields})
+        results, _ = self.list_templates()
+        self.assertEqual(results, expected)
+        self.assertEqual([len(item['template_parameters']) for item in results], [3, 2, 1])
+        
+        results, queries = self.list_templates({'page': 1})
+        self.assertEqual(results, expected)
+        # 条件请求的统计、分页计数和当前页模板行
+        self.assertEqual(len(queries), 3, '\n'.join(query['sql'] for query in queries))
+        self.assertFalse(any('templateparameter' in query['sql'] for query in queries))
+    
+    def test_catalog_reloaded_on_change(self):
+        """测试模板参数修改后目录随版本号失效，绕过信号修改模板时按 (version, updated_at) 发现并重新加载"""
+        self.list_templates()
+        TemplateParameter.objects.filter(template=self.templates[0]).delete()
+        TemplateParameter.objects.create(template=self.templates[0], parameter=self.parameters[2], order=0)
+        results, _ = self.list_templates()
+        item = next(item for item in results if item['id'] == self.templates[0].id)
+        self.assertEqual([param['parameter_info']['code'] for param in item['template_parameters']], ['P2'])
+        
+        ProcessTemplate.objects.filter(pk=self.templates[1].pk).update(version='2.0.0', updated_at=timezone.now())
+        results, _ = self.list_templates()
+        item = next(item for item in results if item['id'] == self.templates[1].id)
+        self.assertEqual(item['version'], '2.0.0')
+    
+    def test_data_entry_skips_template_tables(self):
+        """测试目录加载后录入工艺数据不再查询模板、模板参数和参数定义表"""
+        url = reverse('processdata-list')
+        template = self.templates[2]
+        get_catalog()
+        for index in range(2):
+            payload = {
+                'template': template.id, 'code': f'D{index}', 'name': '数据', 'batch_number': 'B1',
+                'parameter_values': {'P0': '1', 'P2': '3.5', 'UNKNOWN': 'x'},
+            }
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(url, payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+            touched = [
+                query['sql'] for query in ctx.captured_queries
+                if any(f'"{table}"' in query['sql'] for table in self.TEMPLATE_TABLES)
+            ]
+            self.assertEqual(touched, [])
+        values = ParameterValue.objects.filter(process_data__code='D1').order_by('parameter__code')
+        self.assertEqual([(value.parameter.code, value.value_number) for value in values], [('P0', 1.0), ('P2', 3.5)])
+        
+        payload['template'] = 99999
+        payload['code'] = 'D9'
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('template', response.data)
+    
+    def test_template_created_elsewhere(self):
+        """测试其他进程创建的模板（本进程的版本号未变化）在录入时重新加载目录后可用"""
+        get_catalog()
+        # bulk_create 不发送信号，版本号不变，相当于模板由其他进程创建
+        template, = ProcessTemplate.objects.bulk_create([
+            ProcessTemplate(name='新模板', code='NEW', category=self.templates[0].category)
+        ])
+        TemplateParameter.objects.bulk_create([TemplateParameter(template=template, parameter=self.parameters[0], order=0)])
+        response = self.client.post(reverse('processdata-list'), {
+            'template': template.id, 'code': 'D1', 'name': '数据', 'batch_number': 'B1',
+            'parameter_values': {'P0': '1'},
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(ParameterValue.objects.get(process_data__code='D1').value, '1')
+    
+    def test_catalog_expires(self):
+        """测试其他进程修改参数定义（本进程的版本号未变化）后，目录过期时重新加载并按新定义校验"""
+        catalog = get_catalog()
+        validator = catalog.get(self.templates[0].id).validator
+        self.assertEqual(validator.validate({})[1], {})
+        # queryset.update() 不发送信号，相当于参数定义由其他进程修改
+        ProcessParameter.objects.filter(pk=self.parameters[0].pk).update(is_required=True)
+        self.assertIs(get_catalog(), catalog)
+        
+        expired = catalog.loaded_at + settings.TEMPLATE_CATALOG_TIMEOUT
+        with unittest.mock.patch('process_data.catalog.time.monotonic', return_value=expired):
+            reloaded = get_catalog()
+        self.assertIsNot(reloaded, catalog)
+        self.assertEqual(reloaded.get(self.templates[0].id).validator.validate({})[1], {'P0': ['该参数为必填项']})
+
+
+class ProcessDataValidationTests(TestCase):
+    """测试按模板编译的参数值校验与参数值批量写入"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        category = ProcessCategory.objects.create(name='分类', code='CAT')
+        self.template = ProcessTemplate.objects.create(name='模板', code='TPL', category=category)
+        definitions = [
+            dict(code='SPEED', parameter_type='number', min_value=1000, max_value=12000),
+            dict(code='MODE', parameter_type='enum', enum_values='干切, 湿切，微量润滑'),
+            dict(code='COOLANT', parameter_type='boolean'),
+            dict(code='DATE', parameter_type='date'),
+            dict(code='NOTE', parameter_type='text'),
+            dict(code='OPERATOR', parameter_type='text', is_required=True),
+            dict(code='PASSES', parameter_type='number', is_required=True, default_value='1'),
+        ] + [dict(code=f'N{index:02d}', parameter_type='number') for index in range(53)]
+        for order, definition in enumerate(definitions):
+            parameter = ProcessParameter.objects.create(name=definition['code'], **definition)
+            TemplateParameter.objects.create(template=self.template, parameter=parameter, order=order)
+        self.url = reverse('processdata-list')
+        self.valid_values = {
+            'SPEED': '8000', 'MODE': '湿切', 'COOLANT': '是', 'DATE': '2025-01-02', 'NOTE': '正常',
+            'OPERATOR': '张三', **{f'N{index:02d}': str(index) for index in range(53)},
+        }
+    
+    def post(self, code, values):
+        return self.client.post(self.url, {
+            'template': self.template.id, 'code': code, 'name': '数据', 'batch_number': 'B1',
+            'parameter_values': values,
+        }, format='json')
+    
+    def test_create_with_bulk_values(self):
+        """测试 60 个参数的记录在固定的少量查询内写入，必填参数缺省时取默认值"""
+        get_catalog()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.post('D1', self.valid_values)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertLessEqual(len(ctx.captured_queries), 6, '\n'.join(query['sql'] for query in ctx.captured_queries))
+        values = dict(
+            ParameterValue.objects.filter(process_data__code='D1').values_list('parameter__code', 'value')
+        )
+        self.assertEqual(len(values), 60)
+        self.assertEqual(values['PASSES'], '1')
+        self.assertEqual(ParameterValue.objects.get(process_data__code='D1', parameter__code='SPEED').value_number, 8000.0)
+    
+    def test_invalid_values_reported_per_parameter(self):
+        """测试类型、范围、枚举和必填错误按参数编码返回，整条记录不写入"""
+        values = {**self.valid_values, 'SPEED': '20000', 'MODE': '油冷', 'COOLANT': 'maybe', 'DATE': '明天', 'N00': 'abc'}
+        del values['OPERATOR']
+        response = self.post('D1', values)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        errors = response.data['parameter_values']
+        self.assertEqual(set(errors), {'SPEED', 'MODE', 'COOLANT', 'DATE', 'N00', 'OPERATOR'})
+        self.assertEqual(errors['SPEED'], ['不能大于 12000'])
+        self.assertEqual(errors['MODE'], ['必须是 干切、湿切、微量润滑 之一'])
+        self.assertFalse(ProcessData.objects.filter(code='D1').exists())
+    
+    def test_blank_required_values(self):
+        """测试校验器把空白的必填参数按未提供处理：有默认值时取默认值，没有时报错"""
+        validator = get_catalog().get(self.template.id).validator
+        cleaned, errors = validator.validate({'OPERATOR': '  ', 'PASSES': '', 'NOTE': ''})
+        self.assertEqual(errors, {'OPERATOR': ['该参数为必填项']})
+        self.assertEqual(sorted((item.parameter.code, value) for item, value in cleaned), [('NOTE', ''), ('PASSES', '1')])
+    
+    def test_validate_batch(self):
+        """测试同一个编译后的校验器一次校验整批记录"""
+        validator = get_catalog().get(self.template.id).validator
+        self.assertIs(get_catalog().get(self.template.id).validator, validator)
+        results = validator.validate_batch([
+            {'OPERATOR': '张三', 'SPEED': '1000'},
+            {'OPERATOR': '李四', 'SPEED': '999', 'UNKNOWN': 'x'},
+            {'SPEED': '1.2e4'},
+        ])
+        self.assertEqual([errors for _, errors in results], [
+            {}, {'SPEED': ['不能小于 1000']}, {'OPERATOR': ['该参数为必填项']},
+        ])
+        self.assertEqual(
+            sorted((item.parameter.code, value) for item, value in results[0][0]),
+            [('OPERATOR', '张三'), ('PASSES', '1'), ('SPEED', '1000')],
+        )
+
+
+class ProcessDataImportTests(TestCase):
+    """测试工艺数据的流式 CSV 导入"""
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        category = ProcessCategory.objects.create(name='分类', code='CAT')
+        self.template = ProcessTemplate.objects.create(name='模板', code='TPL', category=category)
+        for order, definition in enumerate([
+            dict(code='SPEED', parameter_type='number', min_value=1000, max_value=12000),
+            dict(code='MODE', parameter_type='enum', enum_values='干切,湿切'),
+            dict(code='PASSES', parameter_type='number', is_required=True, default_value='1'),
+        ]):
+            parameter = ProcessParameter.objects.create(name=definition['code'], **definition)
+            TemplateParameter.objects.create(template=self.template, parameter=parameter, order=order)
+        ProcessData.objects.create(template=self.template, code='OLD', name='已有', batch_number='B0')
+        self.url = reverse('processdata-import')
+    
+    def make_csv(self, rows, header='code,name,batch_number,operator,SPEED,MODE'):
+        return '\n'.join([header, *rows]).encode('utf-8-sig')
+    
+    def upload(self, content, template='TPL', **extra):
+        file = io.BytesIO(content)
+        file.name = 'data.csv'
+        response = self.client.post(self.url, {'file': file, 'template': template, **extra}, format='multipart')
+        if response.status_code != status.HTTP_200_OK:
+            return response, None
+        lines = b''.join(response.streaming_content).decode('utf-8').splitlines()
+        return response, [json.loads(line) for line in lines]
+    
+    def test_import_reports_progress_and_row_errors(self):
+        """测试合法行批量写入，有错误的行按行号报告并跳过"""
+        content = self.make_csv([
+            'D1,数据一,B1,testuser,8000,湿切',
+            'D2,数据二,B1,,,',
+            'D1,重复,B1,,,',
+            'OLD,已有,B1,,,',
+            'D3,数据三,B1,nobody,abc,油冷',
+            'D4,列数不对',
+            ',,,,,',
+            ',无编码,B1,,,',
+        ])
+        with self.captureOnCommitCallbacks(execute=True):
+            response, lines = self.upload(content)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        progress, summary = lines
+        self.assertEqual((summary['done'], summary['rows'], summary['created'], summary['failed']), (True, 7, 2, 5))
+        errors = {error['row']: error['errors'] for error in progress['errors']}
+        self.assertEqual(sorted(errors), [4, 5, 6, 7, 9])
+        self.assertEqual(errors[4], {'code': ['与第 2 行重复']})
+        self.assertEqual(errors[5], {'code': ['编码已存在']})
+        self.assertEqual(errors[6], {
+            'operator': ['用户 nobody 不存在'], 'SPEED': ['必须是数值'], 'MODE': ['必须是 干切、湿切 之一'],
+        })
+        self.assertIn('non_field_errors', errors[7])
+        self.assertEqual(errors[9], {'code': ['该字段为必填项']})
+        
+        d1 = ProcessData.objects.get(code='D1')
+        self.assertEqual(d1.operator, self.user)
+        self.assertEqual(
+            dict(d1.parameter_values.values_list('parameter__code', 'value')),
+            {'SPEED': '8000', 'MODE': '湿切', 'PASSES': '1'},
+        )
+        self.assertEqual(d1.parameter_values.get(parameter__code='SPEED').value_number, 8000.0)
+        self.assertEqual(ProcessData.objects.get(code='D2').parameter_values.count(), 1)
+        # 批量写入的记录同样进入检索索引和宽表
+        self.assertTrue(SearchToken.objects.filter(target='processdata', object_id=d1.id, token='d1').exists())
+        self.assertEqual(len(ProcessDataPivot.objects.get(process_data=d1).values), 3)
+    
+    def test_import_in_chunks(self):
+        """测试按块写入，每块产出一行进度，导入后列表缓存失效"""
+        self.client.get(reverse('processdata-list'))
+        content = self.make_csv([f'C{index},数据,B1,,{1000 + index},' for index in range(7)])
+        with unittest.mock.patch.object(ProcessDataViewSet, 'import_chunk_size', 3):
+            response, lines = self.upload(content, template=str(self.template.id))
+        self.assertEqual([line['rows'] for line in lines], [3, 6, 7, 7])
+        self.assertEqual(lines[-1]['created'], 7)
+        response = self.client.get(reverse('processdata-list'))
+        self.assertEqual(response.data['count'], 8)
+    
+    def test_header_and_request_errors(self):
+        """测试表头、模板和编码错误直接返回 400，不写入任何数据"""
+        response, _ = self.upload(self.make_csv(['D1,数据,B1'], header='code,name,UNKNOWN'))
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['error'], ['缺少必填列: batch_number', '模板 TPL 中没有这些参数: UNKNOWN'])
+        response, _ = self.upload(self.make_csv([]), template='NOPE')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response, _ = self.upload(self.make_csv([]), encoding='no-such-codec')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, {'template': 'TPL'}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(ProcessData.objects.count(), 1)
+    
+    def test_import_gbk_file(self):
+        """测试指定编码导入 Excel 另存的 GBK 文件"""
+        content = 'code,name,batch_number\nG1,国标编码,B1\n'.encode('gbk')
+        response, lines = self.upload(content, encoding='gbk')
+        self.assertEqual(lines[-1]['created'], 1)
+        self.assertEqual(ProcessData.objects.get(code='G1').name, '国标编码')
+    
+    def test_insert_values_matches_orm(self):
+        """测试直接插入的参数值与 ORM 写入的结果在模型的全部字段上一致"""
+        entry = get_catalog().find('TPL')
+        parameters = [
+            (entry.parameters_by_code['SPEED'].parameter, '8000'),
+            (entry.parameters_by_code['MODE'].parameter, '湿切'),
+            (ProcessParameter.objects.create(name='日期', code='DATE', parameter_type='date'), '2025-01-02'),
+            (ProcessParameter.objects.create(name='冷却', code='COOLANT', parameter_type='boolean'), '是'),
+        ]
+        imported = ProcessData.objects.create(template=self.template, code='A', name='导入', batch_number='B1')
+        created = ProcessData.objects.create(template=self.template, code='B', name='录入', batch_number='B1')
+        ProcessDataImport(entry, ['code', 'name', 'batch_number']).insert_values(
+            [(imported.pk, parameter, value) for parameter, value in parameters]
+        )
+        for parameter, value in parameters:
+            ParameterValue.objects.create(process_data=created, parameter=parameter, value=value)
+        
+        fields = [
+            field.attname for field in ParameterValue._meta.concrete_fields
+            if field.name not in ('id', 'process_data', 'created_at', 'updated_at')
+        ]
+        rows = lambda process_data: list(
+            ParameterValue.objects.filter(process_data=process_data).order_by('parameter_id').values(*fields)
+        )
+        self.assertEqual(rows(imported), rows(created))
+        self.assertEqual(rows(imported)[2]['value_date'], datetime(2025, 1, 2).date())
+        self.assertFalse(ParameterValue.objects.filter(process_data=imported, created_at__isnull=True).exists())
+    
+    def test_management_command(self):
+        """测试导入命令逐块写入并把错误行写入 CSV 文件"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'data.csv')
+            errors_path = os.path.join(directory, 'errors.csv')
+            with open(path, 'wb') as file:
+                file.write(self.make_csv(['M1,数据,B1,,9000,', 'M2,数据,B1,,99999,', 'M3,数据,B1,,,干切']))
+            out = io.StringIO()
+            call_command('import_process_data', path, '--template', 'TPL', '--chunk-size', '2',
+                         '--errors', errors_path, stdout=out)
+            with open(errors_path, encoding='utf-8-sig') as file:
+                errors = list(csv.reader(file))
+        self.assertIn('写入 2 行，失败 1 行', out.getvalue())
+        self.assertEqual(errors, [['row', 'code', 'field', 'message'], ['3', 'M2', 'SPEED', '不能大于 12000']])
+        self.assertEqual(set(ProcessData.objects.values_list('code', flat=True)), {'OLD', 'M1', 'M3'})
+
+
+@unittest.skipUnless('replica' in settings.DATABASES, '未配置副本数据库，使用 --settings=DjangoService.test_settings 运行')
+@override_settings(DATABASE_READ_REPLICA='replica')
+class ReplicaRoutingTests(TestCase):
+    """测试读写分离：只读请求读副本，写入及写入后的读取走主库；测试中副本是独立的空库，相当于复制无限延迟"""
+    databases = '__all__'
+    
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+        Tool.objects.create(code='T001', tool_type='钻头', tool_spec='D6', initial_wear_threshold=0.3)
+        category = ProcessCategory.objects.create(name='分类', code='CAT')
+        template = ProcessTemplate.objects.create(name='模板', code='TPL', category=category)
+        ProcessData.objects.create(template=template, code='D1', name='数据', batch_number='B1')
+    
+    def test_read_request_uses_replica(self):
+        """测试只读请求从副本读取（副本中还没有主库写入的数据），不设置读主库标记"""
+        response = self.client.get(reverse('processdata-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 0)
+        self.assertNotIn(PRIMARY_COOKIE_NAME, response.cookies)
+    
+    def test_read_after_write(self):
+        """测试写入后一段时间内该客户端的读取走主库，标记过期后恢复读副本"""
+        response = self.client.post(reverse('processcategory-list'), {'name': '新分类', 'code': 'NEW'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(ProcessCategory.objects.using('default').filter(code='NEW').exists())
+        self.assertEqual(response.cookies[PRIMARY_COOKIE_NAME]['max-age'], 5)
+        
+        self.assertEqual(self.client.get(reverse('processdata-list')).data['count'], 1)
+        del self.client.cookies[PRIMARY_COOKIE_NAME]
+        self.assertEqual(self.client.get(reverse('processdata-list')).data['count'], 0)
+    
+    @override_settings(REPLICA_READ_AFTER_WRITE_SECONDS=0)
+    def test_read_after_write_disabled(self):
+        """测试读己之写时间为 0 时写入后不标记客户端"""
+        response = self.client.post(reverse('processcategory-list'), {'name': '新分类', 'code': 'NEW'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertNotIn(PRIMARY_COOKIE_NAME, response.cookies)
+    
+    def test_versioned_caches_read_primary(self):
+        """测试按版本号缓存的响应和增量变更从主库读取，不缓存副本中滞后的数据"""
+        response = self.client.get(reverse('tool-list'))
+        self.assertEqual([tool['code'] for tool in response.data['results']], ['T001'])
+        response = self.client.get(reverse('tool-changes'))
+        self.assertEqual([tool['code'] for tool in response.data['changed']], ['T001'])
+    
+    def test_streaming_export_reads_replica(self):
+        """测试流式导出在中间件返回后生成的内容同样读副本"""
+        response = self.client.get(reverse('processdata-export'), {'export_format': 'ndjson'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(b''.join(response.streaming_content), b'')
+    
+    def test_router(self):
+        """测试请求之外、use_primary() 块内和写入之后的读取走主库"""
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Tool), 'default')
+        with unittest.mock.patch.multiple(routers._state, create=True, read_replica=True, wrote=False):
+            self.assertEqual(router.db_for_read(Tool), 'replica')
+            with use_primary():
+                self.assertEqual(router.db_for_read(Tool), 'default')
+            self.assertEqual(router.db_for_read(Tool), 'replica')
+            self.assertEqual(router.db_for_write(Tool), 'default')
+            self.assertEqual(router.db_for_read(Tool), 'default')
@@ -15,7 +15,10 @@ from .views import (
     ProcessingQualityViewSet,
     ToolWearRecordViewSet,
     TaskGroupViewSet,
-    UserInfoView
+    UserInfoView,
+    DashboardSummaryView,
+    SearchView,
+    BatchView
 )
 
 # 创建路由器并注册视图集
@@ -41,4 +44,7 @@ urlpatterns = [
     path('', include(router.urls)),
     path('login/', LoginView.as_view(), name='api_login'),
     path('user-info/', UserInfoView.as_view(), name='user_info'),
+    path('dashboard/summary/', DashboardSummaryView.as_view(), name='dashboard_summary'),
+    path('search/', SearchView.as_view(), name='api_search'),
+    path('batch/', BatchView.as_view(), name='api_batch'),
 ] 
\ No newline at end of file
@@ -1,13 +1,29 @@
-from django.shortcuts import render
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+import codecs
+import json
+from urllib.parse import urlencode
+
+from django.shortcuts import get_object_or_404, render
+from django.http import HttpRequest, QueryDict, StreamingHttpResponse
+from django.urls import resolve, Resolver404
 from rest_framework import viewsets, permissions, filters, status, views
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Q, Count, Sum
+from django.conf import settings
+from django.core.cache import cache
 from django.contrib.auth import login, logout, get_user_model
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.contrib.auth.models import User
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 from .models import (
     ProcessCategory,
@@ -48,8 +64,29 @@ from .serializers import (
     SensorDataUpdateSerializer,
     ProcessingQualitySerializer,
     ToolWearRecordSerializer,
-    TaskGroupSerializer
+    TaskGroupSerializer,
+    ProcessingTaskBulkSerializer,
+    SensorDataBulkSerializer,
+    ToolWearRecordBulkSerializer
+)
+from .fast_serializers import (
+    ProcessDataValuesSerializer,
+    ProcessingTaskListValuesSerializer,
+    SensorDataValuesSerializer,
+    ProcessingQualityValuesSerializer,
+    ToolWearRecordValuesSerializer,
 )
+from .exports import EXPORT_FORMATS, stream_export
+from .imports import ImportFileError, import_process_data, open_csv
+from .filters import IndexedSearchFilter, ProcessDataParameterFilter, ProcessingTaskParameterFilter
+from .pagination import SwitchablePagination
+from .pivot import DATA_COLUMNS, get_pivot_parameters, iter_pivot_rows
+from .search import SEARCH_TARGETS, annotate_search_score, filter_by_search, schedule_search_index, search
+from .caching import ConditionalGetMixin, ResponseCacheMixin, invalidate_model_cache
+from .catalog import find_entry, get_catalog
+from .routers import use_primary
+
+logger = logging.getLogger(__name__)
 
 
 # 自定义权限类，允许已登录用户执行任何操作
@@ -66,6 +103,262 @@ class IsAuthenticatedOrReadOnly(permissions.BasePermission):
         return request.user and request.user.is_authenticated
 
 
+class QueryPlanMixin:
+    """
+    按 action 声明查询计划的视图集混入类
+    query_plans 形如 {'list': {'select_related': [...], 'prefetch_related': [...], 'annotate': {...}}}，
+    使嵌套序列化时的关联数据和统计值在固定次数的查询内取出，避免 N+1 查询
+    """
+    query_plans = {}
+
+    def get_query_plan(self):
+        """获取当前 action 的查询计划，并去掉本次请求未输出的嵌套字段所需的关联查找"""
+        plan = self.query_plans.get(self.action, {})
+        serializer_class = self.get_serializer_class()
+        if not plan or not hasattr(serializer_class, 'get_omitted_lookups'):
+            return plan
+
+        omitted = serializer_class.get_omitted_lookups(self.request)
+        if not omitted:
+            return plan
+        plan = dict(plan)
+        for key in ('select_related', 'prefetch_related'):
+            if key in plan:
+                plan[key] = [lookup for lookup in plan[key] if lookup not in omitted]
+        return plan
+
+    def apply_query_plan(self, queryset, plan=None):
+        """将查询计划应用到查询集"""
+        if plan is None:
+            plan = self.get_query_plan()
+        if plan.get('select_related'):
+            queryset = queryset.select_related(*plan['select_related'])
+        if plan.get('prefetch_related'):
+            queryset = queryset.prefetch_related(*plan['prefetch_related'])
+        if plan.get('annotate'):
+            queryset = queryset.annotate(**plan['annotate'])
+        return queryset
+
+    def get_queryset(self):
+        return self.apply_query_plan(super().get_queryset())
+
+
+class FastListMixin:
+    """
+    只读列表快速序列化混入类
+    settings.FAST_LIST_SERIALIZATION 开启时，list 接口按 fast_list_serializer_class 从 .values() 结果直接构造输出，
+    不实例化模型对象和 ModelSerializer 字段；输出与 get_serializer_class() 返回的序列化器一致
+    """
+    fast_list_serializer_class = None
+
+    def use_fast_list(self):
+        return self.fast_list_serializer_class is not None and getattr(settings, 'FAST_LIST_SERIALIZATION', True)
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_fast_list():
+            return super().list(request, *args, **kwargs)
+
+        fast_serializer = self.fast_list_serializer_class(request)
+        queryset = fast_serializer.get_values_queryset(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(fast_serializer.serialize(page))
+        return Response(fast_serializer.serialize(queryset))
+
+
+class TemplateCatalogMixin:
+    """
+    模板列表从模板目录（见 catalog.py）输出的视图集混入类
+    未携带 fields/expand 参数时，list 接口只查询当前页的模板行，分类与模板参数从目录读取，
+    每个模板的默认输出在目录内只序列化一次；携带参数时按原查询计划序列化
+    """
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if any(param is not None for param in serializer_class.parse_sparse_params(request)):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset().select_related(None).prefetch_related(None))
+        page = self.paginate_queryset(queryset)
+        templates = list(queryset if page is None else page)
+        catalog = get_catalog()
+        if not all(catalog.is_current(template) for template in templates):
+            catalog = get_catalog(reload=True)
+
+        data = []
+        for template in templates:
+            entry = catalog.get(template.pk)
+            if entry is None:
+                # 加载目录后才创建的模板
+                data.append(serializer_class(template, context=self.get_serializer_context()).data)
+                continue
+            if entry.data is None:
+                entry.data = serializer_class(entry.template).data
+            data.append(entry.data)
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+
+class ExportMixin:
+    """
+    流式导出视图集混入类
+    GET {prefix}/export/?export_format=csv|ndjson|npz 导出过滤后的全部记录，过滤、搜索参数与 fields 稀疏字段集同 list 接口；
+    记录按ID升序分块读取、序列化和编码，逐块写出响应，服务端内存占用与导出行数无关（见 exports.py）。
+    导出不分页，也不使用排序参数；响应头 X-Export-Count 为导出的总行数，便于客户端显示进度
+    """
+    export_serializer_class = None
+    export_chunk_size = 2000
+
+    def perform_content_negotiation(self, request, force=False):
+        # 导出响应是文件流，不受 Accept 限制；参数错误时按默认渲染器返回
+        return super().perform_content_negotiation(request, force=force or self.action == 'export')
+
+    @action(detail=False, methods=['get'])
+    def export(self, request):
+        """流式导出"""
+        export_format = request.query_params.get('export_format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response({'error': f'export_format 必须是 {"、".join(EXPORT_FORMATS)} 之一'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        content_type, content = stream_export(
+            self.export_serializer_class(request), queryset, export_format, self.export_chunk_size
+        )
+        response = StreamingHttpResponse(content, content_type=content_type)
+        file_name = f'{self.basename}-{timezone.localtime():%Y%m%d-%H%M%S}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{file_name}"'
+        response['X-Export-Count'] = str(queryset.count())
+        return response
+
+
+class BulkCreateMixin:
+    """
+    批量创建视图集混入类
+    POST {prefix}/bulk/ 接收对象列表，整批校验后在一个事务内使用 bulk_create 写入；
+    任一项校验失败时不写入任何数据，并按提交顺序返回每一项的错误。
+    bulk_serializer_class 声明了唯一字段时支持 ?upsert=true 按唯一字段更新已存在的记录
+    """
+    bulk_serializer_class = None
+    bulk_max_items = 5000
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request):
+        """批量创建"""
+        items = request.data
+        if not isinstance(items, list):
+            return Response({'error': '请求体必须是对象列表'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.bulk_max_items:
+            return Response(
+                {'error': f'单次最多提交 {self.bulk_max_items} 条记录'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        context = self.get_serializer_context()
+        context['upsert'] = request.query_params.get('upsert', '').lower() in ('1', 'true')
+        serializer = self.bulk_serializer_class(data=items, many=True, context=context)
+        if not serializer.is_valid():
+            return Response({'errors': serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            instances = serializer.save()
+
+        ids = [instance.pk for instance in instances]
+        return Response({
+            'count': len(instances),
+            # 数据库不回填主键时（如 MySQL 且无唯一字段）无法返回新记录ID
+            'ids': ids if all(pk is not None for pk in ids) else None,
+        }, status=status.HTTP_201_CREATED)
+
+
+class ChangeFeedMixin:
+    """
+    增量变更视图集混入类，用于软删除的资源
+    GET {prefix}/changes/?updated_since=<水位>&after_id=<ID> 按 (updated_at, id) 顺序返回此后新增、修改和软删除的记录，
+    响应包含 changed（序列化后的记录）、deleted（软删除记录的ID）、watermark 与 after_id（下次请求使用的游标）和 has_more；
+    未提供 updated_since 时返回全部未删除记录；updated_since=now 时不返回记录，只返回当前的游标，
+    客户端先取游标再按列表接口分页加载首屏数据，之后从该游标增量同步。
+    游标为 (watermark, after_id)：after_id 为空时返回修改时间不早于水位的记录，否则返回 (updated_at, id) 在游标之后的记录，
+    同一修改时间的记录超过 limit 条（批量写入、MySQL 的秒级时间）时按 ID 继续分批。
+    水位比当前时间回退 CHANGE_FEED_SAFETY_MARGIN 秒，迟提交的事务不会被漏掉，重复返回的记录由客户端按ID合并
+    """
+    change_feed_serializer_class = None
+    change_feed_limit = 1000
+    change_feed_max_limit = 5000
+
+    def get_change_queryset(self):
+        """包含软删除记录的查询集，需要按用户限定范围的视图集可重写"""
+        return self.queryset.model.objects.all()
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """获取增量变更"""
+        updated_since = None
+        if request.query_params.get('updated_since') == 'now':
+            watermark = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SAFETY_MARGIN)
+            return Response({'changed': [], 'deleted': [], 'watermark': watermark.isoformat(),
+                             'after_id': None, 'has_more': False})
+        if request.query_params.get('updated_since'):
+            updated_since = parse_datetime(request.query_params['updated_since'])
+            if updated_since is None:
+                return Response({'error': 'updated_since 必须是 ISO 8601 格式的时间'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(updated_since):
+                updated_since = timezone.make_aware(updated_since)
+        after_id = None
+        try:
+            limit = min(int(request.query_params.get('limit', self.change_feed_limit)),
+                        self.change_feed_max_limit)
+            if request.query_params.get('after_id') and updated_since is not None:
+                after_id = int(request.query_params['after_id'])
+        except ValueError:
+            return Response({'error': 'limit 和 after_id 必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'error': 'limit 必须是正整数'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 水位按主库的时间计算，副本的复制延迟可能超过安全回退时间而漏掉变更，增量查询读主库
+        with use_primary():
+            # 先取水位再查询，查询期间提交的修改会在下一次请求中返回
+            watermark = timezone.now() - timedelta(seconds=settings.CHANGE_FEED_SAFETY_MARGIN)
+            queryset = self.get_change_queryset()
+            if updated_since is None:
+                queryset = queryset.filter(is_deleted=False)
+            elif after_id is None:
+                queryset = queryset.filter(updated_at__gte=updated_since)
+            else:
+                queryset = queryset.filter(
+                    Q(updated_at__gt=updated_since) | Q(updated_at=updated_since, id__gt=after_id)
+                )
+            if hasattr(self, 'apply_query_plan'):
+                queryset = self.apply_query_plan(queryset)
+
+            rows = list(queryset.order_by('updated_at', 'id')[:limit + 1])
+            has_more = len(rows) > limit
+            if has_more:
+                rows = rows[:limit]
+                # 下一批从本批最后一条记录之后开始
+                watermark, after_id = rows[-1].updated_at, rows[-1].id
+            elif updated_since is None or watermark > updated_since:
+                after_id = None
+            else:
+                # 水位没有前进时沿用请求的游标
+                watermark = updated_since
+
+            serializer_class = self.change_feed_serializer_class or self.get_serializer_class()
+            serializer = serializer_class(
+                [row for row in rows if not row.is_deleted], many=True,
+                context=self.get_serializer_context()
+            )
+            return Response({
+                'changed': serializer.data,
+                'deleted': [row.id for row in rows if row.is_deleted],
+                'watermark': watermark.isoformat(),
+                'after_id': after_id,
+                'has_more': has_more,
+            })
+
+
 @method_decorator(csrf_exempt, name='dispatch')
 class LoginView(views.APIView):
     """
@@ -95,13 +388,14 @@ class LoginView(views.APIView):
             )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(ConditionalGetMixin, ResponseCacheMixin, viewsets.ModelViewSet):
     """
     用户视图集
     允许管理员查看、创建、更新和删除用户。
     """
     queryset = get_user_model().objects.all().order_by('id')
     permission_classes = [permissions.IsAdminUser]  # 仅限管理员访问
+    cache_dependencies = (get_user_model(),)
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['username', 'first_name', 'last_name', 'email']
     ordering_fields = ['username', 'email']
@@ -129,9 +423,10 @@ class UserViewSet(viewsets.ModelViewSet):
         super().perform_destroy(instance)
 
 
-class ProcessCategoryViewSet(viewsets.ModelViewSet):
+class ProcessCategoryViewSet(ConditionalGetMixin, ResponseCacheMixin, viewsets.ModelViewSet):
     """工艺分类视图集"""
     queryset = ProcessCategory.objects.filter(is_deleted=False).order_by('code')
+    cache_dependencies = (ProcessCategory,)
     serializer_class = ProcessCategorySerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -141,14 +436,39 @@ class ProcessCategoryViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def tree(self, request):
-        """获取分类树形结构"""
-        # 获取所有顶级分类
-        root_categories = self.get_queryset().filter(parent=None)
-        serializer = self.get_serializer(root_categories, many=True)
-        return Response(serializer.data)
+        """
+        获取分类树形结构：每个分类带嵌套的 children，同级按编码排序
+        ?root=<分类ID> 只返回该分类及其子树；父分类已删除的分类连同其子树不返回
+        """
+        return self.cached_response(self._build_tree, request)
+    
+    def _build_tree(self, request):
+        # 一次查询取出全部（或子树内的）分类，再在内存中按 parent 组装
+        queryset = self.get_queryset()
+        root_id = request.query_params.get('root')
+        if root_id:
+            if not root_id.isdigit():
+                return Response({'error': 'root 必须是分类ID'}, status=status.HTTP_400_BAD_REQUEST)
+            root = get_object_or_404(queryset, pk=root_id)
+            queryset = queryset.filter(path__startswith=root.path)
+        
+        categories = list(queryset)
+        root_parent_id = root.parent_id if root_id else None
+        nodes = {}
+        for category, item in zip(categories, self.get_serializer(categories, many=True).data):
+            item['children'] = []
+            nodes[category.pk] = item
+        roots = []
+        for category in categories:
+            parent = nodes.get(category.parent_id)
+            if parent is not None:
+                parent['children'].append(nodes[category.pk])
+            elif category.parent_id == root_parent_id:
+                roots.append(nodes[category.pk])
+        return Response(roots)
 
 
-class ProcessParameterViewSet(viewsets.ModelViewSet):
+class ProcessParameterViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     """工艺参数视图集"""
     queryset = ProcessParameter.objects.filter(is_deleted=False).order_by('code')
     serializer_class = ProcessParameterSerializer
@@ -159,9 +479,10 @@ class ProcessParameterViewSet(viewsets.ModelViewSet):
     ordering_fields = ['code', 'name', 'created_at']
 
 
-class ProcessTemplateViewSet(viewsets.ModelViewSet):
+class ProcessTemplateViewSet(ConditionalGetMixin, TemplateCatalogMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """工艺模板视图集"""
     queryset = ProcessTemplate.objects.filter(is_deleted=False).order_by('-updated_at')
+    conditional_dependencies = (ProcessCategory, TemplateParameter, ProcessParameter)
     serializer_class = ProcessTemplateSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
@@ -169,29 +490,131 @@ class ProcessTemplateViewSet(viewsets.ModelViewSet):
     search_fields = ['name', 'code', 'description']
     ordering_fields = ['code', 'name', 'created_at', 'updated_at']
     
+    read_plan = {
+        'select_related': ['category'],
+        'prefetch_related': ['templateparameter_set__parameter'],
+    }
+    query_plans = {
+        'list': read_plan,
+        'retrieve': read_plan,
+    }
+    pivot_page_size = 1000
+    pivot_max_page_size = 10000
+    
     @action(detail=True, methods=['get'])
     def parameters(self, request, pk=None):
         """获取模板参数"""
         template = self.get_object()
-        template_params = TemplateParameter.objects.filter(template=template).order_by('order')
+        template_params = TemplateParameter.objects.filter(
+            template=template
+        ).select_related('parameter').order_by('order')
         serializer = TemplateParameterSerializer(template_params, many=True)
         return Response(serializer.data)
+    
+    @action(detail=True, methods=['get'])
+    def pivot(self, request, pk=None):
+        """
+        工艺数据宽表：该模板下每条工艺数据一行，每个模板参数一列
+        按工艺数据ID升序键集分页，?after=<上一页 next_after>&limit=<行数>
+        """
+        template = self.get_object()
+        try:
+            after = int(request.query_params['after']) if request.query_params.get('after') else None
+            limit = min(int(request.query_params.get('limit', self.pivot_page_size)), self.pivot_max_page_size)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response({'error': 'after 必须是整数，limit 必须是正整数'}, status=status.HTTP_400_BAD_REQUEST)
+
+        parameters = get_pivot_parameters(template)
+        rows = list(iter_pivot_rows(template, parameters, after=after, limit=limit + 1))
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return Response({
+            'columns': [*DATA_COLUMNS, *(parameter['parameter__code'] for parameter in parameters)],
+            'parameters': [
+                {
+                    'code': parameter['parameter__code'],
+                    'name': parameter['parameter__name'],
+                    'unit': parameter['parameter__unit'],
+                    'parameter_type': parameter['parameter__parameter_type'],
+                }
+                for parameter in parameters
+            ],
+            'rows': rows,
+            'next_after': rows[-1][0] if has_more else None,
+            'has_more': has_more,
+        })
 
 
-class ProcessDataViewSet(viewsets.ModelViewSet):
+class ProcessDataViewSet(ConditionalGetMixin, ChangeFeedMixin, ExportMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """工艺数据视图集"""
     queryset = ProcessData.objects.filter(is_deleted=False).order_by('-created_at')
+    conditional_dependencies = (ProcessTemplate, User, ParameterValue, ProcessParameter)
+    export_serializer_class = ProcessDataValuesSerializer
+    # 每条工艺数据带全部参数值，按较小的块导出
+    export_chunk_size = 500
+    import_chunk_size = 2000
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProcessDataParameterFilter, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['template']
     search_fields = ['code', 'name', 'batch_number', 'operator__username']
     ordering_fields = ['code', 'name', 'created_at', 'updated_at']
     
+    read_plan = {
+        'select_related': ['template', 'operator'],
+        'prefetch_related': ['parameter_values__parameter'],
+    }
+    query_plans = {
+        'list': read_plan,
+        'retrieve': read_plan,
+        'search': read_plan,
+        'changes': read_plan,
+    }
+    
     def get_serializer_class(self):
         if self.action == 'create':
             return ProcessDataCreateSerializer
         return ProcessDataSerializer
     
+    def perform_content_negotiation(self, request, force=False):
+        # 导入进度固定以 NDJSON 流返回
+        return super().perform_content_negotiation(request, force=force or self.action == 'import_csv')
+    
+    @action(detail=False, methods=['post'], url_path='import', url_name='import', parser_classes=[MultiPartParser])
+    def import_csv(self, request):
+        """
+        流式导入 CSV（列格式见 imports.py）：multipart 表单的 file 为 CSV 文件，template 为模板ID或编码，
+        encoding 可选（默认 UTF-8，兼容 BOM）。参数或表头错误返回 400；否则以 NDJSON 逐块返回进度，
+        每行 {rows, created, failed, errors}，最后一行为汇总 {done: true, rows, created, failed, seconds}，
+        读取文件中途出错时最后一行为 {done: true, error: [...]}
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': '请上传 CSV 文件（file）'}, status=status.HTTP_400_BAD_REQUEST)
+        entry = find_entry(request.data.get('template', ''))
+        if entry is None:
+            return Response({'error': '模板不存在'}, status=status.HTTP_400_BAD_REQUEST)
+        encoding = request.data.get('encoding') or 'utf-8-sig'
+        try:
+            codecs.lookup(encoding)
+            progress = import_process_data(entry, open_csv(upload.file, encoding), self.import_chunk_size)
+        except LookupError:
+            return Response({'error': f'不支持的编码: {encoding}'}, status=status.HTTP_400_BAD_REQUEST)
+        except ImportFileError as exc:
+            return Response({'error': exc.messages}, status=status.HTTP_400_BAD_REQUEST)
+        
+        def stream():
+            try:
+                for item in progress:
+                    yield (json.dumps(item, ensure_ascii=False) + '\n').encode('utf-8')
+            except ImportFileError as exc:
+                yield (json.dumps({'done': True, 'error': exc.messages}, ensure_ascii=False) + '\n').encode('utf-8')
+            finally:
+                upload.close()
+        
+        return StreamingHttpResponse(stream(), content_type='application/x-ndjson; charset=utf-8')
+    
     def perform_destroy(self, instance):
         """软删除"""
         instance.is_deleted = True
@@ -207,15 +630,19 @@ class ProcessDataViewSet(viewsets.ModelViewSet):
         
         queryset = self.get_queryset()
         
-        # 关键词搜索
+        # 关键词搜索：按全文检索索引过滤并按相关度排序；关键词切分不出词元时按各字段 icontains 过滤
         if keyword:
-            queryset = queryset.filter(
-                Q(code__icontains=keyword) |
-                Q(name__icontains=keyword) |
-                Q(batch_number__icontains=keyword) |
-                Q(operator__username__icontains=keyword) |
-                Q(remark__icontains=keyword)
-            )
+            indexed = filter_by_search(queryset, keyword)
+            if indexed is not None:
+                queryset = annotate_search_score(indexed, keyword).order_by('-search_score', '-created_at')
+            else:
+                queryset = queryset.filter(
+                    Q(code__icontains=keyword) |
+                    Q(name__icontains=keyword) |
+                    Q(batch_number__icontains=keyword) |
+                    Q(operator__username__icontains=keyword) |
+                    Q(remark__icontains=keyword)
+                )
         
         # 按模板筛选
         if template_id:
@@ -238,12 +665,13 @@ class ProcessDataViewSet(viewsets.ModelViewSet):
 
 # 复合材料加工相关视图集
 
-class ToolViewSet(viewsets.ModelViewSet):
+class ToolViewSet(ConditionalGetMixin, ChangeFeedMixin, ResponseCacheMixin, viewsets.ModelViewSet):
     """刀具视图集"""
     queryset = Tool.objects.filter(is_deleted=False).order_by('code')
+    cache_dependencies = (Tool,)
     serializer_class = ToolSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]  # 使用自定义权限类
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['tool_type', 'current_status']
     search_fields = ['code', 'tool_type', 'tool_spec', 'description']
     ordering_fields = ['code', 'tool_type', 'created_at']
@@ -257,7 +685,7 @@ class ToolViewSet(viewsets.ModelViewSet):
     def wear_records(self, request, pk=None):
         """获取刀具磨损记录"""
         tool = self.get_object()
-        wear_records = ToolWearRecord.objects.filter(tool=tool).order_by('-record_time')
+        wear_records = ToolWearRecord.objects.filter(tool=tool).select_related('tool').order_by('-record_time')
         page = self.paginate_queryset(wear_records)
         if page is not None:
             serializer = ToolWearRecordSerializer(page, many=True)
@@ -266,12 +694,13 @@ class ToolViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class CompositeMaterialViewSet(viewsets.ModelViewSet):
+class CompositeMaterialViewSet(ConditionalGetMixin, ChangeFeedMixin, ResponseCacheMixin, viewsets.ModelViewSet):
     """复合材料构件视图集"""
     queryset = CompositeMaterial.objects.filter(is_deleted=False).order_by('part_number')
+    cache_dependencies = (CompositeMaterial,)
     serializer_class = CompositeMaterialSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['material_type']
     search_fields = ['part_number', 'description']
     ordering_fields = ['part_number', 'material_type', 'thickness']
@@ -282,15 +711,44 @@ class CompositeMaterialViewSet(viewsets.ModelViewSet):
         instance.save()
 
 
-class ProcessingTaskViewSet(viewsets.ModelViewSet):
+class ProcessingTaskViewSet(ConditionalGetMixin, ChangeFeedMixin, BulkCreateMixin, ExportMixin, FastListMixin,
+                            QueryPlanMixin, viewsets.ModelViewSet):
     """加工任务视图集"""
     queryset = ProcessingTask.objects.filter(is_deleted=False).order_by('-processing_time')
+    conditional_dependencies = (
+        Tool, CompositeMaterial, User, TaskGroup, ProcessingParameter,
+        SensorData, ProcessingQuality, ToolWearRecord,
+    )
+    pagination_class = SwitchablePagination
+    bulk_serializer_class = ProcessingTaskBulkSerializer
+    change_feed_serializer_class = ProcessingTaskListSerializer
+    fast_list_serializer_class = ProcessingTaskListValuesSerializer
+    export_serializer_class = ProcessingTaskListValuesSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, ProcessingTaskParameterFilter, IndexedSearchFilter,
+                       filters.OrderingFilter]
     filterset_fields = ['processing_type', 'status', 'tool', 'composite_material', 'group']
     search_fields = ['task_code', 'operator__username', 'notes']
     ordering_fields = ['processing_time', 'status']
     
+    list_plan = {
+        'select_related': ['tool', 'composite_material', 'operator', 'group'],
+        'prefetch_related': ['parameters'],
+    }
+    query_plans = {
+        'list': list_plan,
+        'changes': list_plan,
+        'retrieve': {
+            'select_related': ['tool', 'composite_material', 'operator'],
+            'prefetch_related': [
+                'parameters',
+                'sensor_data',
+                'quality_records__inspector',
+                'tool_wear_records__tool',
+            ],
+        },
+    }
+    
     def get_serializer_class(self):
         if self.action == 'list':
             return ProcessingTaskListSerializer
@@ -307,24 +765,134 @@ class ProcessingTaskViewSet(viewsets.ModelViewSet):
     def clone(self, request, pk=None):
         """克隆一个加工任务及其所有关联参数"""
         original_task = self.get_object()
+        cloned_task = self.clone_tasks([original_task], ' (复制)')[0]
+        serializer = self.get_serializer(cloned_task)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'], url_path='batch-clone')
+    def batch_clone(self, request):
+        """
+        批量复制加工任务
+        task_ids（任务ID列表）与 source_group（源分组ID，复制该组下全部任务）二选一；
+        target_group 为目标分组ID，null 表示未分组，省略则保留原分组
+        """
+        task_ids = request.data.get('task_ids')
+        source_group = request.data.get('source_group')
+        if (task_ids is None) == (source_group is None):
+            return Response({'error': '请提供 task_ids 或 source_group 其中之一'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        queryset = ProcessingTask.objects.filter(is_deleted=False)
+        try:
+            if task_ids is not None:
+                if not isinstance(task_ids, list) or not task_ids:
+                    raise ValueError
+                # 重复的ID只复制一次，保持提交顺序
+                task_ids = list(dict.fromkeys(int(task_id) for task_id in task_ids))
+                tasks_by_id = queryset.in_bulk(task_ids)
+                missing = [task_id for task_id in task_ids if task_id not in tasks_by_id]
+                if missing:
+                    return Response({'error': f'任务不存在: {missing}'}, status=status.HTTP_400_BAD_REQUEST)
+                tasks = [tasks_by_id[task_id] for task_id in task_ids]
+            else:
+                tasks = list(queryset.filter(group_id=int(source_group)).order_by('processing_time', 'id'))
+        except (TypeError, ValueError):
+            return Response({'error': 'task_ids 必须是任务ID列表，source_group 必须是分组ID'},
+                            status=status.HTTP_400_BAD_REQUEST)
         
-        # 复制任务主体
-        cloned_task = original_task
-        cloned_task.pk = None
-        cloned_task.id = None
-        cloned_task.task_code = f"{original_task.task_code} (复制)"
-        cloned_task.status = 'planned' # 克隆出的任务默认为计划中
-        cloned_task.save()
+        overrides = {}
+        if 'target_group' in request.data:
+            target_group = request.data['target_group']
+            if target_group is not None:
+                groups = TaskGroup.objects.all()
+                # 与任务组接口一致，普通用户只能使用自己创建的组
+                if not request.user.is_staff:
+                    groups = groups.filter(created_by=request.user)
+                try:
+                    target_group = int(target_group)
+                    if not groups.filter(pk=target_group).exists():
+                        raise ValueError
+                except (TypeError, ValueError):
+                    return Response({'error': '目标分组不存在'}, status=status.HTTP_400_BAD_REQUEST)
+            overrides['group_id'] = target_group
         
-        # 复制关联的加工参数
-        for param in original_task.parameters.all():
-            param.pk = None
-            param.id = None
-            param.task = cloned_task
-            param.save()
+        suffix = timezone.localtime().strftime('-Copy-%y%m%d%H%M%S')
+        cloned_tasks = self.clone_tasks(tasks, suffix, **overrides)
+        return Response({
+            'count': len(cloned_tasks),
+            'ids': [task.id for task in cloned_tasks],
+            'id_map': {str(task.id): cloned.id for task, cloned in zip(tasks, cloned_tasks)},
+        }, status=status.HTTP_201_CREATED)
+    
+    @classmethod
+    def clone_tasks(cls, tasks, code_suffix, **overrides):
+        """
+        在一个事务内批量复制任务及其加工参数，新任务编码为原编码加后缀，状态重置为计划中
+        返回与 tasks 顺序一致的新任务列表
+        """
+        if not tasks:
+            return []
+        excluded = {'id', 'task_code', 'status', 'created_at', 'updated_at'}
+        field_names = [field.attname for field in ProcessingTask._meta.concrete_fields
+                       if field.name not in excluded]
+        
+        with transaction.atomic():
+            codes = cls._unique_clone_codes(tasks, code_suffix)
+            clones = []
+            for task, code in zip(tasks, codes):
+                values = {name: getattr(task, name) for name in field_names}
+                values.update(overrides)
+                clones.append(ProcessingTask(task_code=code, status='planned', **values))
+            clones = ProcessingTask.objects.bulk_create(clones)
             
-        serializer = self.get_serializer(cloned_task)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+            # 部分数据库（如 MySQL）批量插入后不回填主键，按任务编码补查
+            if any(clone.pk is None for clone in clones):
+                pk_map = dict(ProcessingTask.objects.filter(task_code__in=codes).values_list('task_code', 'pk'))
+                for clone in clones:
+                    clone.pk = pk_map[clone.task_code]
+            
+            # 同一源任务可能被复制多次，每个副本都复制其参数
+            clones_by_source = defaultdict(list)
+            for task, clone in zip(tasks, clones):
+                clones_by_source[task.id].append(clone)
+            ProcessingParameter.objects.bulk_create([
+                ProcessingParameter(
+                    task=clone,
+                    parameter_name=param.parameter_name,
+                    parameter_value=param.parameter_value,
+                    unit=param.unit,
+                )
+                for param in ProcessingParameter.objects.filter(task_id__in=clones_by_source).order_by('id')
+                for clone in clones_by_source[param.task_id]
+            ], batch_size=500)
+            # bulk_create 不发送 post_save 信号
+            schedule_search_index(ProcessingTask, [clone.pk for clone in clones])
+            invalidate_model_cache(ProcessingTask)
+        return clones
+    
+    @staticmethod
+    def _unique_clone_codes(tasks, suffix):
+        """生成不重复的克隆任务编码，原编码按 task_code 最大长度截断；与已有编码冲突时追加序号"""
+        max_length = ProcessingTask._meta.get_field('task_code').max_length
+        codes = [None] * len(tasks)
+        taken = set()
+        pending = list(range(len(tasks)))
+        attempt = 1
+        while pending:
+            tail = suffix if attempt == 1 else f'{suffix}-{attempt}'
+            candidates = {index: tasks[index].task_code[:max_length - len(tail)] + tail for index in pending}
+            taken.update(ProcessingTask.objects.filter(
+                task_code__in=candidates.values()
+            ).values_list('task_code', flat=True))
+            pending = []
+            for index, code in candidates.items():
+                if code in taken:
+                    pending.append(index)
+                else:
+                    codes[index] = code
+                    taken.add(code)
+            attempt += 1
+        return codes
     
     @action(detail=True, methods=['get'])
     def parameters(self, request, pk=None):
@@ -338,7 +906,9 @@ class ProcessingTaskViewSet(viewsets.ModelViewSet):
     def sensor_data(self, request, pk=None):
         """获取加工任务传感器数据"""
         task = self.get_object()
-        sensor_data = SensorData.objects.filter(processing_task=task).order_by('upload_time')
+        sensor_data = SensorData.objects.filter(processing_task=task).select_related(
+            'processing_task'
+        ).order_by('upload_time')
         
         # 支持按传感器类型过滤
         sensor_type = request.query_params.get('sensor_type', None)
@@ -365,7 +935,9 @@ class ProcessingTaskViewSet(viewsets.ModelViewSet):
     def quality(self, request, pk=None):
         """获取加工质量记录"""
         task = self.get_object()
-        quality_records = ProcessingQuality.objects.filter(processing_task=task).order_by('-inspection_time')
+        quality_records = ProcessingQuality.objects.filter(processing_task=task).select_related(
+            'inspector'
+        ).order_by('-inspection_time')
         serializer = ProcessingQualitySerializer(quality_records, many=True)
         return Response(serializer.data)
     
@@ -373,20 +945,34 @@ class ProcessingTaskViewSet(viewsets.ModelViewSet):
     def tool_wear(self, request, pk=None):
         """获取刀具磨损记录"""
         task = self.get_object()
-        wear_records = ToolWearRecord.objects.filter(processing_task=task).order_by('-record_time')
+        wear_records = ToolWearRecord.objects.filter(processing_task=task).select_related(
+            'tool'
+        ).order_by('-record_time')
         serializer = ToolWearRecordSerializer(wear_records, many=True)
         return Response(serializer.data)
 
 
-class SensorDataViewSet(viewsets.ModelViewSet):
+class SensorDataViewSet(ConditionalGetMixin, BulkCreateMixin, FastListMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """传感器数据视图集"""
     queryset = SensorData.objects.filter(is_deleted=False).order_by('-upload_time')
+    conditional_dependencies = (ProcessingTask,)
+    pagination_class = SwitchablePagination
+    bulk_serializer_class = SensorDataBulkSerializer
+    fast_list_serializer_class = SensorDataValuesSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, IndexedSearchFilter, filters.OrderingFilter]
     filterset_fields = ['sensor_type', 'processing_task']
     search_fields = ['sensor_id', 'processing_task__task_code', 'file_name']
     ordering_fields = ['upload_time', 'file_size']
     
+    read_plan = {'select_related': ['processing_task']}
+    query_plans = {
+        'list': read_plan,
+        'retrieve': read_plan,
+        'update': read_plan,
+        'partial_update': read_plan,
+    }
+    
     def get_serializer_class(self):
         """根据操作类型返回合适的序列化器"""
         if self.action == 'create':
@@ -413,26 +999,47 @@ class SensorDataViewSet(viewsets.ModelViewSet):
         return Response(return_serializer.data)
 
 
-class ProcessingQualityViewSet(viewsets.ModelViewSet):
+class ProcessingQualityViewSet(ConditionalGetMixin, ExportMixin, FastListMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """加工质量视图集"""
     queryset = ProcessingQuality.objects.filter(is_deleted=False).order_by('-inspection_time')
+    conditional_dependencies = (User,)
     serializer_class = ProcessingQualitySerializer
+    fast_list_serializer_class = ProcessingQualityValuesSerializer
+    export_serializer_class = ProcessingQualityValuesSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['defect_type', 'processing_task']
     search_fields = ['inspector__username', 'processing_task__task_code']
     ordering_fields = ['inspection_time', 'surface_roughness', 'dimensional_tolerance']
+    
+    read_plan = {'select_related': ['inspector']}
+    query_plans = {
+        'list': read_plan,
+        'retrieve': read_plan,
+    }
 
 
-class ToolWearRecordViewSet(viewsets.ModelViewSet):
+class ToolWearRecordViewSet(ConditionalGetMixin, BulkCreateMixin, ExportMixin, FastListMixin, QueryPlanMixin,
+                            viewsets.ModelViewSet):
     """刀具磨损记录视图集"""
     queryset = ToolWearRecord.objects.filter(is_deleted=False).order_by('-record_time')
+    conditional_dependencies = (Tool,)
     serializer_class = ToolWearRecordSerializer
+    pagination_class = SwitchablePagination
+    bulk_serializer_class = ToolWearRecordBulkSerializer
+    fast_list_serializer_class = ToolWearRecordValuesSerializer
+    export_serializer_class = ToolWearRecordValuesSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['tool', 'processing_task']
     search_fields = ['tool__code', 'processing_task__task_code']
     ordering_fields = ['record_time', 'wear_value']
+    
+    read_plan = {'select_related': ['tool']}
+    query_plans = {
+        'list': read_plan,
+        'retrieve': read_plan,
+    }
 
 
 @method_decorator(csrf_exempt, name='dispatch')
@@ -512,19 +1119,216 @@ class UserInfoView(views.APIView):
             return Response({"error": f"设置人员关联失败: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class TaskGroupViewSet(viewsets.ModelViewSet):
+class DashboardSummaryView(views.APIView):
+    """
+    看板统计视图
+    一次请求返回任务总数及各状态数量、待处理任务数、传感器文件统计和最近活动，
+    全部由数据库聚合得出，并在服务端短暂缓存。
+    用户数只返回给管理员（与用户列表接口的权限一致），管理员与普通用户的统计分别缓存
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    cache_key = 'process_data:dashboard_summary'
+    recent_activity_limit = 5
+
+    def get(self, request, *args, **kwargs):
+        include_user_count = request.user.is_staff
+        cache_key = f'{self.cache_key}:staff' if include_user_count else self.cache_key
+        summary = cache.get(cache_key)
+        if summary is None:
+            summary = self.build_summary(include_user_count)
+            cache.set(cache_key, summary, getattr(settings, 'DASHBOARD_SUMMARY_CACHE_TIMEOUT', 15))
+        return Response(summary)
+
+    def build_summary(self, include_user_count=False):
+        """使用聚合查询构建看板统计数据"""
+        tasks = ProcessingTask.objects.filter(is_deleted=False)
+        status_display = dict(ProcessingTask.TASK_STATUS_CHOICES)
+
+        status_counts = {key: 0 for key in status_display}
+        for row in tasks.order_by().values('status').annotate(count=Count('id')):
+            status_counts[row['status']] = row['count']
+
+        sensor_stats = SensorData.objects.filter(is_deleted=False).aggregate(
+            count=Count('id'), total_size=Sum('file_size')
+        )
+
+        recent_activities = [
+            {
+                'id': task['id'],
+                'task_code': task['task_code'],
+                'status': task['status'],
+                'status_display': status_display.get(task['status'], task['status']),
+                'updated_at': task['updated_at'],
+            }
+            for task in tasks.order_by('-updated_at').values(
+                'id', 'task_code', 'status', 'updated_at'
+            )[:self.recent_activity_limit]
+        ]
+
+        summary = {
+            'task_count': sum(status_counts.values()),
+            'status_counts': status_counts,
+            'pending_count': status_counts['planned'] + status_counts['in_progress'],
+            'sensor_data': {
+                'count': sensor_stats['count'],
+                'total_size': sensor_stats['total_size'] or 0,
+            },
+            'recent_activities': recent_activities,
+            'generated_at': timezone.now(),
+        }
+        if include_user_count:
+            summary['user_count'] = get_user_model().objects.count()
+        return summary
+
+
+class SearchView(views.APIView):
+    """
+    全局检索视图
+    GET /api/search/?q=<关键词>&types=processdata,processingtask&limit=20 在工艺数据、加工任务、刀具、复合材料构件
+    和传感器文件中检索，按相关度降序返回 {type, id, score, title, subtitle}；types 省略时检索全部类型
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    default_limit = 20
+    max_limit = 100
+
+    def get(self, request, *args, **kwargs):
+        text = request.query_params.get('q', '').strip()
+        types = [name for name in request.query_params.get('types', '').split(',') if name]
+        unknown = [name for name in types if name not in SEARCH_TARGETS]
+        if unknown:
+            return Response({'error': f'不支持的检索类型: {", ".join(unknown)}'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', self.default_limit)), self.max_limit)
+        except ValueError:
+            limit = 0
+        if limit < 1:
+            return Response({'error': 'limit 必须是正整数'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({'query': text, 'results': search(text, types or None, limit) if text else []})
+
+
+class BatchView(views.APIView):
+    """
+    批量请求视图
+    POST 一组 GET 子请求 [{"path": "tools/", "params": {...}, "headers": {...}}, ...]，
+    在同一进程内依次分发到对应视图并复用本次请求的认证信息，按顺序返回
+    [{"status": ..., "headers": {...}, "body": ...}, ...]。
+    path 可以是以 / 开头的完整路径，也可以是相对于本接口所在前缀的路径；
+    headers 目前只转发 If-None-Match，子请求返回 304 时 body 为 null；
+    返回流式响应的子请求（导出等）不返回内容，该项返回 400
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    max_requests = 20
+    forwarded_headers = {'If-None-Match': 'HTTP_IF_NONE_MATCH'}
+    returned_headers = ('ETag', 'Last-Modified')
+    # 不转发给子请求的父请求头
+    dropped_meta = ('CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+    def post(self, request, *args, **kwargs):
+        sub_requests = request.data
+        if not isinstance(sub_requests, list):
+            return Response({'error': '请求体必须是子请求列表'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(sub_requests) > self.max_requests:
+            return Response({'error': f'单次最多包含 {self.max_requests} 个子请求'},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        prefix = request.path[:-len('batch/')] if request.path.endswith('batch/') else '/'
+        return Response([self.dispatch_sub_request(request, item, prefix) for item in sub_requests])
+
+    def dispatch_sub_request(self, request, item, prefix):
+        """执行单个子请求，返回 {'status', 'headers', 'body'}"""
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            return {'status': 400, 'headers': {}, 'body': {'error': '子请求必须包含 path'}}
+        if str(item.get('method', 'GET')).upper() != 'GET':
+            return {'status': 405, 'headers': {}, 'body': {'error': '批量请求只支持 GET'}}
+
+        path = item['path'].split('?', 1)[0]
+        if not path.startswith('/'):
+            path = prefix + path
+        try:
+            match = resolve(path)
+        except Resolver404:
+            return {'status': 404, 'headers': {}, 'body': {'error': f'路径不存在: {path}'}}
+        if match.url_name == 'api_batch':
+            return {'status': 400, 'headers': {}, 'body': {'error': '不能嵌套批量请求'}}
+
+        sub_request = self.build_sub_request(request, path, item)
+        sub_request.resolver_match = match
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+        except Exception as e:
+            logger.error(f"批量子请求执行失败 {path}: {e}", exc_info=True)
+            return {'status': 500, 'headers': {}, 'body': {'error': '服务器内部错误'}}
+        if response.streaming:
+            # 导出等流式响应的内容无法放进批量响应，关闭以释放生成器占用的查询
+            response.close()
+            return {'status': 400, 'headers': {}, 'body': {'error': f'批量请求不支持流式响应: {path}'}}
+
+        headers = {name: response[name] for name in self.returned_headers if response.has_header(name)}
+        if hasattr(response, 'data'):
+            body = response.data
+        elif response.get('Content-Type', '').startswith('application/json'):
+            body = json.loads(response.content or b'null')
+        else:
+            body = response.content.decode(response.charset or 'utf-8')
+        return {'status': response.status_code, 'headers': headers, 'body': body}
+
+    def build_sub_request(self, request, path, item):
+        """基于父请求构造子请求，复用会话与已认证的用户"""
+        parent = request._request
+        query_string = urlencode(item.get('params') or {}, doseq=True)
+
+        meta = {key: value for key, value in parent.META.items() if key not in self.dropped_meta}
+        meta.update({'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': query_string})
+        for name, value in (item.get('headers') or {}).items():
+            if name in self.forwarded_headers:
+                meta[self.forwarded_headers[name]] = value
+
+        sub_request = HttpRequest()
+        sub_request.method = 'GET'
+        sub_request.path = sub_request.path_info = path
+        sub_request.META = meta
+        sub_request.GET = QueryDict(query_string)
+        sub_request.COOKIES = parent.COOKIES
+        sub_request.session = getattr(parent, 'session', None)
+        # SessionAuthentication 直接使用已认证的用户，不再重复认证
+        sub_request.user = request.user
+        return sub_request
+
+
+class TaskGroupViewSet(ConditionalGetMixin, ResponseCacheMixin, QueryPlanMixin, viewsets.ModelViewSet):
     """任务组视图集"""
     queryset = TaskGroup.objects.all().order_by('-created_at')
+    # 列表包含创建者与各状态任务数量
+    cache_dependencies = (TaskGroup, ProcessingTask, User)
     serializer_class = TaskGroupSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description']
+    
+    # 任务数量及各状态数量统计，与分组在同一条聚合查询中取出
+    task_count_annotations = {
+        'task_count': Count('tasks', filter=Q(tasks__is_deleted=False)),
+        'planned_count': Count('tasks', filter=Q(tasks__is_deleted=False, tasks__status='planned')),
+        'in_progress_count': Count('tasks', filter=Q(tasks__is_deleted=False, tasks__status='in_progress')),
+        'completed_count': Count('tasks', filter=Q(tasks__is_deleted=False, tasks__status='completed')),
+    }
+    read_plan = {
+        'select_related': ['created_by'],
+        'annotate': task_count_annotations,
+    }
+    query_plans = {
+        'list': read_plan,
+        'retrieve': read_plan,
+        'with_tasks': {'select_related': ['created_by']},
+    }
 
     def get_queryset(self):
+        queryset = super().get_queryset()
         # 普通用户只能看到自己创建的组
         if not self.request.user.is_staff:
-            return self.queryset.filter(created_by=self.request.user)
-        return self.queryset
+            return queryset.filter(created_by=self.request.user)
+        return queryset
 
     @action(detail=False, methods=['get'])
     def with_tasks(self, request):
@@ -536,16 +1340,18 @@ class TaskGroupViewSet(viewsets.ModelViewSet):
             # 获取所有任务分组
             groups = self.get_queryset()
             
-            # 获取所有未删除的任务
+            # 一次查询取出所有未删除的任务，并在内存中按分组归类
             tasks = ProcessingTask.objects.filter(is_deleted=False).select_related(
-                'tool', 'composite_material', 'operator', 'group'
+                'tool', 'composite_material', 'operator'
             )
+            tasks_by_group = defaultdict(list)
+            for task in tasks:
+                tasks_by_group[task.group_id].append(self._build_tree_task_data(task))
             
             # 构建返回数据结构
             groups_data = []
             for group in groups:
-                group_tasks = tasks.filter(group=group)
-                group_data = {
+                groups_data.append({
                     'id': group.id,
                     'name': group.name,
                     'description': group.description,
@@ -555,47 +1361,10 @@ class TaskGroupViewSet(viewsets.ModelViewSet):
                         'full_name': group.created_by.get_full_name() or group.created_by.username
                     } if group.created_by else None,
                     'created_at': group.created_at,
-                    'tasks': []
-                }
-                
-                # 添加该分组下的任务
-                for task in group_tasks:
-                    task_data = {
-                        'id': task.id,
-                        'task_code': task.task_code,
-                        'processing_type': task.processing_type,
-                        'processing_type_display': task.get_processing_type_display(),
-                        'status': task.status,
-                        'status_display': task.get_status_display(),
-                        'processing_time': task.processing_time,
-                        'duration': task.duration,
-                        'notes': task.notes,
-                        'created_at': task.created_at,
-                        'updated_at': task.updated_at,
-                        'tool_info': {
-                            'id': task.tool.id,
-                            'code': task.tool.code,
-                            'tool_type': task.tool.tool_type,
-                            'tool_spec': task.tool.tool_spec
-                        } if task.tool else None,
-                        'material_info': {
-                            'id': task.composite_material.id,
-                            'part_number': task.composite_material.part_number,
-                            'material_type': task.composite_material.material_type,
-                            'material_type_display': task.composite_material.get_material_type_display()
-                        } if task.composite_material else None,
-                        'operator_info': {
-                            'id': task.operator.id,
-                            'username': task.operator.username,
-                            'full_name': task.operator.get_full_name() or task.operator.username
-                        } if task.operator else None
-                    }
-                    group_data['tasks'].append(task_data)
-                
-                groups_data.append(group_data)
+                    'tasks': tasks_by_group.get(group.id, [])
+                })
             
-            # 获取未分组的任务
-            unassigned_tasks = tasks.filter(group__isnull=True)
+            # 未分组的任务
             unassigned_data = {
                 'id': None,
                 'name': '未归档任务',
@@ -603,42 +1372,9 @@ class TaskGroupViewSet(viewsets.ModelViewSet):
                 'created_by': None,
                 'created_at': None,
                 'is_default': True,
-                'tasks': []
+                'tasks': tasks_by_group.get(None, [])
             }
             
-            for task in unassigned_tasks:
-                task_data = {
-                    'id': task.id,
-                    'task_code': task.task_code,
-                    'processing_type': task.processing_type,
-                    'processing_type_display': task.get_processing_type_display(),
-                    'status': task.status,
-                    'status_display': task.get_status_display(),
-                    'processing_time': task.processing_time,
-                    'duration': task.duration,
-                    'notes': task.notes,
-                    'created_at': task.created_at,
-                    'updated_at': task.updated_at,
-                    'tool_info': {
-                        'id': task.tool.id,
-                        'code': task.tool.code,
-                        'tool_type': task.tool.tool_type,
-                        'tool_spec': task.tool.tool_spec
-                    } if task.tool else None,
-                    'material_info': {
-                        'id': task.composite_material.id,
-                        'part_number': task.composite_material.part_number,
-                        'material_type': task.composite_material.material_type,
-                        'material_type_display': task.composite_material.get_material_type_display()
-                    } if task.composite_material else None,
-                    'operator_info': {
-                        'id': task.operator.id,
-                        'username': task.operator.username,
-                        'full_name': task.operator.get_full_name() or task.operator.username
-                    } if task.operator else None
-                }
-                unassigned_data['tasks'].append(task_data)
-            
             # 将未分组任务添加到结果开头
             result_data = [unassigned_data] + groups_data
             
@@ -655,6 +1391,40 @@ class TaskGroupViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    @staticmethod
+    def _build_tree_task_data(task):
+        """构建树状图中单个任务节点的数据"""
+        return {
+            'id': task.id,
+            'task_code': task.task_code,
+            'processing_type': task.processing_type,
+            'processing_type_display': task.get_processing_type_display(),
+            'status': task.status,
+            'status_display': task.get_status_display(),
+            'processing_time': task.processing_time,
+            'duration': task.duration,
+            'notes': task.notes,
+            'created_at': task.created_at,
+            'updated_at': task.updated_at,
+            'tool_info': {
+                'id': task.tool.id,
+                'code': task.tool.code,
+                'tool_type': task.tool.tool_type,
+                'tool_spec': task.tool.tool_spec
+            } if task.tool else None,
+            'material_info': {
+                'id': task.composite_material.id,
+                'part_number': task.composite_material.part_number,
+                'material_type': task.composite_material.material_type,
+                'material_type_display': task.composite_material.get_material_type_display()
+            } if task.composite_material else None,
+            'operator_info': {
+                'id': task.operator.id,
+                'username': task.operator.username,
+                'full_name': task.operator.get_full_name() or task.operator.username
+            } if task.operator else None
+        }
+
     def perform_destroy(self, instance):
         # 检查组内是否有任务
         if instance.tasks.exists():
@@ -1,23 +1,44 @@
+import threading
+from collections import OrderedDict
+
 import requests
 from ..common import config
 
+try:
+    import msgpack
+except ImportError:  # 可选依赖，未安装时使用 JSON
+    msgpack = None
+
 # API 服务器的基础URL
 API_BASE_URL = "http://127.0.0.1:8000/api"
 
+# 条件请求缓存的最大条目数（按完整URL计）
+VALIDATOR_CACHE_SIZE = 256
+
 
 class ApiClient:
     """ 一个使用会话来处理认证的API客户端 """
 
+    # 一次增量同步最多请求的批次数，防止服务端游标不前进时无限循环
+    MAX_CHANGE_BATCHES = 1000
+
     def __init__(self):
         self.session = requests.Session()
         self.csrf_token = None
         self.current_user = None
         
+        # 条件请求缓存：完整URL -> (ETag, 响应数据)，服务端返回 304 时直接复用响应数据
+        self._validator_cache = OrderedDict()
+        self._validator_lock = threading.Lock()
+        
         # 性能优化配置
         self.session.headers.update({
             'Connection': 'keep-alive',  # 保持连接
             'Accept-Encoding': 'gzip, deflate',  # 启用压缩
         })
+        if msgpack is not None:
+            # 优先请求更紧凑的 MessagePack 格式，服务端不支持时按内容协商返回 JSON
+            self.session.headers['Accept'] = 'application/msgpack, application/json;q=0.9'
         
         # 设置适配器以支持连接池
         from requests.adapters import HTTPAdapter
@@ -50,18 +71,21 @@ class ApiClient:
             response = self.session.post(login_url, json={'username': username, 'password': password})
             
             if response.status_code == 200:
+                # 切换用户后不能复用上一个用户的条件请求缓存
+                self.clear_validator_cache()
+                
                 # 登录成功，保存CSRF令牌（如果有）
                 if 'csrftoken' in self.session.cookies:
                     self.csrf_token = self.session.cookies['csrftoken']
                 
                 # 保存当前用户信息
-                self.current_user = response.json()
+                self.current_user = self._decode_response(response)
                 is_superuser = self.current_user.get('is_superuser', False)
                 config.set_admin_status(is_superuser)
                 return True, "登录成功"
             
             # 从响应中获取更详细的错误信息
-            error_message = response.json().get('error', '未知错误')
+            error_message = self._decode_response(response).get('error', '未知错误')
             return False, error_message
 
         except requests.exceptions.RequestException as e:
@@ -69,14 +93,28 @@ class ApiClient:
             return False, f"网络错误，请检查后端服务是否运行。"
 
     def _request(self, method, endpoint, **kwargs):
-        """ 使用会话封装请求逻辑 """
-        url = f"{API_BASE_URL}/{endpoint}/"
+        """
+        使用会话封装请求逻辑，endpoint 也可以是服务端返回的完整URL（如分页的 next 链接）
+        GET 请求会携带上次响应的 ETag（If-None-Match），服务端返回 304 时直接复用上次的响应数据
+        """
+        if endpoint.startswith(('http://', 'https://')):
+            url = endpoint
+        else:
+            url = f"{API_BASE_URL}/{endpoint}/"
         
         # 添加CSRF令牌到所有请求的头部
         headers = kwargs.pop('headers', {})
         if self.csrf_token:
             headers['X-CSRFToken'] = self.csrf_token
         
+        cache_key = None
+        cached = None
+        if method.lower() == 'get':
+            cache_key = self._validator_cache_key(url, kwargs.get('params'))
+            cached = self._get_validator(cache_key)
+            if cached:
+                headers['If-None-Match'] = cached[0]
+        
         if headers:
             kwargs['headers'] = headers
             
@@ -84,14 +122,190 @@ class ApiClient:
             # session对象会自动发送cookies
             response = self.session.request(method, url, **kwargs)
             
+            if response.status_code == 304 and cached:
+                return cached[1]
             response.raise_for_status()
             if response.status_code == 204:  # No Content for DELETE
                 return True
-            return response.json()
+            data = self._decode_response(response)
+            if cache_key and response.headers.get('ETag'):
+                self._set_validator(cache_key, response.headers['ETag'], data)
+            return data
         except requests.exceptions.RequestException as e:
             print(f"API Error ({method.upper()} {url}): {e}")
             return None
 
+    @staticmethod
+    def _decode_response(response):
+        """ 按响应的 Content-Type 解码响应体，支持 MessagePack 与 JSON """
+        content_type = response.headers.get('Content-Type', '')
+        if msgpack is not None and content_type.startswith('application/msgpack'):
+            return msgpack.unpackb(response.content, raw=False, strict_map_key=False)
+        return response.json()
+
+    @staticmethod
+    def _validator_cache_key(url, params):
+        """ 以带查询参数的完整URL作为条件请求缓存的键 """
+        prepared = requests.models.PreparedRequest()
+        prepared.prepare_url(url, params)
+        return prepared.url
+
+    def _get_validator(self, key):
+        with self._validator_lock:
+            entry = self._validator_cache.get(key)
+            if entry is not None:
+                self._validator_cache.move_to_end(key)
+            return entry
+
+    def _set_validator(self, key, etag, data):
+        with self._validator_lock:
+            self._validator_cache[key] = (etag, data)
+            self._validator_cache.move_to_end(key)
+            while len(self._validator_cache) > VALIDATOR_CACHE_SIZE:
+                self._validator_cache.popitem(last=False)
+
+    def clear_validator_cache(self):
+        """ 清空条件请求缓存 """
+        with self._validator_lock:
+            self._validator_cache.clear()
+
+    def _bulk_create(self, endpoint, items, upsert=False):
+        """
+        调用批量创建接口，整批在服务端一个事务内写入
+        成功返回 {'count': ..., 'ids': [...]}；校验失败返回 {'errors': [...]}（与提交顺序一一对应，整批未写入）；
+        其他错误返回 None
+        """
+        params = {'upsert': 'true'} if upsert else None
+        headers = {'X-CSRFToken': self.csrf_token} if self.csrf_token else {}
+        url = f"{API_BASE_URL}/{endpoint}/bulk/"
+        try:
+            response = self.session.post(url, json=list(items), params=params, headers=headers)
+            if response.status_code == 400:
+                return self._decode_response(response)
+            response.raise_for_status()
+            return self._decode_response(response)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"API Error (POST {url}): {e}")
+            return None
+
+    def open_export(self, endpoint, export_format='csv', params=None):
+        """
+        请求流式导出接口（csv / ndjson / npz），params 为与列表接口相同的过滤参数
+        返回尚未读取响应体的响应对象，由调用方用 iter_content 按块读取并关闭；
+        响应头 X-Export-Count 为导出的总行数。请求失败返回 None
+        """
+        params = dict(params or {})
+        params['export_format'] = export_format
+        url = f"{API_BASE_URL}/{endpoint}/export/"
+        try:
+            response = self.session.get(url, params=params, stream=True)
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            print(f"API Error (GET {url}): {e}")
+            return None
+
+    def iter_cursor_pages(self, endpoint, params=None, page_size=None):
+        """
+        以游标分页方式逐页遍历列表接口，每次产出一页结果列表；深页与首页开销相同
+        任何一页请求失败时抛出 RuntimeError，调用方不会把不完整的结果当作全部记录
+        """
+        params = dict(params or {})
+        params['pagination'] = 'cursor'
+        if page_size:
+            params['page_size'] = page_size
+
+        url = endpoint
+        while url:
+            response = self._request('get', url, params=params)
+            if not isinstance(response, dict):
+                raise RuntimeError(f"分页请求失败: {url}")
+            yield response.get('results', [])
+            # next 链接已包含全部查询参数
+            url = response.get('next')
+            params = None
+
+    def batch_get(self, requests_list):
+        """
+        通过批量接口在一次往返中执行多个 GET 请求
+        requests_list 为 [(endpoint, params), ...]；按顺序返回 [{'status': ..., 'body': ...}, ...]，
+        子请求同样携带 ETag，返回 304 时复用上次的响应数据（status 记为 200）；批量请求本身失败时返回 None
+        """
+        sub_requests = []
+        cache_entries = []
+        for endpoint, params in requests_list:
+            url = f"{API_BASE_URL}/{endpoint}/"
+            cache_key = self._validator_cache_key(url, params)
+            cached = self._get_validator(cache_key)
+            sub_request = {'path': f"{endpoint}/", 'params': params or {}}
+            if cached:
+                sub_request['headers'] = {'If-None-Match': cached[0]}
+            sub_requests.append(sub_request)
+            cache_entries.append((cache_key, cached))
+
+        responses = self._request('post', 'batch', json=sub_requests)
+        if responses is None:
+            return None
+
+        results = []
+        for response, (cache_key, cached) in zip(responses, cache_entries):
+            status_code = response.get('status')
+            body = response.get('body')
+            if status_code == 304 and cached:
+                status_code, body = 200, cached[1]
+            elif status_code == 200 and response.get('headers', {}).get('ETag'):
+                self._set_validator(cache_key, response['headers']['ETag'], body)
+            results.append({'status': status_code, 'body': body})
+        return results
+
+    def get_reference_lists(self):
+        """
+        通过一次批量请求获取刀具、构件、用户和任务分组列表，返回 (tools, materials, users, groups)
+        无权限或请求失败的项为 None；批量接口不可用时退回逐个请求
+        """
+        results = self.batch_get([
+            ('tools', None), ('composite-materials', None), ('users', None), ('task-groups', None),
+        ])
+        if results is None:
+            return (self.get_tools(), self.get_composite_materials(),
+                    self.get_users(), self.get_task_groups())
+        return tuple(result['body'] if result['status'] == 200 else None for result in results)
+
+    def get_changes(self, endpoint, updated_since=None, params=None, after_id=None):
+        """
+        获取资源在游标 (updated_since, after_id) 之后的增量变更，自动按返回的游标取完所有批次
+        未提供 updated_since 时返回全部未删除记录；
+        返回 {'changed': [...], 'deleted': [...], 'watermark': ..., 'after_id': ...}，请求失败返回 None。
+        批次数达到上限时返回已取到的变更和对应的游标，下次同步从该游标继续
+        """
+        params = dict(params or {})
+        changed = []
+        deleted = []
+        for _ in range(self.MAX_CHANGE_BATCHES):
+            if updated_since:
+                params['updated_since'] = updated_since
+                if after_id is not None:
+                    params['after_id'] = after_id
+                else:
+                    params.pop('after_id', None)
+            response = self._request('get', f'{endpoint}/changes', params=params)
+            if response is None:
+                return None
+            changed.extend(response.get('changed', []))
+            deleted.extend(response.get('deleted', []))
+            updated_since = response.get('watermark')
+            after_id = response.get('after_id')
+            if not response.get('has_more'):
+                break
+        return {'changed': changed, 'deleted': deleted, 'watermark': updated_since, 'after_id': after_id}
+
+    def get_change_watermark(self, endpoint):
+        """ 只获取资源当前的增量变更游标（不返回记录），请求失败返回 None """
+        response = self._request('get', f'{endpoint}/changes', params={'updated_since': 'now'})
+        if not isinstance(response, dict):
+            return None
+        return response.get('watermark')
+
     # --- Tool Management ---
 
     def get_tools(self):
@@ -168,10 +382,32 @@ class ApiClient:
         """ 获取单个加工任务的详细信息 """
         return self._request('get', f'processing-tasks/{task_id}')
 
+    def iter_processing_tasks(self, params=None, page_size=None):
+        """ 按加工时间游标分页遍历所有加工任务 """
+        return self.iter_cursor_pages('processing-tasks', params=params, page_size=page_size)
+
+    def bulk_create_processing_tasks(self, items, upsert=False):
+        """ 批量新增加工任务，upsert=True 时按任务编号更新已存在的任务 """
+        return self._bulk_create('processing-tasks', items, upsert=upsert)
+
     def clone_processing_task(self, task_id):
         """ 克隆加工任务 """
         return self._request('post', f'processing-tasks/{task_id}/clone')
 
+    def batch_clone_processing_tasks(self, task_ids=None, source_group=None, target_group=...):
+        """
+        在服务端批量复制加工任务（连同参数），task_ids 与 source_group 二选一
+        target_group 为目标分组ID，None 表示未分组，不传则保留原分组；返回 {'count', 'ids', 'id_map'}
+        """
+        data = {}
+        if task_ids is not None:
+            data['task_ids'] = list(task_ids)
+        if source_group is not None:
+            data['source_group'] = source_group
+        if target_group is not ...:
+            data['target_group'] = target_group
+        return self._request('post', 'processing-tasks/batch-clone', json=data)
+
     # --- Task Group Management ---
 
     def get_task_groups(self):
@@ -200,10 +436,18 @@ class ApiClient:
         """ 获取所有传感器数据 """
         return self._request('get', 'sensor-data', params=params)
 
+    def iter_sensor_data(self, params=None, page_size=None):
+        """ 按上传时间游标分页遍历所有传感器数据 """
+        return self.iter_cursor_pages('sensor-data', params=params, page_size=page_size)
+
     def add_sensor_data(self, data):
         """ 新增传感器数据 """
         return self._request('post', 'sensor-data', json=data)
 
+    def bulk_create_sensor_data(self, items):
+        """ 批量新增传感器数据 """
+        return self._bulk_create('sensor-data', items)
+
     def update_sensor_data(self, data_id, data):
         """ 更新传感器数据 """
         return self._request('put', f'sensor-data/{data_id}', json=data)
@@ -212,6 +456,20 @@ class ApiClient:
         """ 删除传感器数据 """
         return self._request('delete', f'sensor-data/{data_id}')
 
+    # --- Tool Wear Record Management ---
+
+    def get_tool_wear_records(self, params=None):
+        """ 获取刀具磨损记录 """
+        return self._request('get', 'tool-wear-records', params=params)
+
+    def iter_tool_wear_records(self, params=None, page_size=None):
+        """ 按记录时间游标分页遍历所有刀具磨损记录 """
+        return self.iter_cursor_pages('tool-wear-records', params=params, page_size=page_size)
+
+    def bulk_create_tool_wear_records(self, items):
+        """ 批量新增刀具磨损记录 """
+        return self._bulk_create('tool-wear-records', items)
+
     def delete_sensor_file_from_webdav(self, file_url):
         """ 从WebDAV删除传感器数据文件 """
         from ..common.config import get_webdav_credentials
@@ -276,15 +534,19 @@ class ApiClient:
             if not client.exists(unmanaged_dir):
                 client.mkdir(unmanaged_dir)
             
-            # 获取所有传感器数据记录中的文件URL
-            sensor_data_response = self.get_sensor_data()
-            if not sensor_data_response or 'results' not in sensor_data_response:
-                return False, "无法获取传感器数据记录", []
+            # 获取所有传感器数据记录中的文件URL（游标分页遍历全部记录，而不只是第一页）
+            # 只有读完全部记录才移动文件，任何一页失败都放弃本次同步，避免把有记录的文件当作未管理文件
+            sensor_records = []
+            try:
+                for page in self.iter_sensor_data(page_size=500):
+                    sensor_records.extend(page)
+            except RuntimeError as e:
+                return False, f"无法获取完整的传感器数据记录，未移动任何文件: {e}", []
             
             # 提取数据库中所有的文件名
             db_files = set()
             base_url = credentials['url'].rstrip('/')
-            for record in sensor_data_response['results']:
+            for record in sensor_records:
                 file_url = record.get('file_url', '')
                 if file_url.startswith(base_url):
                     relative_path = file_url[len(base_url):].lstrip('/')
@@ -382,6 +644,10 @@ class ApiClient:
         except Exception as e:
             return False, f"上传失败: {str(e)}"
 
+    def get_dashboard_summary(self):
+        """ 获取看板统计数据（服务端聚合） """
+        return self._request('get', 'dashboard/summary')
+
     def get_current_user_info(self):
         """ 获取当前登录用户信息 """
         try:
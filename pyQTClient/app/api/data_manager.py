@@ -1,6 +1,6 @@
 import time
 import logging
-from PyQt5.QtCore import QObject, pyqtSignal
+from PyQt5.QtCore import QObject, pyqtSignal, QTimer
 from .async_api import AsyncApiWorker
 
 logger = logging.getLogger(__name__)
@@ -27,13 +27,48 @@ class DataManager(QObject):
             'processing_tasks': 'get_processing_tasks',
             'composite_materials': 'get_composite_materials',
             'task_groups': 'get_task_groups',
-            'task_groups_with_tasks': 'get_task_groups_with_tasks'
+            'task_groups_with_tasks': 'get_task_groups_with_tasks',
+            'dashboard_summary': 'get_dashboard_summary'
         }
         
         # 支持params参数的方法
         self.methods_with_params = {
             'sensor_data', 'processing_tasks'
         }
+        
+        # 未显式传入params时使用的默认参数
+        # 任务列表只展开参数，刀具、构件、操作员由界面的ID缓存映射，不再随每行下载完整对象
+        self.default_params = {
+            'processing_tasks': {'expand': 'parameters'},
+        }
+        
+        # 支持增量变更的数据类型：(资源路径, 排序字段, 是否倒序)，排序与服务端列表接口的默认排序一致
+        # 首次加载取全部记录并记下水位，之后只拉取水位之后的变更合并到缓存中
+        self.change_feeds = {
+            'tools': ('tools', 'code', False),
+            'composite_materials': ('composite-materials', 'part_number', False),
+            'processing_tasks': ('processing-tasks', 'processing_time', True),
+        }
+        # 数据量大的类型首次同步不拉取全表：先取当前游标，再按列表接口加载第一页（与不使用增量接口时相同），
+        # 之后的增量变更合并到这一页中，按排序只保留第一页的行数
+        self.paged_change_feeds = {'processing_tasks'}
+        # 增量变更接口只支持字段选择参数，带过滤条件的请求仍走列表接口
+        self.change_feed_params = {'fields', 'expand'}
+        
+        # 可合并到批量请求（/api/batch/）中的数据类型及其接口路径
+        self.batch_enabled = True
+        self.batch_endpoints = {
+            'users': 'users',
+            'tools': 'tools',
+            'sensor_data': 'sensor-data',
+            'processing_tasks': 'processing-tasks',
+            'composite_materials': 'composite-materials',
+            'task_groups': 'task-groups',
+            'task_groups_with_tasks': 'task-groups/with_tasks',
+            'dashboard_summary': 'dashboard/summary',
+        }
+        self._pending_batch = {}
+        self._batch_scheduled = False
     
     def get_data_async(self, data_type, success_callback=None, error_callback=None,
                       params=None, force_refresh=False):
@@ -48,7 +83,7 @@ class DataManager(QObject):
             force_refresh: 是否强制刷新缓存
 
         Returns:
-            AsyncApiWorker or None
+            AsyncApiWorker、BatchedRequest（合并发送时） or None
         """
         try:
             # 1. 检查缓存
@@ -74,54 +109,20 @@ class DataManager(QObject):
                     self.data_error.emit(data_type, error_msg)
                     return None
 
-                # 创建新的异步工作线程
-                if data_type in self.methods_with_params and params is not None:
-                    worker = AsyncApiWorker(api_method, params=params)
-                elif data_type in self.methods_with_params:
-                    worker = AsyncApiWorker(api_method, params=None)
+                if params is None:
+                    params = self.default_params.get(data_type)
+                if (self.batch_enabled and data_type in self.batch_endpoints
+                        and not self._use_change_feed(data_type, params)):
+                    # 同一事件循环周期内发起的请求合并为一次批量请求
+                    worker = self._queue_batched_request(data_type, params)
                 else:
-                    worker = AsyncApiWorker(api_method)
-
-                # 定义仅在首次创建时需要的包装回调
-                def wrapped_success(data):
-                    self._update_cache(data_type, data)
-                    callbacks = self.active_requests.pop(data_type, {}).get('callbacks', [])
-
-                    # 直接触发所有已注册的回调
-                    for success_cb, _ in callbacks:
-                        if success_cb:
-                            try:
-                                success_cb(data)
-                            except Exception as e:
-                                logger.error(f"回调执行失败: {e}", exc_info=True)
-
-                    # 在所有具体回调执行后，发送全局信号
-                    self.data_updated.emit(data_type, data)
-
-                def wrapped_error(error):
-                    callbacks = self.active_requests.pop(data_type, {}).get('callbacks', [])
-
-                    # 直接触发所有已注册的错误回调
-                    for _, error_cb in callbacks:
-                        if error_cb:
-                            try:
-                                error_cb(error)
-                            except Exception as e:
-                                logger.error(f"错误回调执行失败: {e}", exc_info=True)
-                    
-                    # 在所有具体回调执行后，发送全局信号
-                    self.data_error.emit(data_type, error)
-
-                worker.finished.connect(wrapped_success)
-                worker.error.connect(wrapped_error)
+                    worker = self._start_worker(data_type, params)
 
                 # 记录活跃请求，回调列表初始化为空
                 self.active_requests[data_type] = {
                     'worker': worker,
                     'callbacks': []
                 }
-                
-                worker.start()
             else:
                 logger.debug(f"合并到现有请求: {data_type}")
 
@@ -139,6 +140,121 @@ class DataManager(QObject):
             self.data_error.emit(data_type, error_msg)
             return None
     
+    def _start_worker(self, data_type, params, handle=None):
+        """
+        为单个数据类型创建并启动异步工作线程
+        handle 为合并发送时登记的 BatchedRequest：active_requests 中记录的是句柄而不是工作线程，
+        回调按句柄核对请求是否仍然有效
+        """
+        if self._use_change_feed(data_type, params):
+            worker = AsyncApiWorker(self._load_changes, data_type, params)
+        elif data_type in self.methods_with_params:
+            worker = AsyncApiWorker(self._get_api_method(data_type), params=params)
+        else:
+            worker = AsyncApiWorker(self._get_api_method(data_type))
+
+        owner = handle or worker
+        worker.finished.connect(lambda data: self._on_request_finished(data_type, owner, params, data))
+        worker.error.connect(lambda error: self._on_request_error(data_type, owner, error))
+        worker.start()
+        return worker
+    
+    def _queue_batched_request(self, data_type, params):
+        """登记待合并的请求，并在本轮事件循环结束后统一发送"""
+        handle = BatchedRequest(self, data_type)
+        self._pending_batch[data_type] = (params, handle)
+        if not self._batch_scheduled:
+            self._batch_scheduled = True
+            QTimer.singleShot(0, self._flush_batch)
+        return handle
+    
+    def _flush_batch(self):
+        """发送本轮事件循环内登记的请求：只有一个时单独发送，多个时合并为一次批量请求"""
+        self._batch_scheduled = False
+        pending = {data_type: item for data_type, item in self._pending_batch.items()
+                   if not item[1].cancelled}
+        self._pending_batch = {}
+        if not pending:
+            return
+        
+        if len(pending) == 1:
+            data_type, (params, handle) = next(iter(pending.items()))
+            handle.worker = self._start_worker(data_type, params, handle)
+            return
+        
+        from .api_client import api_client
+        data_types = list(pending)
+        requests_list = [
+            (self.batch_endpoints[data_type],
+             pending[data_type][0] if data_type in self.methods_with_params else None)
+            for data_type in data_types
+        ]
+        logger.debug(f"合并发送批量请求: {data_types}")
+        worker = AsyncApiWorker(api_client.batch_get, requests_list)
+        for _, handle in pending.values():
+            handle.batch_worker = worker
+        worker.finished.connect(lambda results: self._on_batch_finished(pending, results))
+        worker.error.connect(lambda error: self._on_batch_error(pending, error))
+        worker.start()
+    
+    def _on_batch_finished(self, pending, results):
+        """把批量请求的结果分发给各数据类型"""
+        if results is None:
+            self._on_batch_error(pending, "批量请求失败")
+            return
+        for (data_type, (params, handle)), result in zip(pending.items(), results):
+            status_code = result.get('status')
+            if status_code is not None and 200 <= status_code < 300:
+                self._on_request_finished(data_type, handle, params, result.get('body'))
+            else:
+                self._on_request_error(data_type, handle, f"请求失败 (HTTP {status_code})")
+    
+    def _on_batch_error(self, pending, error):
+        for data_type, (_, handle) in pending.items():
+            self._on_request_error(data_type, handle, error)
+    
+    def _on_request_finished(self, data_type, worker, params, data):
+        """请求成功：更新缓存并通知所有合并到该请求的回调"""
+        # 请求已被取消或已被新的请求取代时忽略结果
+        if self.active_requests.get(data_type, {}).get('worker') is not worker:
+            return
+        # ApiClient 在服务端返回 304 时复用上次的响应对象，据此判断数据是否变化
+        previous = self.cache.get(data_type, {}).get('data')
+        unchanged = previous is not None and data is previous
+        self._update_cache(data_type, data, params)
+        callbacks = self.active_requests.pop(data_type, {}).get('callbacks', [])
+
+        # 直接触发所有已注册的回调
+        for success_cb, _ in callbacks:
+            if success_cb:
+                try:
+                    success_cb(data)
+                except Exception as e:
+                    logger.error(f"回调执行失败: {e}", exc_info=True)
+
+        # 在所有具体回调执行后，发送全局信号；数据未变化时不再通知
+        if unchanged:
+            logger.debug(f"数据未变化: {data_type}")
+        else:
+            self.data_updated.emit(data_type, data)
+    
+    def _on_request_error(self, data_type, worker, error):
+        """请求失败：通知所有合并到该请求的错误回调"""
+        if self.active_requests.get(data_type, {}).get('worker') is not worker:
+            return
+        callbacks = self.active_requests.pop(data_type, {}).get('callbacks', [])
+
+        # 直接触发所有已注册的错误回调
+        for _, error_cb in callbacks:
+            if error_cb:
+                try:
+                    error_cb(error)
+                except Exception as e:
+                    logger.error(f"错误回调执行失败: {e}", exc_info=True)
+        
+        # 在所有具体回调执行后，发送全局信号
+        self.data_error.emit(data_type, error)
+    
     def cancel_request(self, data_type):
         """取消指定类型的数据请求"""
         if data_type in self.active_requests:
@@ -146,7 +262,7 @@ class DataManager(QObject):
             if worker and worker.isRunning():
                 worker.cancel()
                 logger.debug(f"已取消请求: {data_type}")
-            del self.active_requests[data_type]
+            self.active_requests.pop(data_type, None)
     
     def cancel_all_requests(self):
         """取消所有活跃请求"""
@@ -178,14 +294,91 @@ class DataManager(QObject):
         cache_time = self.cache[data_type]['timestamp']
         return (time.time() - cache_time) < self.cache_timeout
     
-    def _update_cache(self, data_type, data):
+    def _update_cache(self, data_type, data, params=None):
         """更新缓存"""
         self.cache[data_type] = {
             'data': data,
+            'params': params,
             'timestamp': time.time()
         }
         logger.debug(f"已更新缓存: {data_type}")
     
+    def _use_change_feed(self, data_type, params):
+        """判断本次请求能否使用增量变更接口"""
+        return data_type in self.change_feeds and set(params or {}) <= self.change_feed_params
+    
+    def _load_changes(self, data_type, params):
+        """
+        在工作线程中执行：缓存中有相同参数的水位时只获取增量变更并合并，否则全量加载（分页类型只加载第一页）
+        返回与列表接口相同结构的数据，并附带本次的游标 watermark 与 after_id，
+        分页类型另附 page_size（第一页的行数，首次加载已取完全部记录时为 None）
+        """
+        from .api_client import api_client
+        endpoint, sort_key, reverse = self.change_feeds[data_type]
+        
+        entry = self.cache.get(data_type)
+        cached = entry['data'] if entry and entry.get('params') == params else None
+        since = cached.get('watermark') if isinstance(cached, dict) else None
+        after_id = cached.get('after_id') if since else None
+        
+        if not since and data_type in self.paged_change_feeds:
+            return self._load_first_page(data_type, endpoint, params)
+        
+        delta = api_client.get_changes(endpoint, since, params, after_id)
+        if delta is None:
+            raise RuntimeError(f"获取增量变更失败: {data_type}")
+        
+        if since:
+            # 按ID合并，生成新的列表对象，不修改已交给界面的缓存数据
+            rows = {row['id']: row for row in cached.get('results', [])}
+            for row in delta['changed']:
+                rows[row['id']] = row
+            for deleted_id in delta['deleted']:
+                rows.pop(deleted_id, None)
+            rows = list(rows.values())
+            logger.debug(f"增量合并 {data_type}: 变更 {len(delta['changed'])} 条，删除 {len(delta['deleted'])} 条")
+        else:
+            rows = delta['changed']
+        rows.sort(key=lambda row: row.get(sort_key) or '', reverse=reverse)
+        page_size = cached.get('page_size') if since else None
+        if page_size:
+            rows = rows[:page_size]
+        
+        result = {
+            'count': len(rows),
+            'next': None,
+            'previous': None,
+            'results': rows,
+            'watermark': delta['watermark'],
+            'after_id': delta['after_id'],
+        }
+        if data_type in self.paged_change_feeds:
+            result['page_size'] = page_size
+        return result
+    
+    def _load_first_page(self, data_type, endpoint, params):
+        """
+        分页类型的首次同步：先取游标再加载列表接口的第一页，期间的修改在下一次增量同步中返回（按ID合并）
+        第一页之后还有记录时记下行数，增量合并后按排序截取同样多的行
+        """
+        from .api_client import api_client
+        watermark = api_client.get_change_watermark(endpoint)
+        if watermark is None:
+            raise RuntimeError(f"获取增量变更游标失败: {data_type}")
+        page = self._get_api_method(data_type)(params=params)
+        if not isinstance(page, dict):
+            raise RuntimeError(f"加载第一页失败: {data_type}")
+        rows = list(page.get('results', []))
+        return {
+            'count': len(rows),
+            'next': None,
+            'previous': None,
+            'results': rows,
+            'watermark': watermark,
+            'after_id': None,
+            'page_size': len(rows) if page.get('next') else None,
+        }
+    
     def _get_api_method(self, data_type):
         """获取对应的API方法"""
         try:
@@ -199,6 +392,32 @@ class DataManager(QObject):
             return None
 
 
+class BatchedRequest:
+    """
+    合并发送的数据请求句柄，提供与 AsyncApiWorker 相同的 cancel/isRunning 接口
+    取消只影响本数据类型，不会取消同一批次中的其他请求
+    """
+    
+    def __init__(self, manager, data_type):
+        self.manager = manager
+        self.data_type = data_type
+        self.worker = None        # 单独发送时的工作线程
+        self.batch_worker = None  # 合并发送时共享的工作线程，仅用于保持引用
+        self.cancelled = False
+    
+    def cancel(self):
+        self.cancelled = True
+        if self.worker:
+            self.worker.cancel()
+        entry = self.manager.active_requests.get(self.data_type)
+        if entry and entry['worker'] is self:
+            del self.manager.active_requests[self.data_type]
+    
+    def isRunning(self):
+        entry = self.manager.active_requests.get(self.data_type)
+        return not self.cancelled and entry is not None and entry['worker'] is self
+
+
 class InterfaceDataLoader:
     """界面数据加载助手"""
     
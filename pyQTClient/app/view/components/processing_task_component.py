@@ -142,11 +142,12 @@ class ProcessingTaskEditDialog(MessageBoxBase):
         for _, display in self.TASK_TYPE_CHOICES: self.processing_type_combo.addItem(display)
         for _, display in self.TASK_STATUS_CHOICES: self.status_combo.addItem(display)
 
-        # 动态加载刀具、材料和人员
-        self.load_tools()
-        self.load_materials()
-        self.load_operators()
-        self.load_groups()
+        # 动态加载刀具、材料、人员和分组（一次批量请求取回）
+        tools, materials, users, groups = api_client.get_reference_lists()
+        self.load_tools(tools)
+        self.load_materials(materials)
+        self.load_operators(users)
+        self.load_groups(groups)
 
         # --- 如果是编辑模式，则填充现有数据 ---
         parameters = []
@@ -241,21 +242,24 @@ class ProcessingTaskEditDialog(MessageBoxBase):
         self.viewLayout.addWidget(StrongBodyLabel(label_text, self))
         self.viewLayout.addWidget(widget)
 
-    def load_tools(self):
-        tools = api_client.get_tools()
+    def load_tools(self, tools=None):
+        if tools is None:
+            tools = api_client.get_tools()
         if tools and 'results' in tools:
             for tool in tools['results']:
                 self.tool_combo.addItem(f"{tool['code']} ({tool['tool_type']})", userData=tool['id'])
 
-    def load_materials(self):
-        materials = api_client.get_composite_materials()
+    def load_materials(self, materials=None):
+        if materials is None:
+            materials = api_client.get_composite_materials()
         if materials and 'results' in materials:
             for material in materials['results']:
                 self.material_combo.addItem(f"{material['part_number']}", userData=material['id'])
 
-    def load_operators(self):
+    def load_operators(self, users=None):
         """加载操作员列表 (从用户列表获取)"""
-        users = api_client.get_users()
+        if users is None:
+            users = api_client.get_users()
         if users and 'results' in users:
             for user in users['results']:
                 # 使用 full_name，如果不存在则使用 username
@@ -263,10 +267,11 @@ class ProcessingTaskEditDialog(MessageBoxBase):
                 if display_name:
                     self.operator_combo.addItem(display_name, userData=user['id'])
 
-    def load_groups(self):
+    def load_groups(self, response=None):
         self.group_combo.clear()
         self.group_combo.addItem("无分组", userData=None)
-        response = api_client.get_task_groups()
+        if response is None:
+            response = api_client.get_task_groups()
         if response and 'results' in response:
             for group in response['results']:
                 self.group_combo.addItem(group['name'], userData=group['id'])
@@ -398,10 +403,11 @@ class TaskListWidget(QWidget):
         self.add_button.clicked.connect(self.add_task)
 
     def load_cached_data(self):
-        """预加载关联数据的ID→名称映射"""
+        """预加载关联数据的ID→名称映射，四个列表通过一次批量请求取回"""
+        tools, materials, users, groups = api_client.get_reference_lists()
+        
         # 1. 加载刀具
         try:
-            tools = api_client.get_tools()
             if tools and 'results' in tools:
                 for tool in tools['results']:
                     self.tool_cache[tool['id']] = tool['code']
@@ -411,7 +417,6 @@ class TaskListWidget(QWidget):
 
         # 2. 加载构件
         try:
-            materials = api_client.get_composite_materials()
             if materials and 'results' in materials:
                 for mat in materials['results']:
                     self.material_cache[mat['id']] = mat['part_number']
@@ -421,7 +426,6 @@ class TaskListWidget(QWidget):
 
         # 3. 加载操作员（从用户列表）
         try:
-            users = api_client.get_users()
             if users and 'results' in users:
                 for user in users['results']:
                     display_name = user.get('full_name') or user.get('username', '')
@@ -432,7 +436,6 @@ class TaskListWidget(QWidget):
 
         # 4. 加载任务分组
         try:
-            groups = api_client.get_task_groups()
             if groups and 'results' in groups:
                 for group in groups['results']:
                     self.group_cache[group['id']] = group['name']
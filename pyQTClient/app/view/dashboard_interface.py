@@ -292,34 +292,18 @@ class DashboardInterface(NavInterface):
         self.main_layout.addStretch()
     
     def refresh_data(self):
-        """使用数据管理器刷新看板数据"""
+        """使用数据管理器刷新看板数据（一次请求获取服务端聚合的统计）"""
         try:
             self.cancel_active_workers()
             logger.debug("使用数据管理器刷新看板数据")
 
-            worker1 = data_manager.get_data_async(
-                data_type='users',
-                success_callback=self.on_users_data_received,
+            worker = data_manager.get_data_async(
+                data_type='dashboard_summary',
+                success_callback=self.on_dashboard_summary_data_received,
                 error_callback=self.on_api_error
             )
-            if worker1:
-                self.active_workers.append(worker1)
-
-            worker2 = data_manager.get_data_async(
-                data_type='processing_tasks',
-                success_callback=self.on_tasks_data_received,
-                error_callback=self.on_api_error
-            )
-            if worker2:
-                self.active_workers.append(worker2)
-
-            worker3 = data_manager.get_data_async(
-                data_type='sensor_data',
-                success_callback=self.on_sensor_data_received,
-                error_callback=self.on_api_error
-            )
-            if worker3:
-                self.active_workers.append(worker3)
+            if worker:
+                self.active_workers.append(worker)
 
         except Exception as e:
             import traceback
@@ -327,69 +311,29 @@ class DashboardInterface(NavInterface):
             logger.error(error_msg)
             self.on_api_error(f"刷新失败: {e}")
     
-    def on_users_data_received(self, users_data):
-        """处理用户数据"""
-        try:
-            if not self or not hasattr(self, 'user_card') or not self.user_card:
-                logger.warning("用户数据回调时界面已销毁")
-                return
-                
-            if users_data and 'count' in users_data:
-                self.user_card.update_value(users_data['count'])
-                logger.debug(f"用户数据更新: {users_data['count']}")
-        except Exception as e:
-            logger.error(f"处理用户数据时出错: {e}")
-    
-    def on_tasks_data_received(self, tasks_data):
-        """处理任务数据"""
+    def on_dashboard_summary_data_received(self, summary):
+        """处理看板统计数据"""
         try:
             if not self or not hasattr(self, 'task_card') or not self.task_card:
-                logger.warning("任务数据回调时界面已销毁")
+                logger.warning("看板数据回调时界面已销毁")
                 return
                 
-            if tasks_data:
-                total_tasks = tasks_data.get('count', 0)
-                self.task_card.update_value(total_tasks)
-                
-                # 统计各状态任务数量
-                tasks_list = tasks_data.get('results', [])
-                status_counts = {}
-                pending_count = 0
-                
-                for task in tasks_list:
-                    status = task.get('status', 'planned')
-                    status_counts[status] = status_counts.get(status, 0) + 1
-                    
-                    # 计算待处理任务（计划中+进行中）
-                    if status in ['planned', 'in_progress']:
-                        pending_count += 1
-                
-                if hasattr(self, 'pending_card') and self.pending_card:
-                    self.pending_card.update_value(pending_count)
-                if hasattr(self, 'task_status_card') and self.task_status_card:
-                    self.task_status_card.update_status_counts(status_counts)
-                
-                # 生成最近活动
-                if hasattr(self, 'activity_card') and self.activity_card:
-                    activities = self.generate_recent_activities(tasks_data)
-                    self.activity_card.update_activities(activities)
-                
-                logger.debug(f"任务数据更新: 总数={total_tasks}, 待处理={pending_count}")
-        except Exception as e:
-            logger.error(f"处理任务数据时出错: {e}")
-    
-    def on_sensor_data_received(self, sensor_data):
-        """处理传感器数据"""
-        try:
-            if not self or not hasattr(self, 'sensor_card') or not self.sensor_card:
-                logger.warning("传感器数据回调时界面已销毁")
+            if not summary:
                 return
-                
-            if sensor_data and 'count' in sensor_data:
-                self.sensor_card.update_value(sensor_data['count'])
-                logger.debug(f"传感器数据更新: {sensor_data['count']}")
+            
+            # 用户数只返回给管理员
+            self.user_card.update_value(summary.get('user_count', '-'))
+            self.task_card.update_value(summary.get('task_count', 0))
+            self.pending_card.update_value(summary.get('pending_count', 0))
+            self.sensor_card.update_value(summary.get('sensor_data', {}).get('count', 0))
+            self.task_status_card.update_status_counts(summary.get('status_counts', {}))
+            self.activity_card.update_activities(
+                self.generate_recent_activities(summary.get('recent_activities', []))
+            )
+            
+            logger.debug(f"看板数据更新: 总数={summary.get('task_count')}, 待处理={summary.get('pending_count')}")
         except Exception as e:
-            logger.error(f"处理传感器数据时出错: {e}")
+            logger.error(f"处理看板数据时出错: {e}")
     
     def on_api_error(self, error_message):
         """处理API错误"""
@@ -398,26 +342,15 @@ class DashboardInterface(NavInterface):
         except Exception as e:
             logger.error(f"处理API错误时出错: {e}")
     
-    def generate_recent_activities(self, tasks_data):
-        """生成最近活动列表"""
+    def generate_recent_activities(self, recent_tasks):
+        """将服务端返回的最近更新任务转换为活动列表（已按更新时间倒序）"""
         activities = []
-        
-        if tasks_data and 'results' in tasks_data:
-            # 按更新时间排序，取最近的几条
-            tasks_list = sorted(
-                tasks_data['results'], 
-                key=lambda x: x.get('updated_at', ''), 
-                reverse=True
-            )
-            
-            for task in tasks_list[:5]:
-                activity = {
-                    'type': task.get('status', 'planned'),
-                    'description': f"任务 {task.get('task_code', 'N/A')} - {task.get('status_display', 'N/A')}",
-                    'time': task.get('updated_at', '')[:10] if task.get('updated_at') else ''
-                }
-                activities.append(activity)
-        
+        for task in recent_tasks:
+            activities.append({
+                'type': task.get('status', 'planned'),
+                'description': f"任务 {task.get('task_code', 'N/A')} - {task.get('status_display', 'N/A')}",
+                'time': task.get('updated_at', '')[:10] if task.get('updated_at') else ''
+            })
         return activities
     
     def start_refresh_timer(self):
@@ -225,6 +225,71 @@ class DownloadTask(FileTransferTask):
             self.transfer_finished.emit(False, f"下载出错: {str(e)}")
 
 
+class ExportTask(FileTransferTask):
+    """数据导出任务：从服务端导出接口流式下载到本地文件，在传输列表中按下载任务显示"""
+
+    # 按行计数进度的格式，npz 只能按字节显示
+    LINE_FORMATS = ('csv', 'ndjson')
+
+    def __init__(self, endpoint, export_format, save_path, params=None):
+        super().__init__('download', os.path.basename(save_path))
+        self.endpoint = endpoint
+        self.export_format = export_format
+        self.save_path = save_path
+        self.params = params
+        self.downloaded_size = 0
+        self.total_size = 0  # 流式响应没有总大小
+
+    def run(self):
+        """执行导出"""
+        response = None
+        try:
+            self.status = "正在请求导出..."
+            self.status_updated.emit(self.status)
+            response = api_client.open_export(self.endpoint, self.export_format, self.params)
+            if response is None:
+                self.transfer_finished.emit(False, "导出请求失败")
+                return
+
+            total_rows = int(response.headers.get('X-Export-Count') or 0)
+            exported_rows = -1 if self.export_format == 'csv' else 0  # CSV 首行为表头
+            with open(self.save_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=64 * 1024):
+                    if self.is_cancelled:
+                        break
+                    f.write(chunk)
+                    self.downloaded_size += len(chunk)
+
+                    if total_rows and self.export_format in self.LINE_FORMATS:
+                        # 文本字段中的换行会使行数偏多，进度最多显示到 99%
+                        exported_rows += chunk.count(b'\n')
+                        progress = min(99, max(0, exported_rows) * 100 // total_rows)
+                        status_text = f"导出中: {min(max(0, exported_rows), total_rows)} / {total_rows} 行"
+                    else:
+                        progress = min(90, self.downloaded_size // (1024 * 1024))
+                        status_text = f"导出中: {format_file_size(self.downloaded_size)}"
+
+                    self.progress = progress
+                    self.progress_updated.emit(progress)
+                    self.status_updated.emit(status_text)
+
+            if self.is_cancelled:
+                os.remove(self.save_path)
+                self.transfer_finished.emit(False, "导出已取消")
+                return
+
+            self.progress = 100
+            self.progress_updated.emit(100)
+            self.transfer_finished.emit(
+                True, f"已导出 {total_rows} 行（{format_file_size(self.downloaded_size)}）到: {self.save_path}"
+            )
+        except Exception as e:
+            self.transfer_finished.emit(False, f"导出出错: {str(e)}")
+        finally:
+            if response is not None:
+                response.close()
+
+
 class FileTransferProgressDialog(MessageBoxBase):
     """文件传输进度弹窗 - 使用MessageBoxBase"""
     
@@ -570,7 +635,42 @@ class FileTransferButton(TransparentToolButton):
             print(f"[DEBUG] 添加下载任务到后台列表: {download_task.file_name}")
         
         return download_task
-    
+
+    def start_export(self, endpoint, file_name, export_format='csv', params=None, parent=None):
+        """开始导出，endpoint 为列表接口（如 'processing-tasks'），params 为过滤参数"""
+        file_filters = {
+            'csv': "CSV 文件 (*.csv)",
+            'ndjson': "NDJSON 文件 (*.ndjson)",
+            'npz': "NumPy 数组 (*.npz)",
+        }
+        save_path, _ = QFileDialog.getSaveFileName(
+            self.parent(),
+            "导出数据",
+            f"{file_name}.{export_format}",
+            file_filters.get(export_format, "所有文件 (*.*)")
+        )
+
+        if not save_path:
+            return None
+
+        export_task = ExportTask(endpoint, export_format, save_path, params)
+
+        # 先连接完成信号
+        export_task.transfer_finished.connect(
+            lambda success, message: self.transfer_completed(export_task, success, message)
+        )
+
+        # 显示进度对话框
+        progress_dialog = FileTransferProgressDialog(export_task, parent or self.parent())
+        progress_dialog.exec()
+
+        # 如果选择后台传输，添加到后台列表
+        if progress_dialog.is_background:
+            self.background_transfers.append(export_task)
+            print(f"[DEBUG] 添加导出任务到后台列表: {export_task.file_name}")
+
+        return export_task
+
     def transfer_completed(self, task, success, message):
         """传输完成回调"""
         # 从后台列表中移除完成的任务
@@ -8,7 +8,7 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QTableWidgetItem
 from qfluentwidgets import (TableWidget, PushButton, StrongBodyLabel, LineEdit, ComboBox,
                             TextEdit, PrimaryPushButton, MessageBox, InfoBar, MessageBoxBase, SubtitleLabel,
                             DateTimeEdit, FluentIcon as FIF, CardWidget, BodyLabel, TransparentPushButton,
-                            ScrollArea, TreeView, RoundMenu, ToolButton)
+                            ScrollArea, TreeView, RoundMenu, ToolButton, Action)
 
 from ..api.api_client import api_client
 from ..api.data_manager import interface_loader
@@ -202,6 +202,11 @@ class ProcessingTaskInterface(NavInterface):
         self.refresh_button.setIcon(FIF.SYNC)
         self.refresh_button.clicked.connect(self.refresh_task_data)
 
+        # 导出按钮：选择格式后在文件传输列表中后台导出
+        self.export_button = PushButton("导出", self)
+        self.export_button.setIcon(FIF.SHARE)
+        self.export_button.clicked.connect(self.show_export_menu)
+
         self.main_layout = QVBoxLayout(self.view)
         self.main_layout.setContentsMargins(40, 30, 40, 30)
         self.main_layout.setSpacing(30)
@@ -211,6 +216,7 @@ class ProcessingTaskInterface(NavInterface):
         self.title_label = SubtitleLabel("加工任务管理")
         title_layout.addWidget(self.title_label)
         title_layout.addStretch()
+        title_layout.addWidget(self.export_button)
         title_layout.addWidget(self.refresh_button)
         self.main_layout.addLayout(title_layout)
 
@@ -260,6 +266,23 @@ class ProcessingTaskInterface(NavInterface):
             # 无论成功失败，都标记为加载完成
             self.is_loading = False
 
+    def show_export_menu(self):
+        """显示导出格式菜单"""
+        menu = RoundMenu(parent=self)
+        for export_format, text in (('csv', "导出 CSV"), ('ndjson', "导出 NDJSON"), ('npz', "导出 npz（数值列）")):
+            action = Action(FIF.DOWNLOAD, text)
+            action.triggered.connect(lambda checked=False, fmt=export_format: self.export_tasks(fmt))
+            menu.addAction(action)
+        menu.exec(self.export_button.mapToGlobal(self.export_button.rect().bottomLeft()))
+
+    def export_tasks(self, export_format):
+        """导出全部加工任务"""
+        main_window = self.window()
+        if hasattr(main_window, 'download_button'):
+            main_window.download_button.start_export(
+                'processing-tasks', "加工任务", export_format, parent=main_window
+            )
+
     def on_data_received(self, data):
         """数据接收成功后的处理"""
         logger.debug(f"成功接收加工任务数据，共 {len(data)} 条记录")
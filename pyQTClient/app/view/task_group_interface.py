@@ -240,47 +240,12 @@ class TaskGroupInterface(NavInterface):
         group_data = group_item.data(Qt.UserRole)
         target_group_id = group_data.get('id') if group_data else None
         
-        # 1. 获取源任务的详细信息
-        original_task = api_client.get_processing_task_detail(self.copied_task_id)
-        if not original_task:
-            InfoBar.error("失败", "粘贴任务失败：无法获取源任务信息。", parent=self)
-            return
-            
-        # 2. 生成一个新的唯一任务编码
-        import datetime
-        timestamp = datetime.datetime.now().strftime("%y%m%d%H%M%S")
-        new_task_code = f"{original_task.get('task_code', 'Task')}-Copy-{timestamp}"
-            
-        # 3. 准备新任务数据
-        new_task_data = {
-            "task_code": new_task_code,
-            "processing_time": original_task.get("processing_time"),
-            "processing_type": original_task.get("processing_type"),
-            "status": "planned",  # 新任务默认为"计划中"状态
-            "tool": original_task.get("tool", {}).get("id"),
-            "composite_material": original_task.get("composite_material", {}).get("id"),
-            "operator": original_task.get("operator", {}).get("id"),
-            "duration": original_task.get("duration"),
-            "notes": original_task.get("notes"),
-            "group": target_group_id
-        }
-        
-        # 4. 获取原任务的参数
-        parameters = []
-        if "parameters" in original_task and original_task["parameters"]:
-            for param in original_task["parameters"]:
-                parameters.append({
-                    "parameter_name": param.get("parameter_name"),
-                    "parameter_value": param.get("parameter_value"),
-                    "unit": param.get("unit")
-                })
-        
-        new_task_data["parameters"] = parameters
-        
-        # 5. 直接创建新任务
-        created_task = api_client.add_processing_task(new_task_data)
+        # 由服务端复制任务及其参数，一次请求完成
+        result = api_client.batch_clone_processing_tasks(
+            task_ids=[self.copied_task_id], target_group=target_group_id
+        )
         
-        if created_task:
+        if result:
             InfoBar.success("成功", f"任务已复制并粘贴到 '{group_data.get('name', '未归档任务')}'。", parent=self)
             self.populate_group_tree(preserve_old_data=False)
         else:
@@ -0,0 +1,89 @@
+import sys
+import unittest
+from unittest import mock
+
+try:
+    from app.api import api_client as module
+except ImportError:
+    module = None
+
+
+@unittest.skipIf(module is None, '需要客户端依赖（PyQt5、qfluentwidgets 等）')
+class CursorPagesTests(unittest.TestCase):
+    """游标分页遍历：任何一页失败都要报错，不能当作已经读完"""
+
+    def setUp(self):
+        self.client = module.ApiClient()
+
+    def test_follows_next_links(self):
+        pages = [
+            {'results': [{'id': 1}], 'next': 'http://server/api/sensor-data/?cursor=a'},
+            {'results': [{'id': 2}], 'next': None},
+        ]
+        with mock.patch.object(self.client, '_request', side_effect=pages) as request:
+            result = list(self.client.iter_cursor_pages('sensor-data', page_size=1))
+        self.assertEqual(result, [[{'id': 1}], [{'id': 2}]])
+        self.assertEqual(request.call_args_list[0].kwargs['params'], {'pagination': 'cursor', 'page_size': 1})
+        self.assertEqual(request.call_args_list[1].args[1], 'http://server/api/sensor-data/?cursor=a')
+
+    def test_failed_page_raises(self):
+        pages = [{'results': [{'id': 1}], 'next': 'http://server/api/sensor-data/?cursor=a'}, None]
+        with mock.patch.object(self.client, '_request', side_effect=pages):
+            with self.assertRaises(RuntimeError):
+                list(self.client.iter_cursor_pages('sensor-data'))
+
+    def test_failed_first_page_raises(self):
+        with mock.patch.object(self.client, '_request', return_value=None):
+            with self.assertRaises(RuntimeError):
+                list(self.client.iter_cursor_pages('sensor-data'))
+
+
+@unittest.skipIf(module is None, '需要客户端依赖（PyQt5、qfluentwidgets 等）')
+class SyncSensorFilesTests(unittest.TestCase):
+    """同步 WebDAV 文件：没有读完全部记录时不移动任何文件"""
+
+    def setUp(self):
+        self.client = module.ApiClient()
+        self.webdav = mock.Mock()
+        self.webdav.exists.return_value = True
+        self.webdav.ls.return_value = [
+            {'type': 'file', 'name': 'sensor_data/a.csv'},
+            {'type': 'file', 'name': 'sensor_data/b.csv'},
+        ]
+        webdav_module = mock.Mock()
+        webdav_module.Client.return_value = self.webdav
+        patcher = mock.patch.dict(sys.modules, {'webdav4': mock.Mock(), 'webdav4.client': webdav_module})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        credentials = {'enabled': True, 'url': 'http://dav', 'username': 'u', 'password': 'p'}
+        config = mock.patch('app.common.config.get_webdav_credentials', return_value=credentials)
+        config.start()
+        self.addCleanup(config.stop)
+
+    def test_failed_page_moves_nothing(self):
+        pages = [
+            {'results': [{'file_url': 'http://dav/sensor_data/a.csv'}],
+             'next': 'http://server/api/sensor-data/?cursor=a'},
+            None,
+        ]
+        with mock.patch.object(self.client, '_request', side_effect=pages):
+            success, _, moved = self.client.sync_sensor_files_with_database()
+        self.assertFalse(success)
+        self.assertEqual(moved, [])
+        self.webdav.move.assert_not_called()
+
+    def test_moves_files_without_records(self):
+        pages = [
+            {'results': [{'file_url': 'http://dav/sensor_data/a.csv'}],
+             'next': 'http://server/api/sensor-data/?cursor=a'},
+            {'results': [], 'next': None},
+        ]
+        with mock.patch.object(self.client, '_request', side_effect=pages):
+            success, _, moved = self.client.sync_sensor_files_with_database()
+        self.assertTrue(success)
+        self.assertEqual(moved, ['b.csv'])
+        self.webdav.move.assert_called_once_with('sensor_data/b.csv', 'sensor_data/unmanaged/b.csv')
+
+
+if __name__ == '__main__':
+    unittest.main()
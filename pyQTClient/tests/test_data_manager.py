@@ -0,0 +1,171 @@
+import sys
+import unittest
+from unittest import mock
+
+try:
+    import PyQt5  # noqa: F401
+except ImportError:
+    PyQt5 = None
+
+
+class FakeSignal:
+    """同步触发的信号替身，便于在测试中直接驱动回调"""
+
+    def __init__(self):
+        self.slots = []
+
+    def connect(self, slot):
+        self.slots.append(slot)
+
+    def emit(self, *args):
+        for slot in self.slots:
+            slot(*args)
+
+
+class FakeWorker:
+    """记录调用参数、不启动线程的 AsyncApiWorker 替身"""
+
+    instances = []
+
+    def __init__(self, api_method, *args, **kwargs):
+        self.api_method = api_method
+        self.args = args
+        self.kwargs = kwargs
+        self.finished = FakeSignal()
+        self.error = FakeSignal()
+        self.started = False
+        self.cancelled = False
+        FakeWorker.instances.append(self)
+
+    def start(self):
+        self.started = True
+
+    def cancel(self):
+        self.cancelled = True
+
+    def isRunning(self):
+        return self.started and not self.cancelled
+
+
+@unittest.skipIf(PyQt5 is None, '需要 PyQt5')
+class DataManagerBatchTests(unittest.TestCase):
+    """合并发送的请求：只有一个待发送请求时单独发送，结果仍要回到登记的回调"""
+
+    def setUp(self):
+        from app.api import data_manager as module
+        FakeWorker.instances = []
+        patcher = mock.patch.object(module, 'AsyncApiWorker', FakeWorker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        timer = mock.patch.object(module.QTimer, 'singleShot')
+        timer.start()
+        self.addCleanup(timer.stop)
+        self.manager = module.DataManager()
+        self.manager.change_feeds = {}
+        self.api_method = mock.Mock(__name__='get_users')
+        self.manager._get_api_method = lambda data_type: self.api_method
+
+    def test_single_pending_request_completes(self):
+        received, errors = [], []
+        handle = self.manager.get_data_async('users', received.append, errors.append)
+        self.manager._flush_batch()
+
+        self.assertEqual(len(FakeWorker.instances), 1)
+        worker = FakeWorker.instances[0]
+        self.assertIs(handle.worker, worker)
+        self.assertTrue(handle.isRunning())
+
+        worker.finished.emit({'results': [{'id': 1}]})
+        self.assertEqual(received, [{'results': [{'id': 1}]}])
+        self.assertEqual(errors, [])
+        self.assertNotIn('users', self.manager.active_requests)
+        self.assertEqual(self.manager.get_cached_data('users'), {'results': [{'id': 1}]})
+
+    def test_single_pending_request_error(self):
+        received, errors = [], []
+        self.manager.get_data_async('users', received.append, errors.append)
+        self.manager._flush_batch()
+
+        FakeWorker.instances[0].error.emit('连接失败')
+        self.assertEqual(errors, ['连接失败'])
+        self.assertEqual(received, [])
+        self.assertNotIn('users', self.manager.active_requests)
+
+        # 失败后再次加载同一类型会发起新的请求
+        self.manager.get_data_async('users', received.append, errors.append)
+        self.assertIn('users', self.manager.active_requests)
+
+    def test_cancelled_single_request_ignores_result(self):
+        received = []
+        handle = self.manager.get_data_async('users', received.append)
+        self.manager._flush_batch()
+        worker = FakeWorker.instances[0]
+
+        handle.cancel()
+        self.assertTrue(worker.cancelled)
+        worker.finished.emit({'results': []})
+        self.assertEqual(received, [])
+        self.assertIsNone(self.manager.get_cached_data('users'))
+
+
+@unittest.skipIf(PyQt5 is None, '需要 PyQt5')
+class DataManagerChangeFeedTests(unittest.TestCase):
+    """增量同步：加工任务首次只加载列表接口的第一页并记下游标，之后的变更合并到这一页"""
+
+    def setUp(self):
+        from app.api import data_manager as module
+        self.manager = module.DataManager()
+        self.client = mock.Mock()
+        self.client.get_change_watermark.return_value = 'W1'
+        patcher = mock.patch.dict(sys.modules, {'app.api.api_client': mock.Mock(api_client=self.client)})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.list_method = mock.Mock(return_value={
+            'count': 120, 'next': 'http://server/api/processing-tasks/?page=2',
+            'results': [{'id': 3, 'processing_time': '2025-01-03'}, {'id': 2, 'processing_time': '2025-01-02'}],
+        })
+        self.manager._get_api_method = lambda data_type: self.list_method
+        self.params = {'expand': 'parameters'}
+
+    def load(self):
+        data = self.manager._load_changes('processing_tasks', self.params)
+        self.manager._update_cache('processing_tasks', data, self.params)
+        return data
+
+    def test_first_sync_loads_first_page(self):
+        data = self.load()
+        self.client.get_changes.assert_not_called()
+        self.list_method.assert_called_once_with(params=self.params)
+        self.client.get_change_watermark.assert_called_once_with('processing-tasks')
+        self.assertEqual([row['id'] for row in data['results']], [3, 2])
+        self.assertEqual((data['watermark'], data['after_id'], data['page_size']), ('W1', None, 2))
+
+    def test_changes_merged_into_first_page(self):
+        self.load()
+        self.client.get_changes.return_value = {
+            'changed': [{'id': 9, 'processing_time': '2025-01-09'}, {'id': 1, 'processing_time': '2025-01-01'}],
+            'deleted': [], 'watermark': 'W2', 'after_id': None,
+        }
+        data = self.load()
+        self.client.get_changes.assert_called_once_with('processing-tasks', 'W1', self.params, None)
+        # 新任务排在最前，第一页之外的修改不进入缓存，行数保持第一页的行数
+        self.assertEqual([row['id'] for row in data['results']], [9, 3])
+        self.assertEqual((data['watermark'], data['page_size']), ('W2', 2))
+
+    def test_small_table_keeps_all_rows(self):
+        self.list_method.return_value = {'count': 1, 'next': None, 'results': [{'id': 1, 'processing_time': '2025-01-01'}]}
+        self.assertIsNone(self.load()['page_size'])
+        self.client.get_changes.return_value = {
+            'changed': [{'id': 2, 'processing_time': '2024-12-01'}], 'deleted': [], 'watermark': 'W2', 'after_id': None,
+        }
+        self.assertEqual([row['id'] for row in self.load()['results']], [1, 2])
+
+    def test_failed_cursor_raises(self):
+        self.client.get_change_watermark.return_value = None
+        with self.assertRaises(RuntimeError):
+            self.manager._load_changes('processing_tasks', self.params)
+        self.list_method.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()